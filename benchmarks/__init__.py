@@ -0,0 +1 @@
+"""Benchmarks of the view selection tool, run them from the root of the repository."""
@@ -0,0 +1,219 @@
+"""Cross-check of the exact search strategies against the exhaustive search.
+
+Run with `python -m benchmarks.cross_check`. Random small DAGs, half of them
+tree-shaped, are searched exhaustively and with every strategy of STRATEGIES, for
+every number of materializations up to `--max_materializations`. The check fails
+(exit code 1) if a strategy does not find the lowest cost the exhaustive search
+finds. The MILP strategy needs SciPy.
+"""
+
+import argparse
+import random
+import sys
+from math import inf, isclose
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from view_selection_python.ConfigurationResults import NO_MODEL, ConfigurationResults
+from view_selection_python.ModelGraph import ModelGraph
+from view_selection_python.ViewSelectionAdvisor import ViewSelectionAdvisor
+
+# Relative difference in cost that is still considered equal
+COST_TOLERANCE = 1e-9
+
+# Relative difference in cost the MILP solver may leave, HiGHS's default relative gap
+MILP_COST_TOLERANCE = 1e-4
+
+
+def get_random_model_graph(rnd: random.Random, n_models: int, is_tree: bool) -> ModelGraph:
+    """Return a random DAG of `n_models` models, with costs in whole bytes.
+
+    Every model depends on at most one earlier model if `is_tree`, and on up to two
+    otherwise. The models nothing depends on are the destination nodes.
+    """
+    edges = []
+    for child in range(1, n_models):
+        n_parents = rnd.randint(0, 1 if is_tree else 2)
+        for parent in rnd.sample(range(child), min(n_parents, child)):
+            edges.append((parent, child))
+
+    parents = {parent for parent, _ in edges}
+    storage_costs = [rnd.randint(1, 1000) for _ in range(n_models)]
+    return ModelGraph(
+        model_ids=(f"model.check.m{model}" for model in range(n_models)),
+        edges=edges,
+        storage_costs=storage_costs,
+        creation_costs=(
+            storage_cost + rnd.randint(0, 10000) for storage_cost in storage_costs
+        ),
+        destination_indices=(
+            model for model in range(n_models) if model not in parents
+        ),
+    )
+
+
+def search(
+    model_graph: ModelGraph,
+    strategy: str,
+    max_materializations: int,
+    storage_space_left: float = inf,
+) -> ConfigurationResults:
+    """Return the results of searching `model_graph` with `strategy`."""
+    view_selection_advisor = ViewSelectionAdvisor(
+        n_mater_in_config=max_materializations,
+        strategy=strategy,
+        model_graph=model_graph,
+        storage_space_left=storage_space_left,
+        show_progress=False,
+    )
+    view_selection_advisor.plan_search()
+    return view_selection_advisor.advise()
+
+
+def get_lowest_cost(results: ConfigurationResults) -> float:
+    """Return the lowest total cost of all configurations, including the default one.
+
+    Returns inf if no configuration fits in storage.
+    """
+    return float(results.get_array()["total_cost"].min(initial=inf))
+
+
+def get_lowest_costs_per_size(results: ConfigurationResults) -> Dict[int, float]:
+    """Return the lowest total cost of the configurations of each number of materializations."""
+    rows = results.get_array()
+    sizes = (rows["models"] != NO_MODEL).sum(axis=1)
+    return {
+        int(size): float(rows["total_cost"][sizes == size].min())
+        for size in np.unique(sizes)
+    }
+
+
+def check_exact(
+    model_graph: ModelGraph, max_materializations: int
+) -> List[str]:
+    """Return the differences between the exact and the exhaustive search.
+
+    The exact search finds the cheapest configuration of every size, so their costs
+    are compared per size.
+    """
+    expected = get_lowest_costs_per_size(
+        search(model_graph, "exhaustive", max_materializations)
+    )
+    found = get_lowest_costs_per_size(
+        search(model_graph, "exact", max_materializations)
+    )
+    return [
+        f"exact: size {size} costs {found.get(size)}, exhaustive finds {cost}"
+        for size, cost in expected.items()
+        if size not in found or not isclose(found[size], cost, rel_tol=COST_TOLERANCE)
+    ]
+
+
+def check_milp(model_graph: ModelGraph, max_materializations: int) -> List[str]:
+    """Return the differences between the MILP and the exhaustive search.
+
+    Both searches are compared with several storage bounds: none, the storage cost
+    of the unbounded optimum and one byte more (a configuration only fits if its
+    storage cost is below the bound), and the median storage cost of all
+    configurations.
+    """
+    unbounded = search(model_graph, "exhaustive", max_materializations)
+    rows = unbounded.get_array()
+    optimum_storage = float(rows["storage_cost"][np.argmin(rows["total_cost"])])
+    storage_bounds = [
+        inf,
+        optimum_storage,
+        optimum_storage + 1,
+        float(np.median(rows["storage_cost"])),
+    ]
+
+    differences = []
+    for storage_bound in storage_bounds:
+        expected = get_lowest_cost(
+            search(model_graph, "exhaustive", max_materializations, storage_bound)
+            if storage_bound < inf
+            else unbounded
+        )
+        found = get_lowest_cost(
+            search(model_graph, "milp", max_materializations, storage_bound)
+        )
+        if found != expected and not isclose(
+            found, expected, rel_tol=MILP_COST_TOLERANCE
+        ):
+            differences.append(
+                f"milp: storage bound {storage_bound} costs {found}, "
+                f"exhaustive finds {expected}"
+            )
+    return differences
+
+
+# The checks of each strategy, which return the differences with the exhaustive search
+STRATEGIES: Dict[str, Callable[[ModelGraph, int], List[str]]] = {
+    "exact": check_exact,
+    "milp": check_milp,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Cross-check the exact search strategies against the exhaustive search"
+    )
+    parser.add_argument(
+        "-n",
+        "--n_dags",
+        type=int,
+        default=300,
+        help="Set the number of random DAGs to check. Default is 300."
+    )
+    parser.add_argument(
+        "-mm",
+        "--max_materializations",
+        type=int,
+        default=3,
+        help="Set the maximum number of materializations to check. Default is 3."
+    )
+    parser.add_argument(
+        "--max_models",
+        type=int,
+        default=9,
+        help="Set the maximum number of models of a DAG. Default is 9."
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="Set the seed of the random DAGs. Default is 0."
+    )
+    args = parser.parse_args()
+
+    rnd = random.Random(args.seed)
+    n_checks = {strategy: 0 for strategy in STRATEGIES}
+    failures = []
+
+    for dag_number in range(args.n_dags):
+        model_graph = get_random_model_graph(
+            rnd,
+            n_models=rnd.randint(2, args.max_models),
+            is_tree=dag_number % 2 == 0,
+        )
+        for max_materializations in range(1, args.max_materializations + 1):
+            for strategy, check in STRATEGIES.items():
+                n_checks[strategy] += 1
+                failures += [
+                    f"DAG {dag_number}, {max_materializations} materializations: {failure}"
+                    for failure in check(model_graph, max_materializations)
+                ]
+
+    for strategy, n in n_checks.items():
+        print(f"{strategy:<8} {n} checks against the exhaustive search")
+
+    if failures:
+        print(f"{len(failures)} differences with the exhaustive search:")
+        for failure in failures:
+            print(f" - {failure}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""Generator of synthetic dbt DAGs, with compiled code and query plans for every model."""
+
+import math
+import random
+from typing import Dict, List
+
+from view_selection_python.DbBackend import DbBackend
+
+SHAPES = ["chain", "fan_out", "diamond", "forest"]
+
+# Number of layers of models between a source and a destination node. The rewritten
+# SQL of a model inlines the code of all its upstream models, so deeper DAGs make the
+# code (and the time to rewrite it) grow quickly.
+DEFAULT_DEPTH = 8
+
+# Number of children of every model in the `fan_out` shape
+FAN_OUT = 10
+
+# Number of models per domain in the `forest` shape
+MODELS_PER_DOMAIN = 100
+
+
+def _get_reference(model_number: int) -> str:
+    """Return the relation name by which other models refer to a model."""
+    return f'"bench"."analytics"."m{model_number}"'
+
+
+def _get_source_reference(source_number: int) -> str:
+    """Return the relation name of a source table."""
+    return f'"bench"."raw"."source_{source_number}"'
+
+
+class SyntheticDag:
+    """A synthetic dbt DAG of a given shape and number of models.
+
+    The shapes are
+        - chain: independent chains of `depth` models
+        - fan_out: trees in which every model has FAN_OUT children
+        - diamond: a lattice of `depth` layers, in which every model depends on two
+          models of the previous layer
+        - forest: domains of MODELS_PER_DOMAIN models, each a random tree of at most
+          `depth` layers
+    The models without children are the destination nodes. Every model gets compiled
+    code that refers to its upstream models (or to a source table), and a query plan
+    in the JSON format of EXPLAIN, with random numbers of rows and widths.
+    """
+
+    def __init__(
+        self, shape: str, n_models: int, seed: int = 0, depth: int = DEFAULT_DEPTH
+    ):
+        """Generate the DAG."""
+        self.shape = shape
+        self.n_models = n_models
+        self.depth = depth
+        self.random = random.Random(seed)
+        self.model_ids = [f"model.bench.m{number}" for number in range(n_models)]
+        self.dependencies: List[List[int]] = [[] for _ in range(n_models)]
+
+        generators = {
+            "chain": self._generate_chains,
+            "fan_out": self._generate_fan_out,
+            "diamond": self._generate_diamond,
+            "forest": self._generate_forest,
+        }
+        generators[shape]()
+
+        self.destination_nodes = self._get_destination_nodes()
+        self.compiled_code = [self._get_compiled_code(model) for model in range(n_models)]
+        self.plans = [self._get_plan(model) for model in range(n_models)]
+
+    def _generate_chains(self):
+        """Let every model depend on the previous one, except the first of each chain."""
+        for model in range(self.n_models):
+            if model % self.depth != 0:
+                self.dependencies[model] = [model - 1]
+
+    def _generate_fan_out(self):
+        """Let every model depend on a parent with FAN_OUT children, in at most `depth` layers."""
+        n_roots = max(1, math.ceil(self.n_models / FAN_OUT ** (self.depth - 1)))
+        for model in range(n_roots, self.n_models):
+            self.dependencies[model] = [(model - n_roots) // FAN_OUT]
+
+    def _generate_diamond(self):
+        """Let every model depend on two neighbouring models of the previous layer."""
+        width = max(1, math.ceil(self.n_models / self.depth))
+        for model in range(width, self.n_models):
+            position = model % width
+            layer_start = model - position - width
+            self.dependencies[model] = sorted({
+                layer_start + position,
+                layer_start + (position + 1) % width,
+            })
+
+    def _generate_forest(self):
+        """Let every model depend on a random model of the previous layer of its domain."""
+        for domain_start in range(0, self.n_models, MODELS_PER_DOMAIN):
+            domain_size = min(MODELS_PER_DOMAIN, self.n_models - domain_start)
+            layer_size = max(1, math.ceil(domain_size / self.depth))
+            for position in range(layer_size, domain_size):
+                layer_start = position - position % layer_size - layer_size
+                parent = self.random.randrange(layer_start, layer_start + layer_size)
+                self.dependencies[domain_start + position] = [domain_start + parent]
+
+    def _get_destination_nodes(self) -> List[int]:
+        """Return the models no other model depends on."""
+        has_children = [False] * self.n_models
+        for dependencies in self.dependencies:
+            for dependency in dependencies:
+                has_children[dependency] = True
+        return [model for model in range(self.n_models) if not has_children[model]]
+
+    def _get_compiled_code(self, model: int) -> str:
+        """Return code that selects from the upstream models, or from a source table."""
+        references = [
+            _get_reference(dependency) for dependency in self.dependencies[model]
+        ] or [_get_source_reference(model % 50)]
+        joins = " natural join ".join(
+            f"{reference} as t{number}" for number, reference in enumerate(references)
+        )
+        return f"select t0.id, t0.value, {model} as model_number from {joins}"
+
+    def _get_scan_plan(self) -> Dict:
+        """Return the plan of a scan of a single relation."""
+        return {
+            "Node Type": "Seq Scan",
+            "Plan Rows": self.random.randint(100, 1_000_000),
+            "Plan Width": self.random.randint(8, 200),
+        }
+
+    def _get_plan(self, model: int) -> List[Dict]:
+        """Return a query plan, as EXPLAIN (FORMAT JSON) does, for the code of a model."""
+        scans = [self._get_scan_plan() for _ in range(max(1, len(self.dependencies[model])))]
+        if len(scans) == 1:
+            plan = scans[0]
+        else:
+            plan = {
+                "Node Type": "Hash Join",
+                "Plan Rows": self.random.randint(100, 1_000_000),
+                "Plan Width": self.random.randint(8, 400),
+                "Plans": scans,
+            }
+        return [{"Plan": plan}]
+
+    def get_model_info_dict(self) -> Dict[str, Dict]:
+        """Return the model info dict as ModelInfoManager has it before rewriting the SQL."""
+        model_info_dict = {
+            model_id: {
+                "code": self.compiled_code[model],
+                "compiled_code": self.compiled_code[model],
+                "referenced_by": [],
+                "depends_on": [self.model_ids[dependency] for dependency in dependencies],
+                "compiled_code_reference": _get_reference(model),
+            }
+            for model, (model_id, dependencies) in enumerate(
+                zip(self.model_ids, self.dependencies)
+            )
+        }
+        for model_id, dependencies in zip(self.model_ids, self.dependencies):
+            for dependency in dependencies:
+                model_info_dict[self.model_ids[dependency]]["referenced_by"].append(model_id)
+        return model_info_dict
+
+
+class SyntheticPostgresHandler(DbBackend):
+    """Answers the queries of ModelInfoManager and ViewSelectionAdvisor from a SyntheticDag.
+
+    This makes it possible to run the whole tool without a DB. EXPLAIN returns the
+    plan of the model, regardless of its (rewritten) code.
+    """
+
+    def __init__(self, dag: SyntheticDag):
+        """Initialize the class."""
+        self.dag = dag
+        self.plans = dict(zip(dag.model_ids, dag.plans))
+
+    def get_all_models_and_code(self) -> List[tuple]:
+        """Return (model id, compiled code) of every model."""
+        return list(zip(self.dag.model_ids, self.dag.compiled_code))
+
+    def get_destination_nodes(self) -> List[tuple]:
+        """Return (model id,) of every destination node."""
+        return [(self.dag.model_ids[model],) for model in self.dag.destination_nodes]
+
+    def get_model_dependencies(self) -> List[tuple]:
+        """Return (model id, dependencies, compiled code reference) of every model."""
+        return [
+            (
+                model_id,
+                repr([self.dag.model_ids[dependency] for dependency in dependencies]),
+                _get_reference(model),
+            )
+            for model, (model_id, dependencies) in enumerate(
+                zip(self.dag.model_ids, self.dag.dependencies)
+            )
+        ]
+
+    def get_maintenance_fractions(self) -> List[tuple]:
+        """Return no maintenance fractions, so every model gets the default one."""
+        return []
+
+    def get_storage_space_left(self) -> float:
+        """Return an amount of storage space every configuration fits in."""
+        return math.inf
+
+    def get_output_explain(self, query_to_explain: str, model_id: str | None = None) -> List[Dict]:
+        """Return the query plan of the model."""
+        return self.plans[model_id]
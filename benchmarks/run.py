@@ -0,0 +1,345 @@
+"""Benchmark of the stages of the view selection tool on synthetic DAGs.
+
+Run with `python -m benchmarks.run`. Every stage is timed on DAGs of every shape
+and size, see SyntheticDag, without a DB. For every stage, the number of items
+(models or configurations) it handled per second and its peak memory use are
+recorded. The results are compared with a baseline, and the benchmark fails (exit
+code 1) if the throughput of a stage got more than `--tolerance` lower.
+"""
+
+import argparse
+import itertools
+import json
+import math
+import os
+import random
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+from tabulate import tabulate
+
+from view_selection_python.ConfigCostEstimator import ConfigCostEstimator
+from view_selection_python.ConfigurationGenerator import (
+    MaterializationConfigurationGenerator,
+)
+from view_selection_python.CostEstimatorSinglePlan import CostEstimatorSinglePlan
+from view_selection_python.FudgeFactorCalculator import FudgeFactorCalculator
+from view_selection_python.ModelInfoManager import ModelInfoManager
+from view_selection_python.SQLRewriter import SQLRewriter
+from view_selection_python.ViewSelectionAdvisor import ViewSelectionAdvisor
+
+from .dag_generator import SHAPES, SyntheticDag, SyntheticPostgresHandler
+
+DEFAULT_BASELINE_FILEPATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+DEFAULT_SIZES = [10, 100, 1000, 10000]
+
+# Number of random configurations FudgeFactorCalculator and ConfigCostEstimator get
+N_SAMPLED_CONFIGS = 1000
+
+# Maximum number of configurations to enumerate with MaterializationConfigurationGenerator
+MAX_ENUMERATED_CONFIGS = 100_000
+
+# Stages faster than this number of seconds are too noisy to compare with the baseline
+MIN_COMPARED_SECONDS = 0.05
+
+
+def _measure(stage: Callable[[], int], n_repeats: int) -> Tuple[float, int, float]:
+    """Return the seconds, number of items and peak memory (in MB) of running `stage`.
+
+    The stage is timed `n_repeats` times, the fastest run counts. It is run once more
+    to trace its memory use, which slows it down.
+    """
+    seconds = math.inf
+    for _ in range(n_repeats):
+        start = time.perf_counter()
+        n_items = stage()
+        seconds = min(seconds, time.perf_counter() - start)
+
+    tracemalloc.start()
+    stage()
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return seconds, n_items, peak_memory / 1e6
+
+
+def _get_sampled_configs(
+    intermediate_models: List[int], max_materializations: int, seed: int
+) -> List[Tuple[int]]:
+    """Return N_SAMPLED_CONFIGS random configurations of `max_materializations` models."""
+    rnd = random.Random(seed)
+    size = min(max_materializations, len(intermediate_models))
+    return [
+        tuple(sorted(rnd.sample(intermediate_models, size)))
+        for _ in range(N_SAMPLED_CONFIGS)
+    ]
+
+
+def _get_stages(
+    dag: SyntheticDag, max_materializations: int, strategy: str, time_budget: float
+) -> Dict[str, Callable[[], int]]:
+    """Return the stages to benchmark, each returns the number of items it handled."""
+    postgres_handler = SyntheticPostgresHandler(dag)
+    model_info_manager = ModelInfoManager(postgres_handler=postgres_handler)
+    model_graph = model_info_manager.get_model_graph()
+    intermediate_models = model_graph.intermediate_indices.tolist()
+    sampled_configs = _get_sampled_configs(
+        intermediate_models, max_materializations, seed=dag.n_models
+    )
+    config_cost_estimator = ConfigCostEstimator(model_graph=model_graph)
+
+    def rewrite_sql() -> int:
+        SQLRewriter(
+            dag.get_model_info_dict(), postgres_handler.get_destination_nodes()
+        ).update_all_sql_code()
+        return dag.n_models
+
+    def estimate_single_plans() -> int:
+        cost_estimator = CostEstimatorSinglePlan()
+        for plan in dag.plans:
+            cost_estimator.estimate_costs(plan)
+        return dag.n_models
+
+    def load_models() -> int:
+        ModelInfoManager(postgres_handler=postgres_handler)
+        return dag.n_models
+
+    def calculate_fudge_factors() -> int:
+        for config in sampled_configs:
+            FudgeFactorCalculator(config, model_graph).get_fudge_factors()
+        return len(sampled_configs)
+
+    def estimate_config_costs() -> int:
+        for config in sampled_configs:
+            config_cost_estimator.estimate_cost_of_configuration(config)
+        return len(sampled_configs)
+
+    def enumerate_configs() -> int:
+        config_generator = MaterializationConfigurationGenerator(
+            all_intermediate_models=intermediate_models,
+            max_materializations=max_materializations,
+        )
+        n_configs = min(
+            config_generator.get_number_of_configurations(), MAX_ENUMERATED_CONFIGS
+        )
+        for _ in config_generator.get_configurations_in_range(0, n_configs):
+            pass
+        return n_configs
+
+    def advise() -> int:
+        view_selection_advisor = ViewSelectionAdvisor(
+            n_mater_in_config=max_materializations,
+            time_budget=time_budget,
+            strategy=strategy,
+            postgres_handler=postgres_handler,
+            model_info_manager=model_info_manager,
+            show_progress=False,
+        )
+        view_selection_advisor.advise()
+        return round(
+            view_selection_advisor.get_fraction_of_space_covered()
+            * view_selection_advisor.get_number_of_configurations()
+        )
+
+    return {
+        "SQLRewriter": rewrite_sql,
+        "CostEstimatorSinglePlan": estimate_single_plans,
+        "ModelInfoManager": load_models,
+        "FudgeFactorCalculator": calculate_fudge_factors,
+        "ConfigCostEstimator": estimate_config_costs,
+        "ConfigurationGenerator": enumerate_configs,
+        "advise": advise,
+    }
+
+
+def run_benchmarks(
+    shapes: List[str],
+    sizes: List[int],
+    max_materializations: int,
+    strategy: str,
+    time_budget: float,
+    n_repeats: int,
+) -> List[Dict]:
+    """Return a result for every stage, on a DAG of every shape and size."""
+    results = []
+    for shape, n_models in itertools.product(shapes, sizes):
+        dag = SyntheticDag(shape, n_models)
+        stages = _get_stages(dag, max_materializations, strategy, time_budget)
+
+        for stage, run_stage in stages.items():
+            seconds, n_items, peak_memory = _measure(run_stage, n_repeats)
+            results.append({
+                "shape": shape,
+                "n_models": n_models,
+                "stage": stage,
+                "seconds": seconds,
+                "n_items": n_items,
+                "items_per_second": n_items / seconds if seconds > 0 else None,
+                "peak_memory_mb": peak_memory,
+            })
+            print(f"{shape:>8} {n_models:>6} {stage:<24} {seconds:.4f} s", file=sys.stderr)
+
+    return results
+
+
+def _get_key(result: Dict) -> Tuple[str, int, str]:
+    """Return what identifies a result in a baseline."""
+    return result["shape"], result["n_models"], result["stage"]
+
+
+def compare_with_baseline(
+    results: List[Dict], baseline: List[Dict], tolerance: float
+) -> List[Dict]:
+    """Add the ratio with the baseline to every result, and return the regressions.
+
+    The ratio is the number of seconds per item relative to the baseline, so the
+    advise stage, which runs for a fixed time budget, is compared by the number of
+    configurations it evaluates. A result regressed if its ratio is more than
+    1 + `tolerance`. Stages that took less than MIN_COMPARED_SECONDS in the baseline
+    are not compared.
+    """
+    baseline_results = {_get_key(result): result for result in baseline}
+    regressions = []
+
+    for result in results:
+        baseline_result = baseline_results.get(_get_key(result))
+        if baseline_result is None or baseline_result["seconds"] < MIN_COMPARED_SECONDS:
+            result["ratio_with_baseline"] = None
+            continue
+
+        result["ratio_with_baseline"] = (
+            baseline_result["items_per_second"] / result["items_per_second"]
+        )
+        if result["ratio_with_baseline"] > 1 + tolerance:
+            regressions.append(result)
+
+    return regressions
+
+
+def _print_results(results: List[Dict]):
+    """Print a table of the results."""
+    print(tabulate(
+        [
+            (
+                result["shape"],
+                result["n_models"],
+                result["stage"],
+                f"{result['seconds']:.4f}",
+                f"{result['items_per_second']:,.0f}" if result["items_per_second"] else "-",
+                f"{result['peak_memory_mb']:.2f}",
+                (
+                    f"{result['ratio_with_baseline']:.2f}x"
+                    if result.get("ratio_with_baseline") is not None
+                    else "-"
+                ),
+            )
+            for result in results
+        ],
+        headers=[
+            "Shape", "Models", "Stage", "Seconds", "Items/s", "Peak MB", "vs baseline"
+        ],
+        tablefmt="pretty",
+    ))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the stages of vst-advise on synthetic DAGs"
+    )
+    parser.add_argument(
+        "--shapes",
+        type=lambda shapes: shapes.split(","),
+        default=SHAPES,
+        help=f"Select the comma-separated shapes of the DAGs. Default is {','.join(SHAPES)}."
+    )
+    parser.add_argument(
+        "--sizes",
+        type=lambda sizes: [int(size) for size in sizes.split(",")],
+        default=DEFAULT_SIZES,
+        help="Select the comma-separated numbers of models of the DAGs. Default is "
+             f"{','.join(map(str, DEFAULT_SIZES))}."
+    )
+    parser.add_argument(
+        "-mm",
+        "--max_materializations",
+        type=int,
+        default=2,
+        help="Set the maximum number of models to materialize. Default is 2."
+    )
+    parser.add_argument(
+        "--strategy",
+        type=str,
+        default="exhaustive",
+        help="Select the search strategy of the advise stage. Default is 'exhaustive'."
+    )
+    parser.add_argument(
+        "--time_budget",
+        type=float,
+        default=1,
+        help="Set the time budget of the advise stage in seconds. Default is 1."
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="Set the number of times every stage is timed, the fastest run counts. "
+             "Default is 3."
+    )
+    parser.add_argument(
+        "--baseline",
+        type=str,
+        default=DEFAULT_BASELINE_FILEPATH,
+        help="Select the baseline to compare with. Default is benchmarks/baseline.json."
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="Set the fraction the throughput of a stage may be lower than the baseline. "
+             "Default is 0.25."
+    )
+    parser.add_argument(
+        "--save_baseline",
+        action="store_true",
+        help="Write the results to the baseline file instead of comparing with it."
+    )
+    args = parser.parse_args()
+
+    results = run_benchmarks(
+        shapes=args.shapes,
+        sizes=args.sizes,
+        max_materializations=args.max_materializations,
+        strategy=args.strategy,
+        time_budget=args.time_budget,
+        n_repeats=args.repeat,
+    )
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=1)
+        _print_results(results)
+        print(f"The results were written to {args.baseline}.")
+        return
+
+    regressions = []
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r") as f:
+            regressions = compare_with_baseline(results, json.load(f), args.tolerance)
+
+    _print_results(results)
+
+    if regressions:
+        print(f"The throughput of {len(regressions)} stage(s) got more than {args.tolerance:.0%} lower:")
+        for result in regressions:
+            print(
+                f" - {result['stage']} on a {result['shape']} DAG of "
+                f"{result['n_models']} models: {result['ratio_with_baseline']:.2f}x"
+            )
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Benchmark of the startup time of `vst-advise`.
+
+Run with `python -m benchmarks.startup`. The benchmark fails (exit code 1) if
+`vst-advise --help` imports one of HEAVY_MODULES, or if its startup takes more than
+MAX_STARTUP_OVERHEAD seconds longer than starting Python itself.
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from typing import List
+
+# Modules that are only needed by the commands that use them
+HEAVY_MODULES = ["numpy", "psycopg2", "ruamel", "scipy", "pyarrow", "tqdm", "tabulate"]
+
+# Seconds `vst-advise --help` may take on top of starting Python
+MAX_STARTUP_OVERHEAD = 0.15
+
+RUN_HELP = f"""
+import json
+import sys
+from view_selection_python.main import run
+try:
+    run()
+except SystemExit:
+    pass
+print(json.dumps([module for module in {HEAVY_MODULES!r} if module in sys.modules]), file=sys.stderr)
+"""
+
+
+def _time_command(command: List[str], n_runs: int) -> float:
+    """Return the median number of seconds `command` takes."""
+    durations = []
+    for _ in range(n_runs):
+        start = time.perf_counter()
+        subprocess.run(command, check=True, capture_output=True)
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations)
+
+
+def _get_imported_heavy_modules() -> List[str]:
+    """Return the modules of HEAVY_MODULES that `vst-advise --help` imports."""
+    output = subprocess.run(
+        [sys.executable, "-c", RUN_HELP, "--help"],
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return json.loads(output.stderr.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the startup time of vst-advise")
+    parser.add_argument(
+        "-n",
+        "--n_runs",
+        type=int,
+        default=10,
+        help="Set the number of runs to take the median of. Default is 10."
+    )
+    args = parser.parse_args()
+
+    python_startup = _time_command([sys.executable, "-c", "pass"], args.n_runs)
+    help_startup = _time_command([sys.executable, "-c", RUN_HELP, "--help"], args.n_runs)
+    overhead = help_startup - python_startup
+    imported_heavy_modules = _get_imported_heavy_modules()
+
+    print(f"Python startup:             {python_startup * 1000:.1f} ms")
+    print(f"vst-advise --help:          {help_startup * 1000:.1f} ms")
+    print(f"Overhead of vst-advise:     {overhead * 1000:.1f} ms "
+          f"(at most {MAX_STARTUP_OVERHEAD * 1000:.0f} ms)")
+    print(f"Heavy modules imported:     {', '.join(imported_heavy_modules) or 'none'}")
+
+    if imported_heavy_modules or overhead > MAX_STARTUP_OVERHEAD:
+        print("Startup time regressed.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
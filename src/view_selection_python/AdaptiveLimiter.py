@@ -0,0 +1,101 @@
+"""AdaptiveLimiter class."""
+
+# Weight of a new latency in the moving average of the latency
+LATENCY_WEIGHT = 0.3
+
+# Factor the baseline latency grows with for every query, so it follows a DB that
+# became slower for good, e.g. after a change of its hardware
+BASELINE_DRIFT = 1.01
+
+# The DB is considered overloaded if the latency exceeds the baseline by more than
+# this factor
+LATENCY_TOLERANCE = 2
+
+# Factor the limit is multiplied with when the DB is overloaded
+BACKOFF_FACTOR = 0.7
+
+
+class AdaptiveLimiter:
+    """Limits the number of concurrent queries, adapting the limit to how busy the DB is.
+
+    The limit follows additive increase, multiplicative decrease (AIMD), like TCP
+    congestion control. It starts at `min_limit` and grows by 1 for every query that
+    finishes, doubling every round trip, until the DB shows signs of load for the first
+    time. After that, it grows by 1 per round trip (of `limit` queries). It is
+    multiplied by BACKOFF_FACTOR when
+        - the moving average of the latency exceeds the baseline latency by more than
+          LATENCY_TOLERANCE, so the queries slow each other (or other work) down
+        - a query timed out
+        - the number of queries of other clients that are active in the DB reaches
+          `max_db_load`, if given
+    The limit is decreased at most once per round trip, as the queries that were
+    already running reflect the old limit. It stays between `min_limit` and `max_limit`.
+
+    The baseline is the lowest moving average of the latency so far, an estimate of the
+    latency of a DB without load, like TCP Vegas uses. It slowly drifts upwards, so
+    a single fast period does not throttle the queries forever.
+    """
+
+    def __init__(
+        self, max_limit: int, min_limit: int = 1, max_db_load: int | None = None
+    ):
+        """Initialize the class."""
+        self.max_limit = max_limit
+        self.min_limit = min(min_limit, max_limit)
+        self.max_db_load = max_db_load
+        self.limit = float(self.min_limit)
+        self.latency = None
+        self.baseline_latency = None
+        self.in_slow_start = True
+        self.n_finished_since_backoff = 0
+        self.db_is_busy = False
+        self.n_backoffs = 0
+
+    def get_limit(self) -> int:
+        """Return the number of queries that may run concurrently."""
+        return int(self.limit)
+
+    def _back_off(self):
+        """Decrease the limit, unless it was decreased less than a round trip ago."""
+        self.in_slow_start = False
+        if self.n_finished_since_backoff < self.limit or self.limit <= self.min_limit:
+            return
+        self.limit = max(self.min_limit, self.limit * BACKOFF_FACTOR)
+        self.n_finished_since_backoff = 0
+        self.n_backoffs += 1
+
+    def _increase(self):
+        """Increase the limit, fast until the DB showed signs of load, and slowly afterwards."""
+        if self.in_slow_start:
+            self.limit = min(self.max_limit, self.limit + 1)
+        else:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+    def add_latency(self, seconds: float):
+        """Adapt the limit to the latency of a query that finished."""
+        self.n_finished_since_backoff += 1
+        if self.latency is None:
+            self.latency = self.baseline_latency = seconds
+        else:
+            self.latency += LATENCY_WEIGHT * (seconds - self.latency)
+            self.baseline_latency = min(
+                self.baseline_latency * BASELINE_DRIFT, self.latency
+            )
+
+        if self.db_is_busy or self.latency > LATENCY_TOLERANCE * self.baseline_latency:
+            self._back_off()
+        else:
+            self._increase()
+
+    def add_timeout(self):
+        """Adapt the limit to a query that timed out."""
+        self.n_finished_since_backoff += 1
+        self._back_off()
+
+    def set_db_load(self, n_active_queries: int):
+        """Adapt the limit to the number of queries of other clients that are active in the DB."""
+        self.db_is_busy = (
+            self.max_db_load is not None and n_active_queries >= self.max_db_load
+        )
+        if self.db_is_busy:
+            self._back_off()
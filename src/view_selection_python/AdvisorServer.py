@@ -0,0 +1,313 @@
+"""Classes to answer requests to an AdvisorSession over HTTP."""
+
+import json
+import os
+import socketserver
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from math import inf
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Tuple
+
+from .Exceptions.errors import INVALID_REQUEST_FIELD_ERROR, SERVER_ERROR
+from .SearchPlanner import SEARCH_STRATEGIES
+
+# The CLI imports DEFAULT_HOST and DEFAULT_PORT, so the session (and numpy) is not
+# imported here
+if TYPE_CHECKING:
+    from .AdvisorSession import AdvisorSession
+
+
+def _get_result_record(
+    config: None | Tuple[str], total_cost: float, storage_cost: float, default_cost: float
+) -> Dict:
+    """Return the fields of a single result, as in the files written with --output.
+
+    The difference with the default configuration is null if the default cost is 0.
+    """
+    return {
+        "config": list(config) if config else [],
+        "total_cost": float(total_cost),
+        "storage_cost": float(storage_cost),
+        "diff_with_default": (
+            round(((total_cost / default_cost) - 1) * 100, 3) if default_cost else None
+        ),
+    }
+
+
+def _is_positive_int(value) -> bool:
+    """Return whether `value` is an integer of at least 1, as the CLI requires."""
+    return isinstance(value, int) and not isinstance(value, bool) and value >= 1
+
+
+def _is_time_budget(value) -> bool:
+    """Return whether `value` is a positive number of seconds, or None for no budget."""
+    return value is None or (
+        isinstance(value, (int, float)) and not isinstance(value, bool) and value > 0
+    )
+
+
+def _is_config(value) -> bool:
+    """Return whether `value` is a list of model ids."""
+    return isinstance(value, list) and all(isinstance(model, str) for model in value)
+
+
+def _get_field(
+    request: Dict, field: str, default, is_valid: Callable[..., bool], description: str
+):
+    """Return a field of the request, or `default` if it is missing.
+
+    A ValueError is raised if the field does not pass `is_valid`.
+    """
+    value = request.get(field, default)
+    if not is_valid(value):
+        raise ValueError(
+            INVALID_REQUEST_FIELD_ERROR.format(field=field, description=description)
+        )
+    return value
+
+
+class AdvisorRequestHandler(BaseHTTPRequestHandler):
+    """Handles a single request to the server, with JSON request and response bodies.
+
+    Endpoints:
+        - GET /status: the number of models, the default cost and the storage space left
+        - GET /stats: the time spent in each phase and counters, see RunStats
+        - POST /evaluate {"configs": [[model_id, ...], ...]}: the costs of each configuration
+        - POST /search {"max_materializations", "strategy", "time_budget", "pareto",
+          "top_x"}: the best configurations, all fields are optional
+        - POST /reload {"full": false}: read the models from the DB again
+    """
+
+    def _get_session(self) -> "AdvisorSession":
+        """Return the session of the server."""
+        return self.server.session
+
+    def _read_json(self) -> Dict:
+        """Return the JSON body of the request, an empty dict if there is none."""
+        content_length = int(self.headers.get("Content-Length", 0))
+        if content_length == 0:
+            return {}
+        return json.loads(self.rfile.read(content_length))
+
+    def _send_json(self, status: int, body: Dict):
+        """Send a response with a JSON body."""
+        encoded_body = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(encoded_body)))
+        self.end_headers()
+        self.wfile.write(encoded_body)
+
+    def _get_records(
+        self, results: Iterable[Tuple[None | Tuple[str], float, float]]
+    ) -> List[Dict]:
+        """Return the fields of each (config, total cost, storage cost)."""
+        default_cost = self._get_session().get_default_cost()
+        return [
+            _get_result_record(config, total_cost, storage_cost, default_cost)
+            for config, total_cost, storage_cost in results
+        ]
+
+    def _get_status(self, request: Dict) -> Dict:
+        """Return information on the loaded model graph.
+
+        Without a storage bound, the storage space left is null, as JSON has no
+        infinity.
+        """
+        session = self._get_session()
+        storage_space_left = session.get_storage_space_left()
+        return {
+            "n_models": session.model_graph.n_models,
+            "n_intermediate_models": len(session.model_graph.intermediate_indices),
+            "default_cost": session.get_default_cost(),
+            "storage_space_left": (
+                storage_space_left if storage_space_left < inf else None
+            ),
+            "seconds_since_reload": time.monotonic() - self.server.last_reload,
+        }
+
+    def _get_run_stats(self, request: Dict) -> Dict:
+        """Return the time spent in each phase and counters of the work done."""
+        return self._get_session().get_run_stats()
+
+    def _evaluate(self, request: Dict) -> Dict:
+        """Return the costs of the requested configurations."""
+        configs = request["configs"]
+        if not isinstance(configs, list) or not all(map(_is_config, configs)):
+            raise ValueError(
+                INVALID_REQUEST_FIELD_ERROR.format(
+                    field="configs", description="a list of lists of model ids"
+                )
+            )
+        costs = self._get_session().evaluate(configs)
+        return {
+            "results": self._get_records(
+                (config, total_cost, storage_cost)
+                for config, (total_cost, storage_cost) in zip(configs, costs)
+            )
+        }
+
+    def _search(self, request: Dict) -> Dict:
+        """Return the best configurations, searched with the requested settings."""
+        results = self._get_session().search(
+            max_materializations=_get_field(
+                request,
+                "max_materializations",
+                2,
+                _is_positive_int,
+                "a positive integer",
+            ),
+            strategy=_get_field(
+                request,
+                "strategy",
+                "auto",
+                lambda strategy: strategy in SEARCH_STRATEGIES,
+                f"one of {SEARCH_STRATEGIES}",
+            ),
+            time_budget=_get_field(
+                request,
+                "time_budget",
+                self.server.time_budget,
+                _is_time_budget,
+                "a positive number of seconds or null",
+            ),
+            pareto=_get_field(
+                request,
+                "pareto",
+                False,
+                lambda pareto: isinstance(pareto, bool),
+                "true or false",
+            ),
+            top_x=_get_field(
+                request, "top_x", 10, _is_positive_int, "a positive integer"
+            ),
+        )
+        return {"results": self._get_records(results)}
+
+    def _reload(self, request: Dict) -> Dict:
+        """Read the models from the DB again, and return the models that were explained."""
+        return {"explained_models": self.server.reload(full=request.get("full", False))}
+
+    def _handle(self, endpoints: Dict):
+        """Answer the request with the endpoint for its path."""
+        endpoint = endpoints.get(self.path)
+        if endpoint is None:
+            self._send_json(404, {"error": f"Unknown endpoint `{self.path}`."})
+            return
+
+        try:
+            response = endpoint(self._read_json())
+        except KeyError as error:
+            self._send_json(400, {"error": f"Missing field {error} in the request."})
+            return
+        except (TypeError, ValueError, RuntimeError) as error:
+            self._send_json(400, {"error": str(error)})
+            return
+        except Exception as error:
+            self._send_json(500, {"error": SERVER_ERROR.format(error=repr(error))})
+            return
+
+        self._send_json(200, response)
+
+    def do_GET(self):
+        """Answer a GET request."""
+        self._handle({"/status": self._get_status, "/stats": self._get_run_stats})
+
+    def do_POST(self):
+        """Answer a POST request."""
+        self._handle({
+            "/evaluate": self._evaluate,
+            "/search": self._search,
+            "/reload": self._reload,
+        })
+
+    def log_message(self, format: str, *args):
+        """Do not log every request."""
+
+
+class _AdvisorServerMixin:
+    """Keeps the session of a server, and reloads it periodically.
+
+    Requests are answered one at a time, in the same thread that reloads the session,
+    so a request never sees a half-reloaded session.
+    """
+
+    def _init_session(
+        self, session: "AdvisorSession", time_budget: float | None, reload_interval: float
+    ):
+        """Store the session, `reload_interval` is in seconds, 0 disables reloading."""
+        self.session = session
+        self.time_budget = time_budget
+        self.reload_interval = reload_interval
+        self.last_reload = time.monotonic()
+
+    def reload(self, full: bool = False) -> List[str]:
+        """Reload the session, see AdvisorSession.reload()."""
+        explained_models = self.session.reload(full=full)
+        self.last_reload = time.monotonic()
+        return explained_models
+
+    def service_actions(self):
+        """Reload the session when the reload interval has passed, between two requests."""
+        if (
+            self.reload_interval > 0
+            and time.monotonic() - self.last_reload > self.reload_interval
+        ):
+            # Keep serving the models loaded before if the DB can't be reached
+            try:
+                self.reload()
+            except Exception as error:
+                self.last_reload = time.monotonic()
+                print(f"Reloading the models failed, trying again later: {error}")
+
+
+class AdvisorHTTPServer(_AdvisorServerMixin, HTTPServer):
+    """Answers requests over HTTP on a TCP port."""
+
+    def __init__(
+        self,
+        session: "AdvisorSession",
+        host: str,
+        port: int,
+        time_budget: float | None = None,
+        reload_interval: float = 0,
+    ):
+        """Initialize the server and bind it to `host` and `port`.
+
+        Searches get `time_budget` seconds unless a request gives its own.
+        """
+        self._init_session(session, time_budget, reload_interval)
+        super().__init__((host, port), AdvisorRequestHandler)
+
+    def get_address(self) -> str:
+        """Return the address the server listens on."""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+class AdvisorUnixServer(_AdvisorServerMixin, socketserver.UnixStreamServer):
+    """Answers requests over HTTP on a Unix socket."""
+
+    def __init__(
+        self,
+        session: "AdvisorSession",
+        socket_path: str,
+        time_budget: float | None = None,
+        reload_interval: float = 0,
+    ):
+        """Initialize the server and bind it to the Unix socket at `socket_path`.
+
+        Searches get `time_budget` seconds unless a request gives its own.
+        """
+        self._init_session(session, time_budget, reload_interval)
+        super().__init__(socket_path, AdvisorRequestHandler)
+
+    def get_address(self) -> str:
+        """Return the address the server listens on."""
+        return f"unix:{self.server_address}"
+
+    def server_close(self):
+        """Close the server and remove the socket file."""
+        super().server_close()
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
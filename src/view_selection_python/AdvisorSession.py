@@ -0,0 +1,269 @@
+"""AdvisorSession class."""
+
+from math import inf
+from typing import Dict, Iterable, List, Tuple
+
+from .ConfigCostEstimator import ConfigCostEstimator
+from .DbBackend import DbBackend
+from .Exceptions.errors import (
+    RELOAD_REQUIRES_DB_ERROR,
+    UNKNOWN_MODEL_ERROR,
+    UNKNOWN_STRATEGY_ERROR,
+)
+from .ModelGraph import ModelGraph
+from .ModelInfoManager import ModelInfoManager
+from .PostgresHandler import DEFAULT_MAX_CONCURRENT_EXPLAINS, PostgresHandler
+from .ReplayBackend import ReplayBackend
+from .RunStats import RunStats
+from .SearchPlanner import SEARCH_STRATEGIES
+from .ViewSelectionAdvisor import ViewSelectionAdvisor
+
+
+class AdvisorSession:
+    """Keeps the models of a dbt project loaded, to evaluate and search configurations repeatedly.
+
+    Loading the models (reading the VST tables and running EXPLAIN for every model) is
+    by far the most expensive step of the tool. A session does it once, after which
+    evaluate() and search() only use the model graph in memory. A session does not
+    read the command line or depend on the current working directory, so it can be
+    used from notebooks, scripts and services.
+
+    A session is created from a dbt project (from_project()), from the credentials of
+    the DB schema holding the VST tables (from_credentials()), from a recording of an
+    earlier run (from_recording()), or directly from a ModelGraph. Without a DB, there
+    is no storage bound.
+
+    The time spent in each phase and counters of the work done (e.g. the number of
+    EXPLAINs) since the session was created are available from get_run_stats().
+    """
+
+    def __init__(
+        self,
+        model_graph: ModelGraph,
+        postgres_handler: DbBackend | None = None,
+        model_info_manager: ModelInfoManager | None = None,
+        run_stats: RunStats | None = None,
+    ):
+        """Initialize the class with a model graph, and optionally the objects it was read with."""
+        self.model_graph = model_graph
+        self.postgres_handler = postgres_handler
+        self.model_info_manager = model_info_manager
+        self.run_stats = run_stats or RunStats()
+        self.config_cost_estimator = ConfigCostEstimator(model_graph=model_graph)
+
+    @classmethod
+    def from_project(
+        cls,
+        project_dir: str | None = None,
+        profile: str | None = None,
+        target: str | None = None,
+        planning_profile: str = "default",
+        explain_timeout: float = 30,
+        record_filepath: str | None = None,
+        run_stats: RunStats | None = None,
+        manifest_path: str | None = None,
+        max_concurrent_explains: int = DEFAULT_MAX_CONCURRENT_EXPLAINS,
+        max_db_load: int | None = None,
+        model_explain_timeouts: Dict[str, float] | None = None,
+        reduce_plans: bool = False,
+    ) -> "AdvisorSession":
+        """Create a session for the dbt project in `project_dir`, the current working directory by default.
+
+        `profile` and `target` select the DB credentials in profiles.yml, and default
+        to the ones the project and profile specify. With `manifest_path`, the models
+        are read from dbt's manifest.json, see ManifestBackend. With `record_filepath`,
+        the queries to the DB are recorded to that file, see RecordingBackend.
+        `max_concurrent_explains`, `max_db_load` and `model_explain_timeouts` limit
+        the EXPLAINs, see PostgresHandler. With `reduce_plans`, only the costs of the
+        query plans are received, see ModelInfoManager.
+        """
+        view_selection_advisor = ViewSelectionAdvisor(
+            planning_profile=planning_profile,
+            explain_timeout=explain_timeout,
+            project_dir=project_dir,
+            profile=profile,
+            target=target,
+            record_filepath=record_filepath,
+            run_stats=run_stats,
+            manifest_path=manifest_path,
+            max_concurrent_explains=max_concurrent_explains,
+            max_db_load=max_db_load,
+            model_explain_timeouts=model_explain_timeouts,
+            reduce_plans=reduce_plans,
+        )
+        return cls(
+            model_graph=view_selection_advisor.model_graph,
+            postgres_handler=view_selection_advisor.postgres_handler,
+            model_info_manager=view_selection_advisor.model_info_manager,
+            run_stats=view_selection_advisor.run_stats,
+        )
+
+    @classmethod
+    def from_credentials(
+        cls,
+        db_creds: Dict,
+        planning_profile: str = "default",
+        explain_timeout: float = 30,
+        max_concurrent_explains: int = DEFAULT_MAX_CONCURRENT_EXPLAINS,
+        max_db_load: int | None = None,
+        model_explain_timeouts: Dict[str, float] | None = None,
+        reduce_plans: bool = False,
+    ) -> "AdvisorSession":
+        """Create a session from the credentials of the DB schema holding the VST tables.
+
+        `db_creds` has the keys host, port, dbname, user, password and schema, as in
+        profiles.yml. `max_concurrent_explains`, `max_db_load` and
+        `model_explain_timeouts` limit the EXPLAINs, see PostgresHandler. With
+        `reduce_plans`, only the costs of the query plans are received, see
+        ModelInfoManager.
+        """
+        postgres_handler = PostgresHandler(
+            db_creds=db_creds,
+            planning_profile=planning_profile,
+            explain_timeout=explain_timeout,
+            max_concurrent_explains=max_concurrent_explains,
+            max_db_load=max_db_load,
+            model_explain_timeouts=model_explain_timeouts,
+        )
+        run_stats = RunStats()
+        model_info_manager = ModelInfoManager(
+            postgres_handler=postgres_handler,
+            run_stats=run_stats,
+            reduce_plans=reduce_plans,
+        )
+        return cls(
+            model_graph=model_info_manager.get_model_graph(),
+            postgres_handler=postgres_handler,
+            model_info_manager=model_info_manager,
+            run_stats=run_stats,
+        )
+
+    @classmethod
+    def from_recording(
+        cls, filepath: str, run_stats: RunStats | None = None
+    ) -> "AdvisorSession":
+        """Create a session from a recording written with `record_filepath`, without a DB."""
+        postgres_handler = ReplayBackend(filepath=filepath)
+        run_stats = run_stats or RunStats()
+        model_info_manager = ModelInfoManager(
+            postgres_handler=postgres_handler, run_stats=run_stats
+        )
+        return cls(
+            model_graph=model_info_manager.get_model_graph(),
+            postgres_handler=postgres_handler,
+            model_info_manager=model_info_manager,
+            run_stats=run_stats,
+        )
+
+    def reload(self, full: bool = False) -> List[str]:
+        """Read the models from the DB again, e.g. after the VST tables were refreshed.
+
+        EXPLAIN is only run again for models whose code, upstream models or destination
+        status, or those of their upstream models, changed, unless `full` is set. Set
+        `full` after changes that leave the models as they are, e.g. new table
+        statistics. Returns the models EXPLAIN was run for.
+        """
+        if self.model_info_manager is None:
+            raise RuntimeError(RELOAD_REQUIRES_DB_ERROR)
+
+        self.model_info_manager = ModelInfoManager(
+            postgres_handler=self.postgres_handler,
+            previous_model_info_dict=(
+                None if full else self.model_info_manager.get_model_info_dict()
+            ),
+            run_stats=self.run_stats,
+            reduce_plans=self.model_info_manager.reduce_plans,
+        )
+        self.model_graph = self.model_info_manager.get_model_graph()
+        self.config_cost_estimator = ConfigCostEstimator(model_graph=self.model_graph)
+        return self.model_info_manager.get_explained_models()
+
+    def _get_config_indices(self, config: None | Iterable[str]) -> None | Tuple[int]:
+        """Return the model indices of a configuration given by model ids."""
+        if not config:
+            return None
+
+        try:
+            return tuple(sorted(self.model_graph.get_model_index(model) for model in config))
+        except KeyError as error:
+            raise ValueError(UNKNOWN_MODEL_ERROR.format(model=error.args[0]))
+
+    def get_default_cost(self) -> float:
+        """Return the estimated total cost of the default configuration."""
+        default_cost, _ = self.config_cost_estimator.estimate_cost_of_configuration(None)
+        return default_cost
+
+    def get_storage_space_left(self) -> float:
+        """Return the storage space left in the DB, which is unlimited without a DB."""
+        if self.postgres_handler is None:
+            return inf
+        return self.postgres_handler.get_storage_space_left()
+
+    def evaluate(
+        self, configs: Iterable[None | Iterable[str]]
+    ) -> List[Tuple[float, float]]:
+        """Return the estimated (total cost, storage cost) of each configuration.
+
+        A configuration is given by the ids of its materialized models, None (or an
+        empty iterable) is the default configuration. The costs are in the same order
+        as `configs`.
+        """
+        with self.run_stats.phase("evaluate"):
+            return [
+                self.config_cost_estimator.estimate_cost_of_configuration(
+                    self._get_config_indices(config)
+                )
+                for config in configs
+            ]
+
+    def search(
+        self,
+        max_materializations: int = 2,
+        strategy: str = "auto",
+        time_budget: float | None = None,
+        pareto: bool = False,
+        top_x: int = 10,
+    ) -> List[Tuple[None | Tuple[str], float, float]]:
+        """Search for the best configurations, see ViewSelectionAdvisor.advise().
+
+        Returns (config, total cost, storage cost) of the `top_x` configurations with
+        the lowest total cost that fit in the storage space left, or with `pareto`, of
+        all configurations on the Pareto frontier by ascending storage cost. A
+        ValueError is raised for an unknown strategy, or for `pareto` with a strategy
+        that cannot find the Pareto frontier.
+        """
+        if strategy not in SEARCH_STRATEGIES:
+            raise ValueError(
+                UNKNOWN_STRATEGY_ERROR.format(strategy=strategy, strategies=SEARCH_STRATEGIES)
+            )
+
+        view_selection_advisor = ViewSelectionAdvisor(
+            n_mater_in_config=max_materializations,
+            time_budget=time_budget,
+            strategy=strategy,
+            pareto=pareto,
+            n_results_to_keep=top_x,
+            postgres_handler=self.postgres_handler,
+            model_info_manager=self.model_info_manager,
+            model_graph=self.model_graph,
+            show_progress=False,
+            run_stats=self.run_stats,
+        )
+        results = view_selection_advisor.advise()
+
+        if pareto:
+            return list(results.get_points())
+
+        return [
+            (results.get_config(row), float(row["total_cost"]), float(row["storage_cost"]))
+            for row in results.get_top_rows(top_x)
+        ]
+
+    def close(self):
+        """Close the backend of the session, e.g. to finish a recording."""
+        if self.postgres_handler is not None:
+            self.postgres_handler.close()
+
+    def get_run_stats(self) -> Dict:
+        """Return the time spent in each phase and counters of the work done, see RunStats.get_stats()."""
+        return self.run_stats.get_stats()
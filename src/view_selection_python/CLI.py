@@ -4,6 +4,55 @@ CLI class.
 
 import argparse
 import os
+from typing import Dict, List, Tuple
+
+from .PostgresHandler import DEFAULT_MAX_CONCURRENT_EXPLAINS, PLANNING_PROFILES
+from .SearchPlanner import CHEAPEST_ONLY_STRATEGIES, SEARCH_STRATEGIES
+from .ShardResults import parse_shard
+from .CheckpointManager import DEFAULT_CHECKPOINT_FILEPATH
+from .Exceptions.errors import (
+    INVALID_MODEL_EXPLAIN_TIMEOUT_ERROR,
+    INVALID_POSITIVE_INT_ERROR,
+    INVALID_TARGETS_ERROR,
+    PARETO_INCOMPATIBLE_ERROR,
+    RECORD_REPLAY_INCOMPATIBLE_ERROR,
+    TARGETS_INCOMPATIBLE_ERROR,
+)
+from .ResultWriter import OUTPUT_FORMATS
+
+# Where the `serve` command listens by default
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+
+def _parse_positive_int(value: str) -> int:
+    """Parse an integer that is at least 1."""
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise argparse.ArgumentTypeError(INVALID_POSITIVE_INT_ERROR.format(value=value))
+    return number
+
+
+def _parse_targets(value: str) -> List[str]:
+    """Parse a comma-separated list of targets, e.g. 'dev,staging,prod'."""
+    targets = [target.strip() for target in value.split(",") if target.strip()]
+    if not targets:
+        raise argparse.ArgumentTypeError(INVALID_TARGETS_ERROR.format(targets=value))
+    return targets
+
+
+def _parse_model_explain_timeout(value: str) -> Tuple[str, float]:
+    """Parse a time budget for the models matching a pattern, e.g. 'model.my_project.big_*=120'."""
+    pattern, _, seconds = value.rpartition("=")
+    try:
+        return pattern, float(seconds)
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            INVALID_MODEL_EXPLAIN_TIMEOUT_ERROR.format(value=value)
+        )
 
 
 def _get_args() -> argparse.Namespace:
@@ -11,10 +60,39 @@ def _get_args() -> argparse.Namespace:
     This function is responsible for parsing the command-line arguments provided by the user when running the View Selection Tool.
     It uses the argparse module to define and parse these arguments.
 
-    The function defines three command-line arguments:
+    The function defines the following command-line arguments:
     1. max_materializations: This argument is used to specify the maximum number of models to materialize. It is an integer and its default value is 2.
     2. profile: This argument is used to select the profile to use. It is a string.
     3. target: This argument is used to select the target profile to use. It is a string.
+    4. top_x: This argument is used to specify the number of configurations to print. It is a positive integer and its default value is 10.
+    5. planning_profile: This argument is used to select the first planning profile for EXPLAIN. It is a string.
+    6. explain_timeout: This argument is used to specify the time budget of a single EXPLAIN in seconds. It is a float and its default value is 30.
+    7. refine: This argument is used to specify the number of best configurations to re-estimate precisely. It is a positive integer, by default no configurations are re-estimated.
+    8. time_budget: This argument is used to specify the search time budget in seconds. It is a float and by default there is no budget.
+    9. strategy: This argument is used to select the search strategy. It is a string and its default value is 'auto'.
+    10. shard: This argument is used to evaluate a single shard `i/N` of all configurations. It is parsed into a tuple (i, N).
+    11. shard_output: This argument is used to specify the file to write the results of the shard to. It is a string.
+    12. checkpoint: This argument is used to specify the file to write checkpoints of the search to. It is a string.
+    13. checkpoint_interval: This argument is used to specify the number of seconds between two checkpoints. It is a float and its default value is 60.
+    14. resume: This flag is used to continue the search from the last checkpoint.
+    15. pareto: This flag is used to print the Pareto frontier of total cost and storage cost instead of the top configurations.
+    16. output: This argument is used to specify the file to write all evaluated configurations to. It is a string.
+    17. format: This argument is used to select the format of the output file. It is a string and its default value is 'jsonl'.
+    18. record: This argument is used to specify the file to record every query to the DB and its result to. It is a string.
+    19. replay: This argument is used to specify a recording to answer the queries from instead of the DB. It is a string.
+    20. stats: This argument is used to specify the file to write the timings per phase and counters of the run to. It is a string.
+    21. cprofile: This argument is used to specify the directory to write a cProfile profile of each phase to. It is a string.
+    22. manifest: This argument is used to specify dbt's manifest.json to read the models and their dependencies from. It is a string.
+    23. sensitivity: This argument is used to specify the number of perturbed fudge factor tables to re-score the best configurations with. It is a positive integer, by default no sensitivity analysis is done.
+    24. targets: This argument is used to select several targets to advise on in a single run. It is parsed into a list of strings.
+    25. max_concurrent_explains: This argument is used to specify the maximum number of EXPLAINs to run at once. It is a positive integer and its default value is 8.
+    26. max_db_load: This argument is used to specify the number of active queries of other clients at which EXPLAIN backs off. It is a positive integer and by default the load is not checked.
+    27. model_explain_timeout: This argument is used to specify the time budget of EXPLAIN for the models matching a pattern, as `PATTERN=SECONDS`. It can be given several times and is parsed into a tuple (pattern, seconds).
+    28. calibrate: This flag is used to rank the configurations on their build time in seconds, predicted from the run history in Elementary.
+    29. reduce_plans: This flag is used to compute the costs of the query plans inside the DB, so only the costs are transferred instead of the whole plans.
+
+    Furthermore, it defines the `merge` command, which takes the files written by the shards (shard_files) and top_x,
+    and the `serve` command, which takes the host, port or Unix socket to listen on, and the reload_interval.
 
     Returns:
         argparse.Namespace: An object containing the parsed command-line arguments.
@@ -54,13 +132,326 @@ def _get_args() -> argparse.Namespace:
     parser.add_argument(
         "-x",
         "--top_x",
-        type=int,
+        type=_parse_positive_int,
         default=10,
         help="Select the top x configurations to print in the terminal. Default is 10."
     )
 
+    # Define planning profile argument
+    parser.add_argument(
+        "-pp",
+        "--planning_profile",
+        type=str,
+        choices=list(PLANNING_PROFILES.keys()),
+        default="default",
+        help="Select the planning profile to start with when running EXPLAIN. Cheaper "
+             "profiles limit the planner's join search. Default is 'default'."
+    )
+
+    # Define explain timeout argument
+    parser.add_argument(
+        "-et",
+        "--explain_timeout",
+        type=float,
+        default=30,
+        help="Set the number of seconds EXPLAIN may take for a single model before "
+             "falling back to a cheaper planning profile. Use 0 to disable. Default is 30."
+    )
+
+    # Define refine argument
+    parser.add_argument(
+        "-r",
+        "--refine",
+        type=_parse_positive_int,
+        default=0,
+        help="Re-estimate the cost of the best N configurations using real query plans "
+             "instead of fudge factors. By default, no configurations are refined."
+    )
+
+    # Define time budget argument
+    parser.add_argument(
+        "-tb",
+        "--time_budget",
+        type=float,
+        default=None,
+        help="Set the number of seconds to search for the best configurations. The most "
+             "promising configurations are explored first. By default, all configurations "
+             "are explored."
+    )
+
+    # Define strategy argument
+    parser.add_argument(
+        "-s",
+        "--strategy",
+        type=str,
+        choices=SEARCH_STRATEGIES,
+        default="auto",
+        help="Select the search strategy. 'auto' picks the exhaustive, exact, pruned, or "
+             "heuristic search based on the projected runtime and the time budget. "
+             "Default is 'auto'."
+    )
+
+    # Define shard argument
+    parser.add_argument(
+        "--shard",
+        type=parse_shard,
+        default=None,
+        help="Only evaluate the i-th of N equal parts of all configurations, specified as "
+             "'i/N'. The best configurations are written to a file, which can be combined "
+             "with those of the other shards using `vst-advise merge`."
+    )
+
+    # Define shard output argument
+    parser.add_argument(
+        "--shard_output",
+        type=str,
+        default=None,
+        help="Select the file to write the results of the shard to. "
+             "Default is 'vst_shard_<i>_of_<N>.json'."
+    )
+
+    # Define checkpoint argument
+    parser.add_argument(
+        "--checkpoint",
+        type=str,
+        default=None,
+        help="Periodically write the state of the (exhaustive) search to this file, so it "
+             "can be resumed using --resume. Default is no checkpoints, or "
+             f"'{DEFAULT_CHECKPOINT_FILEPATH}' when resuming."
+    )
+
+    # Define checkpoint interval argument
+    parser.add_argument(
+        "--checkpoint_interval",
+        type=float,
+        default=60,
+        help="Set the number of seconds between two checkpoints. Default is 60."
+    )
+
+    # Define resume argument
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue the search from the last checkpoint. This fails if the model graph "
+             "has changed since the checkpoint was written."
+    )
+
+    # Define pareto argument
+    parser.add_argument(
+        "--pareto",
+        action="store_true",
+        help="Print all configurations on the Pareto frontier of total cost and storage "
+             "cost, ignoring the storage space left, so the best configuration for any "
+             "storage budget can be read off."
+    )
+
+    # Define output argument
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=str,
+        default=None,
+        help="Write every evaluated configuration that fits in storage to this file, "
+             "while the search runs. By default, no file is written."
+    )
+
+    # Define format argument
+    parser.add_argument(
+        "-f",
+        "--format",
+        type=str,
+        choices=OUTPUT_FORMATS,
+        default="jsonl",
+        help="Select the format of the --output file. 'parquet' requires pyarrow. "
+             "Default is 'jsonl'."
+    )
+
+    # Define record argument
+    parser.add_argument(
+        "--record",
+        type=str,
+        default=None,
+        help="Record every query to the DB and its result to this file, so the run can "
+             "be repeated without a DB using --replay."
+    )
+
+    # Define replay argument
+    parser.add_argument(
+        "--replay",
+        type=str,
+        default=None,
+        help="Answer the queries from a file written with --record instead of the DB. "
+             "No dbt project or profiles.yml is needed."
+    )
+
+    # Define stats argument
+    parser.add_argument(
+        "--stats",
+        type=str,
+        default=None,
+        help="Write the time spent in each phase of the run, and counters such as the "
+             "number of EXPLAINs and their latency, to this file as JSON."
+    )
+
+    # Define cprofile argument
+    parser.add_argument(
+        "--cprofile",
+        type=str,
+        default=None,
+        help="Run each phase under cProfile, and write a pstats file and collapsed "
+             "stacks (for flame graphs) per phase to this directory."
+    )
+
+    # Define manifest argument
+    parser.add_argument(
+        "--manifest",
+        type=str,
+        default=None,
+        help="Read the models, their compiled code and their dependencies from dbt's "
+             "manifest.json (e.g. target/manifest.json) instead of the VST tables. The "
+             "DB is then only used to estimate costs."
+    )
+
+    # Define sensitivity argument
+    parser.add_argument(
+        "--sensitivity",
+        type=_parse_positive_int,
+        default=0,
+        help="Re-score the best configurations with N randomly perturbed fudge factor "
+             "tables, and report how often each of them stays in the top x. By default, "
+             "no sensitivity analysis is done."
+    )
+
+    # Define targets argument
+    parser.add_argument(
+        "--targets",
+        type=_parse_targets,
+        default=None,
+        help="Advise on several targets of the profile in one run, e.g. "
+             "'dev,staging,prod', and print their best configurations side by side."
+    )
+
+    # Define max concurrent explains argument
+    parser.add_argument(
+        "--max_concurrent_explains",
+        type=_parse_positive_int,
+        default=DEFAULT_MAX_CONCURRENT_EXPLAINS,
+        help="Set the maximum number of EXPLAINs to run at once. Fewer run while the "
+             "DB is busy: the number adapts to the latency of EXPLAIN. Default is "
+             f"{DEFAULT_MAX_CONCURRENT_EXPLAINS}."
+    )
+
+    # Define max db load argument
+    parser.add_argument(
+        "--max_db_load",
+        type=_parse_positive_int,
+        default=None,
+        help="Run fewer EXPLAINs at once while at least this many queries of other "
+             "clients are active in the DB, according to pg_stat_activity. By default, "
+             "the load is not checked."
+    )
+
+    # Define model explain timeout argument
+    parser.add_argument(
+        "--model_explain_timeout",
+        type=_parse_model_explain_timeout,
+        action="append",
+        default=[],
+        metavar="PATTERN=SECONDS",
+        help="Set the number of seconds EXPLAIN may take for the models matching a "
+             "pattern, e.g. 'model.my_project.big_*=120', instead of --explain_timeout. "
+             "Can be given several times, the first matching pattern is used."
+    )
+
+    # Define calibrate argument
+    parser.add_argument(
+        "--calibrate",
+        action="store_true",
+        help="Fit the estimated costs to the build times of the models in Elementary's "
+             "run history, and rank the configurations on their predicted build time in "
+             "seconds."
+    )
+
+    # Define reduce plans argument
+    parser.add_argument(
+        "--reduce_plans",
+        action="store_true",
+        help="Compute the costs of each query plan inside the DB, and only transfer "
+             "those instead of the whole plan. Falls back to scanning the costs from "
+             "the text of the plan if the DB does not support it."
+    )
+
+    # Define the merge command, which combines the results of several shards
+    subparsers = parser.add_subparsers(dest="command")
+    merge_parser = subparsers.add_parser(
+        "merge",
+        help="Combine the results of several shards into the final ranking"
+    )
+    merge_parser.add_argument(
+        "shard_files",
+        nargs="+",
+        help="The files written by the shards"
+    )
+    # Without a default, a top_x given before `merge` is kept
+    merge_parser.add_argument(
+        "-x",
+        "--top_x",
+        type=_parse_positive_int,
+        default=argparse.SUPPRESS,
+        help="Select the top x configurations to print in the terminal. Default is 10."
+    )
+
+    # Define the serve command, which answers requests with the models kept in memory
+    serve_parser = subparsers.add_parser(
+        "serve",
+        help="Load the models once and answer evaluate and search requests over HTTP"
+    )
+    serve_parser.add_argument(
+        "--host",
+        type=str,
+        default=DEFAULT_HOST,
+        help=f"Select the host to listen on. Default is '{DEFAULT_HOST}'."
+    )
+    serve_parser.add_argument(
+        "--port",
+        type=int,
+        default=DEFAULT_PORT,
+        help=f"Select the port to listen on. Default is {DEFAULT_PORT}."
+    )
+    serve_parser.add_argument(
+        "--socket",
+        type=str,
+        default=None,
+        help="Listen on a Unix socket at this path instead of a TCP port."
+    )
+    serve_parser.add_argument(
+        "--reload_interval",
+        type=float,
+        default=0,
+        help="Set the number of seconds after which the models are read from the DB "
+             "again. Use 0 to only reload on request. Default is 0."
+    )
+
     # Parse the command-line arguments and return the result
-    return parser.parse_args()
+    args = parser.parse_args()
+
+    if args.command is None and args.pareto and (
+        args.shard or args.checkpoint or args.resume or args.refine or args.sensitivity
+        or args.strategy in CHEAPEST_ONLY_STRATEGIES
+    ):
+        parser.error(PARETO_INCOMPATIBLE_ERROR)
+
+    if args.record and args.replay:
+        parser.error(RECORD_REPLAY_INCOMPATIBLE_ERROR)
+
+    if args.command is None and args.targets and (
+        args.target or args.shard or args.checkpoint or args.resume or args.pareto
+        or args.output or args.refine or args.sensitivity or args.record or args.replay
+        or args.cprofile or args.calibrate
+    ):
+        parser.error(TARGETS_INCOMPATIBLE_ERROR)
+
+    return args
 
 
 class CLI:
@@ -120,3 +511,310 @@ class CLI:
             The default value is 10 if no argument is provided.
         """
         return self.args.top_x
+
+    def get_planning_profile(self) -> str:
+        """
+        Retrieve the planning profile to start with when running EXPLAIN.
+
+        Returns:
+            str: The name of the planning profile, as specified by the user.
+            The default value is 'default' if no argument is provided.
+        """
+        return self.args.planning_profile
+
+    def get_explain_timeout(self) -> float:
+        """
+        Retrieve the time budget in seconds of a single EXPLAIN.
+
+        Returns:
+            float: The time budget of a single EXPLAIN, as specified by the user.
+            The default value is 30 if no argument is provided.
+        """
+        return self.args.explain_timeout
+
+    def get_refine(self) -> int:
+        """
+        Retrieve the number of best configurations to re-estimate using real query plans.
+
+        Returns:
+            int: The number of configurations to refine, as specified by the user.
+            The default value is 0 if no argument is provided.
+        """
+        return self.args.refine
+
+    def get_time_budget(self) -> float | None:
+        """
+        Retrieve the number of seconds to search for the best configurations.
+
+        Returns:
+            float | None: The time budget, as specified by the user.
+            Returns None if no time budget is specified.
+        """
+        return self.args.time_budget
+
+    def get_strategy(self) -> str:
+        """
+        Retrieve the search strategy.
+
+        Returns:
+            str: The search strategy, as specified by the user.
+            The default value is 'auto' if no argument is provided.
+        """
+        return self.args.strategy
+
+    def get_command(self) -> str | None:
+        """
+        Retrieve the command specified in the CLI arguments.
+
+        Returns:
+            str | None: The command, e.g. 'merge'. Returns None if no command is
+            specified, in which case the advice should be provided.
+        """
+        return self.args.command
+
+    def get_shard(self) -> Tuple[int, int] | None:
+        """
+        Retrieve the shard to evaluate.
+
+        Returns:
+            Tuple[int, int] | None: The shard (i, N) as specified by the user.
+            Returns None if no shard is specified.
+        """
+        return self.args.shard
+
+    def get_shard_output(self) -> str | None:
+        """
+        Retrieve the file to write the results of the shard to.
+
+        Returns:
+            str | None: The file as specified by the user.
+            Returns None if no file is specified.
+        """
+        return self.args.shard_output
+
+    def get_checkpoint(self) -> str | None:
+        """
+        Retrieve the file to write checkpoints of the search to.
+
+        Returns:
+            str | None: The checkpoint file as specified by the user. When resuming
+            without a specified file, the default checkpoint file is returned.
+            Returns None if no checkpoints should be written.
+        """
+        if self.args.checkpoint is None and self.args.resume:
+            return DEFAULT_CHECKPOINT_FILEPATH
+        return self.args.checkpoint
+
+    def get_checkpoint_interval(self) -> float:
+        """
+        Retrieve the number of seconds between two checkpoints.
+
+        Returns:
+            float: The checkpoint interval, as specified by the user.
+            The default value is 60 if no argument is provided.
+        """
+        return self.args.checkpoint_interval
+
+    def get_resume(self) -> bool:
+        """
+        Retrieve whether the search should continue from the last checkpoint.
+
+        Returns:
+            bool: True if the user specified --resume, False otherwise.
+        """
+        return self.args.resume
+
+    def get_pareto(self) -> bool:
+        """
+        Retrieve whether the Pareto frontier of total cost and storage cost should be printed.
+
+        Returns:
+            bool: True if the user specified --pareto, False otherwise.
+        """
+        return self.args.pareto
+
+    def get_output(self) -> str | None:
+        """
+        Retrieve the file to write all evaluated configurations to.
+
+        Returns:
+            str | None: The file as specified by the user.
+            Returns None if no file is specified.
+        """
+        return self.args.output
+
+    def get_format(self) -> str:
+        """
+        Retrieve the format of the output file.
+
+        Returns:
+            str: The format, as specified by the user.
+            The default value is 'jsonl' if no argument is provided.
+        """
+        return self.args.format
+
+    def get_record(self) -> str | None:
+        """
+        Retrieve the file to record the queries to the DB to.
+
+        Returns:
+            str | None: The file as specified by the user.
+            Returns None if the queries should not be recorded.
+        """
+        return self.args.record
+
+    def get_replay(self) -> str | None:
+        """
+        Retrieve the recording to answer the queries to the DB from.
+
+        Returns:
+            str | None: The file as specified by the user.
+            Returns None if the queries should be run against the DB.
+        """
+        return self.args.replay
+
+    def get_stats(self) -> str | None:
+        """
+        Retrieve the file to write the timings per phase and counters of the run to.
+
+        Returns:
+            str | None: The file as specified by the user.
+            Returns None if no stats should be written.
+        """
+        return self.args.stats
+
+    def get_cprofile(self) -> str | None:
+        """
+        Retrieve the directory to write a cProfile profile of each phase to.
+
+        Returns:
+            str | None: The directory as specified by the user.
+            Returns None if the phases should not be profiled.
+        """
+        return self.args.cprofile
+
+    def get_manifest(self) -> str | None:
+        """
+        Retrieve dbt's manifest.json to read the models from.
+
+        Returns:
+            str | None: The path of the manifest as specified by the user.
+            Returns None if the models should be read from the VST tables.
+        """
+        return self.args.manifest
+
+    def get_sensitivity(self) -> int:
+        """
+        Retrieve the number of perturbed fudge factor tables to re-score the best configurations with.
+
+        Returns:
+            int: The number of perturbed tables, as specified by the user.
+            The default value is 0 if no argument is provided.
+        """
+        return self.args.sensitivity
+
+    def get_targets(self) -> List[str] | None:
+        """
+        Retrieve the targets to advise on in a single run.
+
+        Returns:
+            List[str] | None: The targets as specified by the user.
+            Returns None if a single target should be used.
+        """
+        return self.args.targets
+
+    def get_max_concurrent_explains(self) -> int:
+        """
+        Retrieve the maximum number of EXPLAINs to run at once.
+
+        Returns:
+            int: The maximum number of EXPLAINs, as specified by the user.
+            The default value is DEFAULT_MAX_CONCURRENT_EXPLAINS if no argument is provided.
+        """
+        return self.args.max_concurrent_explains
+
+    def get_max_db_load(self) -> int | None:
+        """
+        Retrieve the number of active queries of other clients at which EXPLAIN backs off.
+
+        Returns:
+            int | None: The number of active queries, as specified by the user.
+            Returns None if the load of the DB should not be checked.
+        """
+        return self.args.max_db_load
+
+    def get_model_explain_timeouts(self) -> Dict[str, float]:
+        """
+        Retrieve the time budget of EXPLAIN for the models matching each pattern.
+
+        Returns:
+            Dict[str, float]: The number of seconds per pattern, in the order specified by the user.
+        """
+        return dict(self.args.model_explain_timeout)
+
+    def get_calibrate(self) -> bool:
+        """
+        Retrieve whether to rank the configurations on their predicted build time in seconds.
+
+        Returns:
+            bool: True if the costs should be calibrated to the run history, False otherwise.
+        """
+        return self.args.calibrate
+
+    def get_reduce_plans(self) -> bool:
+        """
+        Retrieve whether to compute the costs of the query plans inside the DB.
+
+        Returns:
+            bool: True if only the costs of the query plans should be transferred, False otherwise.
+        """
+        return self.args.reduce_plans
+
+    def get_shard_files(self) -> List[str]:
+        """
+        Retrieve the shard files to merge.
+
+        Returns:
+            List[str]: The files written by the shards, as specified for the `merge` command.
+        """
+        return self.args.shard_files
+
+    def get_host(self) -> str:
+        """
+        Retrieve the host the `serve` command listens on.
+
+        Returns:
+            str: The host, as specified by the user.
+            The default value is '127.0.0.1' if no argument is provided.
+        """
+        return self.args.host
+
+    def get_port(self) -> int:
+        """
+        Retrieve the port the `serve` command listens on.
+
+        Returns:
+            int: The port, as specified by the user.
+            The default value is 8765 if no argument is provided.
+        """
+        return self.args.port
+
+    def get_socket(self) -> str | None:
+        """
+        Retrieve the Unix socket the `serve` command listens on.
+
+        Returns:
+            str | None: The path of the Unix socket, as specified by the user.
+            Returns None if the server should listen on a TCP port.
+        """
+        return self.args.socket
+
+    def get_reload_interval(self) -> float:
+        """
+        Retrieve the number of seconds after which the `serve` command reloads the models.
+
+        Returns:
+            float: The reload interval, as specified by the user.
+            The default value is 0 (only reload on request) if no argument is provided.
+        """
+        return self.args.reload_interval
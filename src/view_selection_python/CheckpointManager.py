@@ -0,0 +1,140 @@
+"""CheckpointManager class."""
+
+import json
+import os
+import tempfile
+import time
+from typing import TYPE_CHECKING, Dict, List, Tuple
+
+from .Exceptions.errors import (
+    CHECKPOINT_FINGERPRINT_ERROR,
+    CHECKPOINT_NOT_FOUND_ERROR,
+    CHECKPOINT_SEARCH_MISMATCH_ERROR,
+)
+
+# The CLI imports DEFAULT_CHECKPOINT_FILEPATH, so numpy is not imported here
+if TYPE_CHECKING:
+    from .ConfigurationResults import ConfigurationResults
+
+DEFAULT_CHECKPOINT_FILEPATH = "vst_checkpoint.json"
+
+
+def _write_json_atomically(filepath: str, contents: Dict):
+    """Write `contents` to `filepath`, such that the file is never partially written.
+
+    The contents are written to a temporary file in the same directory first, which
+    then replaces `filepath`.
+    """
+    directory = os.path.dirname(os.path.abspath(filepath))
+    file_descriptor, temporary_filepath = tempfile.mkstemp(
+        dir=directory, prefix=".vst_checkpoint_", suffix=".tmp"
+    )
+
+    try:
+        with os.fdopen(file_descriptor, "w") as f:
+            json.dump(contents, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary_filepath, filepath)
+    except BaseException:
+        os.remove(temporary_filepath)
+        raise
+
+
+class CheckpointManager:
+    """This class periodically stores the state of a search, so it can be resumed.
+
+    A checkpoint contains
+        - the index of the next configuration to evaluate
+        - the best `top_x` results so far, plus the result of the default configuration
+        - a fingerprint of the model graph, to make sure a search is only resumed on
+          the same DAG
+    """
+
+    def __init__(self, filepath: str, interval: float, top_x: int):
+        """Initialize CheckpointManager class.
+
+        A checkpoint is written at most once every `interval` seconds.
+        """
+        self.filepath = filepath
+        self.interval = interval
+        self.top_x = top_x
+        self.last_save = time.monotonic()
+
+    def _get_best_results(self, results: "ConfigurationResults") -> List[Dict]:
+        """Return the default result and the best `top_x` other results."""
+        rows = results.get_default_and_best_rows(self.top_x)
+        return [
+            {
+                "config": list(config) if (config := results.get_config(row)) else None,
+                "total_config_cost": float(row["total_cost"]),
+                "storage_cost": float(row["storage_cost"]),
+            }
+            for row in rows
+        ]
+
+    def save(
+        self,
+        fingerprint: str,
+        search_range: Tuple[int, int],
+        position: int,
+        n_evaluated: int,
+        results: "ConfigurationResults",
+    ):
+        """Write a checkpoint of a search over the configuration indices in `search_range`."""
+        _write_json_atomically(
+            self.filepath,
+            {
+                "fingerprint": fingerprint,
+                "start": search_range[0],
+                "stop": search_range[1],
+                "position": position,
+                "n_evaluated": n_evaluated,
+                "results": self._get_best_results(results),
+            },
+        )
+        self.last_save = time.monotonic()
+
+    def save_if_due(self, *args, **kwargs):
+        """Write a checkpoint if `interval` seconds have passed since the last one."""
+        if time.monotonic() - self.last_save >= self.interval:
+            self.save(*args, **kwargs)
+
+    def load(
+        self,
+        fingerprint: str,
+        search_range: Tuple[int, int],
+        results: "ConfigurationResults",
+    ) -> Tuple[int, int]:
+        """Load the last checkpoint of the search over the indices in `search_range`.
+
+        The results stored in the checkpoint are added to `results`. Raises a
+        RuntimeError if there is no checkpoint, or if it belongs to a different model
+        graph or search.
+
+        Returns:
+            Tuple[int, int]: The index of the next configuration to evaluate and the
+            number of configurations evaluated so far.
+        """
+        if not os.path.exists(self.filepath):
+            raise RuntimeError(CHECKPOINT_NOT_FOUND_ERROR.format(filepath=self.filepath))
+
+        with open(self.filepath, "r") as f:
+            checkpoint = json.load(f)
+
+        if checkpoint["fingerprint"] != fingerprint:
+            raise RuntimeError(
+                CHECKPOINT_FINGERPRINT_ERROR.format(filepath=self.filepath)
+            )
+
+        if (checkpoint["start"], checkpoint["stop"]) != tuple(search_range):
+            raise RuntimeError(
+                CHECKPOINT_SEARCH_MISMATCH_ERROR.format(filepath=self.filepath)
+            )
+
+        for result in checkpoint["results"]:
+            results.append_named(
+                result["config"], result["total_config_cost"], result["storage_cost"]
+            )
+
+        return checkpoint["position"], checkpoint["n_evaluated"]
@@ -1,63 +1,74 @@
 """ConfigCostEstimator class."""
 
-from typing import Dict, List, Tuple
+from typing import List, Tuple
 
 from .FudgeFactorCalculator import FudgeFactorCalculator
+from .ModelGraph import ModelGraph
 
 
 class ConfigCostEstimator:
     """This class is responsible for estimating the cost of a given configuration.
 
     This is done by summing the cost = storage_cost = (creation_cost * fudge_factor)
-    for each model to be materialized.
+    for each model to be materialized. If the costs of `model_graph` were calibrated
+    to seconds, the fixed cost of a model takes the place of its storage cost, see
+    RuntimeCalibration.
 
     A single instance of this class can estimate the cost of
         - multiple different materialization configurations (specified by `config` in
           estimate_cost_of_configuration())
-        - from a single DAG (specified by models_info_dict` and `destination_nodes` in
-          __init__())
+        - from a single DAG (specified by `model_graph` in __init__())
+
+    Models are identified by their index in `model_graph`.
     """
 
-    def __init__(self, models_info_dict: Dict[str, Dict], destination_nodes: List[str]):
+    def __init__(self, model_graph: ModelGraph):
         """Initialize ConfigCostEstimator class."""
-        self.models_info_dict = models_info_dict
-        self.destination_nodes = destination_nodes
+        self.model_graph = model_graph
+        self.destination_nodes = model_graph.destination_indices.tolist()
+        self.storage_costs = model_graph.storage_costs.tolist()
+        self.creation_costs = model_graph.creation_costs.tolist()
+        self.fixed_costs = model_graph.fixed_costs.tolist()
         self.current_config_fudge_factors = None
 
     def _get_fudge_factors_current_config(
-        self, config: None | Tuple[str]
-    ) -> Dict[str, int]:
-        """Return a dict with key `model_id` and value `fudge_factor`."""
+        self, config: None | Tuple[int]
+    ) -> List[float]:
+        """Return a list with the fudge factor of each model."""
         fudge_calculator = FudgeFactorCalculator(
-            config=config, models_info_dict=self.models_info_dict
+            config=config, model_graph=self.model_graph
         )
         return fudge_calculator.get_fudge_factors()
 
-    def _get_storage_cost(self, model: str) -> float:
+    def _get_storage_cost(self, model: int) -> float:
         """Return the storage cost of `model`."""
-        return self.models_info_dict[model]["storage_cost"]
+        return self.storage_costs[model]
+
+    def _get_fixed_cost(self, model: int) -> float:
+        """Return the fixed cost of `model`, see ModelGraph."""
+        return self.fixed_costs[model]
 
-    def _get_creation_cost(self, model: str) -> float:
+    def _get_creation_cost(self, model: int) -> float:
         """Return the creation cost of `model`."""
-        return self.models_info_dict[model]["creation_cost"]
+        return self.creation_costs[model]
 
-    def _get_fudge_factor(self, model: str) -> float:
+    def _get_fudge_factor(self, model: int) -> float:
         """Return the fudge factor of a given model under the current configuration."""
         return self.current_config_fudge_factors[model]
 
-    def _calc_execution_cost(self, model: str) -> float:
+    def _calc_execution_cost(self, model: int) -> float:
         """Return the execution cost of a node.
 
         The execution cost is calculated using the formula:
-            execution_cost =  storage_cost + (creation_cost * fudge_factor)
+            execution_cost =  fixed_cost + (creation_cost * fudge_factor)
         """
-        storage_cost = self._get_storage_cost(model)
+        fixed_cost = self._get_fixed_cost(model)
         creation_cost = self._get_creation_cost(model)
         fudge_factor = self._get_fudge_factor(model)
-        return storage_cost + (creation_cost * fudge_factor)
+        return fixed_cost + (creation_cost * fudge_factor)
 
 
-    def _calc_total_cost(self, model: str) -> float:
+    def _calc_total_cost(self, model: int) -> float:
         """Return the total cost of a node.
 
         The total cost is calculated using the formula:
@@ -66,14 +77,14 @@ class ConfigCostEstimator:
         execution_cost = self._calc_execution_cost(model)
         return execution_cost
 
-    def _get_costs_single_node(self, model: str) -> Tuple[float, float]:
+    def _get_costs_single_node(self, model: int) -> Tuple[float, float]:
         """Return the total cost and storage cost of a single node."""
         total_cost = self._calc_total_cost(model)
         storage_cost = self._get_storage_cost(model)
         return total_cost, storage_cost
 
     def _calc_cost_model_set(
-        self, model_set: Tuple[str] | List[str]
+        self, model_set: Tuple[int] | List[int]
     ) -> Tuple[float, float]:
         """Calculate the creation- and storage cots of all models in a set of models.
 
@@ -89,7 +100,7 @@ class ConfigCostEstimator:
 
         return total_cost, storage_cost
 
-    def _calc_cost_intermediate_models(self, config: Tuple[str]) -> Tuple[float, float]:
+    def _calc_cost_intermediate_models(self, config: Tuple[int]) -> Tuple[float, float]:
         """Return the total costs of all the intermediate models."""
         return self._calc_cost_model_set(model_set=config)
 
@@ -98,9 +109,9 @@ class ConfigCostEstimator:
         return self._calc_cost_model_set(model_set=self.destination_nodes)
 
     def estimate_cost_of_configuration(
-        self, config: None | Tuple[str]
+        self, config: None | Tuple[int]
     ) -> Tuple[float, float]:
-        """Estimate the total costs of the given configuration."""
+        """Estimate the total costs of the given configuration of model indices."""
         # Set fudge factors for current configuration
         self.current_config_fudge_factors = self._get_fudge_factors_current_config(
             config=config
@@ -0,0 +1,193 @@
+"""ConfigRefiner class."""
+
+import time
+from typing import Dict, FrozenSet, List, Tuple
+
+from .ConfigurationResults import ConfigurationResults
+from .CostEstimatorSinglePlan import CostEstimatorSinglePlan
+from .DbBackend import DbBackend
+from .RunStats import RunStats
+from .RuntimeCalibration import RuntimeCalibration
+
+
+def _get_root_rows(query_plan: List[Dict]) -> float:
+    """Return the expected number of rows of the root of a query plan."""
+    return query_plan[0]["Plan"]["Plan Rows"]
+
+
+class ConfigRefiner:
+    """This class re-estimates the cost of configurations using real query plans.
+
+    Where ConfigCostEstimator approximates the effect of materializing a model using
+    fudge factors, this class runs EXPLAIN for every materialized model, with the
+    materialized models upstream of it replaced by stub relations. All stubs live in
+    a single transaction that is rolled back afterwards, so the DB is left untouched.
+
+    The creation cost of a model only depends on which of its ancestors are
+    materialized, so query plans are cached on (model, materialized ancestors) and
+    shared between configurations.
+    """
+
+    def __init__(
+        self,
+        models_info_dict: Dict[str, Dict],
+        destination_nodes: List[str],
+        postgres_handler: DbBackend,
+        run_stats: RunStats | None = None,
+        runtime_calibration: RuntimeCalibration | None = None,
+    ):
+        """Initialize ConfigRefiner class, the EXPLAINs are added to `run_stats` if given.
+
+        With a `runtime_calibration`, the total cost is the predicted build time in
+        seconds, like that of the calibrated model graph.
+        """
+        self.models_info_dict = models_info_dict
+        self.destination_nodes = destination_nodes
+        self.postgres_handler = postgres_handler
+        self.run_stats = run_stats or RunStats()
+        self.runtime_calibration = runtime_calibration
+        self.upstream_models = self._get_upstream_models()
+        self.ancestors = {}
+        self.stub_names = {}
+        self.creation_cost_cache = {}
+        self.alias_counter = 0
+
+    def _get_upstream_models(self) -> Dict[str, List[str]]:
+        """Return a dict with the models directly upstream of each model.
+
+        This is derived from `referenced_by`, as SQLRewriter empties `depends_on`.
+        """
+        upstream_models = {model: [] for model in self.models_info_dict}
+        for model, info in self.models_info_dict.items():
+            for downstream_model in info["referenced_by"]:
+                upstream_models[downstream_model].append(model)
+        return upstream_models
+
+    def _get_ancestors(self, model: str) -> FrozenSet[str]:
+        """Return all models upstream of `model`."""
+        if model not in self.ancestors:
+            ancestors = set()
+            for upstream_model in self.upstream_models[model]:
+                ancestors.add(upstream_model)
+                ancestors.update(self._get_ancestors(upstream_model))
+            self.ancestors[model] = frozenset(ancestors)
+        return self.ancestors[model]
+
+    def _get_planning_profile(self, model: str) -> str:
+        """Return the planning profile that was needed to EXPLAIN `model` before."""
+        return self.postgres_handler.get_planning_profiles_used().get(model, "default")
+
+    def _explain(self, query: str, model: str) -> List[Dict]:
+        """Return the query plan of `query`, using the planning profile of `model`."""
+        start = time.perf_counter()
+        query_plan = self.postgres_handler.get_output_explain_in_transaction(
+            query, profile_name=self._get_planning_profile(model)
+        )
+        self.run_stats.add_explain(query, query_plan, time.perf_counter() - start)
+        return query_plan
+
+    def _get_stub_reference(self, model: str) -> str:
+        """Return the reference to the stub relation of `model`, create it if needed.
+
+        The stub has the columns of the model, and the number of rows the planner
+        expects the model to return.
+        """
+        if model not in self.stub_names:
+            stub_name = f"vst_stub_{len(self.stub_names)}"
+            default_code = self.models_info_dict[model]["code"]
+            query_plan = self._explain(default_code, model)
+            self.postgres_handler.create_stub_relation(
+                stub_name=stub_name,
+                query=default_code,
+                n_rows=_get_root_rows(query_plan),
+            )
+            self.stub_names[model] = stub_name
+
+        return f"pg_temp.{self.stub_names[model]}()"
+
+    def _get_code_with_stubs(self, model: str, materialized: FrozenSet[str]) -> str:
+        """Return the code of `model` with all upstream models inlined.
+
+        Like SQLRewriter does, references to upstream models are replaced by their
+        code. However, references to models in `materialized` are replaced by their
+        stub relation instead.
+        """
+        code = self.models_info_dict[model]["compiled_code"]
+
+        for upstream_model in self.upstream_models[model]:
+            if upstream_model in materialized:
+                replacement = self._get_stub_reference(upstream_model)
+            else:
+                upstream_code = self._get_code_with_stubs(upstream_model, materialized)
+                replacement = f"( {upstream_code} )"
+
+            code = code.replace(
+                self.models_info_dict[upstream_model]["compiled_code_reference"],
+                f"{replacement} AS refined_alias{self.alias_counter} ",
+            )
+            self.alias_counter += 1
+
+        return code
+
+    def _get_creation_cost(self, model: str, materialized: FrozenSet[str]) -> float:
+        """Return the creation cost of `model` given the set of materialized models."""
+        materialized_ancestors = materialized & self._get_ancestors(model)
+        cache_key = (model, materialized_ancestors)
+
+        if cache_key not in self.creation_cost_cache:
+            code = self._get_code_with_stubs(model, materialized_ancestors)
+            query_plan = self._explain(code, model)
+            _, creation_cost = CostEstimatorSinglePlan().estimate_costs(query_plan)
+            self.creation_cost_cache[cache_key] = creation_cost
+
+        return self.creation_cost_cache[cache_key]
+
+    def _estimate_cost_of_configuration(
+        self, config: None | Tuple[str]
+    ) -> Tuple[float, float]:
+        """Return the total cost and storage cost of a configuration based on real query plans.
+
+        The total cost sums storage_cost + creation_cost over all materialized models,
+        or their predicted build times if the costs are calibrated.
+        """
+        materialized = frozenset(config or ()) | frozenset(self.destination_nodes)
+
+        total_cost = 0
+        storage_cost = 0
+        # Sorted, so the stubs (and the queries explained) are the same in every run
+        for model in sorted(materialized):
+            model_storage_cost = self.models_info_dict[model]["storage_cost"]
+            creation_cost = self._get_creation_cost(model, materialized)
+
+            storage_cost += model_storage_cost
+            if self.runtime_calibration is not None:
+                total_cost += self.runtime_calibration.get_seconds(
+                    model_storage_cost, creation_cost
+                )
+            else:
+                total_cost += model_storage_cost + creation_cost
+
+        return total_cost, storage_cost
+
+    def refine(self, configs: List[None | Tuple[str]]) -> ConfigurationResults:
+        """Re-estimate the total cost of each configuration in `configs`.
+
+        Returns:
+            ConfigurationResults: The configurations and their refined total
+            configuration cost and storage cost.
+        """
+        results = ConfigurationResults(
+            model_ids=list(self.models_info_dict),
+            max_materializations=max((len(config or ()) for config in configs), default=1),
+        )
+
+        # Stubs are discarded together with the transaction, so create them anew
+        self.stub_names = {}
+
+        with self.postgres_handler.rolled_back_transaction():
+            for config in configs:
+                results.append_named(
+                    config, *self._estimate_cost_of_configuration(config)
+                )
+
+        return results
@@ -1,24 +1,224 @@
 """MaterializationConfigurationGenerator class."""
 
+import heapq
 import itertools
 from collections import deque
-from typing import Deque, List, Tuple
+from math import comb
+from typing import Deque, Dict, Iterator, List, Tuple
+
+
+def _get_combinations_by_score(
+    scores: List[float], size: int
+) -> Iterator[Tuple[float, Tuple[int, ...]]]:
+    """Yield all combinations of `size` indices of `scores` by increasing total score.
+
+    `scores` should be sorted in ascending order. Every combination is reached from
+    the combination (0, 1, ..., size - 1) by moving its indices one step to the right
+    at a time, starting with the last index. A combination in the heap remembers which
+    index it is currently moving, so every combination has exactly one predecessor,
+    which never has a higher total score.
+    """
+    if size > len(scores):
+        return
+
+    first_combination = tuple(range(size))
+    heap = [(sum(scores[:size]), first_combination, size - 1)]
+
+    while heap:
+        score, combination, moving_index = heapq.heappop(heap)
+        yield score, combination
+
+        # Move the current index one step further
+        upper_limit = (
+            combination[moving_index + 1]
+            if moving_index + 1 < size
+            else len(scores)
+        )
+        if combination[moving_index] + 1 < upper_limit:
+            _push_moved_combination(heap, scores, score, combination, moving_index)
+
+        # Start moving the index before the current one
+        if (
+            moving_index > 0
+            and combination[moving_index - 1] + 1 < combination[moving_index]
+        ):
+            _push_moved_combination(heap, scores, score, combination, moving_index - 1)
+
+
+def _push_moved_combination(
+    heap: List,
+    scores: List[float],
+    score: float,
+    combination: Tuple[int, ...],
+    index: int,
+):
+    """Push `combination` with index `index` moved one step to the right on the heap."""
+    old_value = combination[index]
+    new_combination = combination[:index] + (old_value + 1,) + combination[index + 1:]
+    new_score = score - scores[old_value] + scores[old_value + 1]
+    heapq.heappush(heap, (new_score, new_combination, index))
+
+
+def _unrank_combination(n_items: int, size: int, rank: int) -> Tuple[int, ...]:
+    """Return the combination of `size` indices out of `n_items` at position `rank`.
+
+    The position is the one in the lexicographic order of itertools.combinations().
+    """
+    combination = []
+    candidate = 0
+
+    for position in range(size):
+        while True:
+            # Number of combinations that have `candidate` at this position
+            n_with_candidate = comb(n_items - candidate - 1, size - position - 1)
+            if rank < n_with_candidate:
+                break
+            rank -= n_with_candidate
+            candidate += 1
+
+        combination.append(candidate)
+        candidate += 1
+
+    return tuple(combination)
+
+
+def _rank_combination(n_items: int, combination: Tuple[int, ...]) -> int:
+    """Return the position of `combination` in the lexicographic order of combinations.
+
+    This is the inverse of _unrank_combination().
+    """
+    size = len(combination)
+    rank = 0
+    previous = -1
+
+    for position, index in enumerate(combination):
+        for skipped in range(previous + 1, index):
+            rank += comb(n_items - skipped - 1, size - position - 1)
+        previous = index
+
+    return rank
+
+
+def _get_next_combination(n_items: int, combination: List[int]) -> bool:
+    """Update `combination` in place to the next one in lexicographic order.
+
+    Returns:
+        bool: False if `combination` was the last combination, True otherwise.
+    """
+    size = len(combination)
+
+    for position in range(size - 1, -1, -1):
+        if combination[position] < n_items - size + position:
+            combination[position] += 1
+            for next_position in range(position + 1, size):
+                combination[next_position] = combination[next_position - 1] + 1
+            return True
+
+    return False
 
 
 class MaterializationConfigurationGenerator:
     """MaterializationConfigurationGenerator class.
 
     This class creates a deque of all possible materialization configurations
+
+    The configurations have a fixed order, which is the order of the deque from
+    get_all_possible_configurations(): first the default configuration (None),
+    then all configurations of `max_materializations` models, then those of one model
+    less, and so on. Within a number of models, the order is that of
+    itertools.combinations(). Using this order, each configuration has an index, and
+    the configurations in a range of indices can be obtained without enumerating the
+    configurations before it.
     """
 
     def __init__(
-        self, all_intermediate_models: List[str], max_materializations: int
+        self, all_intermediate_models: List[int], max_materializations: int
     ):
         """Initialize the class."""
         self.all_intermediate_models = all_intermediate_models
         self.max_materializations = max_materializations
 
-    def get_all_possible_configurations(self) -> Deque[None | Tuple[str]]:
+    def get_number_of_configurations(self) -> int:
+        """Return the number of possible configurations, including the default one."""
+        n_models = len(self.all_intermediate_models)
+        return 1 + sum(
+            comb(n_models, num_materializations)
+            for num_materializations in range(1, self.max_materializations + 1)
+        )
+
+    def _get_block_sizes(self) -> List[Tuple[int, int]]:
+        """Return (number of models, number of configurations) of each block of configurations."""
+        n_models = len(self.all_intermediate_models)
+        return [
+            (num_materializations, comb(n_models, num_materializations))
+            for num_materializations in range(self.max_materializations, 0, -1)
+        ]
+
+    def get_configuration_at_index(self, index: int) -> None | Tuple[int, ...]:
+        """Return the configuration at position `index` (unranking)."""
+        if index == 0:
+            return None
+
+        index -= 1
+        for num_materializations, block_size in self._get_block_sizes():
+            if index < block_size:
+                combination = _unrank_combination(
+                    len(self.all_intermediate_models), num_materializations, index
+                )
+                return tuple(self.all_intermediate_models[i] for i in combination)
+            index -= block_size
+
+        raise IndexError("Configuration index out of range")
+
+    def get_index_of_configuration(self, config: None | Tuple[int, ...]) -> int:
+        """Return the position of `config` (ranking)."""
+        if config is None:
+            return 0
+
+        model_positions = {
+            model: position
+            for position, model in enumerate(self.all_intermediate_models)
+        }
+        combination = tuple(model_positions[model] for model in config)
+
+        index = 1
+        for num_materializations, block_size in self._get_block_sizes():
+            if num_materializations == len(config):
+                return index + _rank_combination(
+                    len(self.all_intermediate_models), combination
+                )
+            index += block_size
+
+        raise IndexError("Configuration has too many models")
+
+    def get_configurations_in_range(
+        self, start: int, stop: int
+    ) -> Iterator[None | Tuple[int, ...]]:
+        """Yield the configurations with index `start` up to (excluding) `stop`."""
+        n_models = len(self.all_intermediate_models)
+        index = start
+
+        if index == 0 and index < stop:
+            yield None
+            index += 1
+
+        if index >= stop:
+            return
+
+        first_config = self.get_configuration_at_index(index)
+        combination = [
+            self.all_intermediate_models.index(model) for model in first_config
+        ]
+
+        while index < stop:
+            yield tuple(self.all_intermediate_models[i] for i in combination)
+            index += 1
+
+            # At the end of a block, continue with configurations of one model less
+            if not _get_next_combination(n_models, combination):
+                combination = list(range(len(combination) - 1))
+
+    def get_all_possible_configurations(self) -> Deque[None | Tuple[int, ...]]:
         """Return a deque of all possible materialization configurations."""
         materialization_configs = deque([None])
 
@@ -31,3 +231,37 @@ class MaterializationConfigurationGenerator:
             )
 
         return materialization_configs
+
+    def get_configurations_best_first(
+        self, model_scores: Dict[int, float]
+    ) -> Iterator[Tuple[int, ...]]:
+        """Yield all non-default configurations in order of estimated promise.
+
+        The estimated promise of a configuration is the sum of the scores of its
+        models, where a lower score is more promising. The models within a yielded
+        configuration keep the order of `all_intermediate_models`.
+        """
+        models_by_score = sorted(
+            self.all_intermediate_models, key=lambda model: model_scores[model]
+        )
+        sorted_scores = [model_scores[model] for model in models_by_score]
+        original_position = {
+            model: position
+            for position, model in enumerate(self.all_intermediate_models)
+        }
+
+        combinations_by_score = heapq.merge(
+            *(
+                _get_combinations_by_score(sorted_scores, num_materializations)
+                for num_materializations in range(1, self.max_materializations + 1)
+            ),
+            key=lambda scored_combination: scored_combination[0],
+        )
+
+        for _, combination in combinations_by_score:
+            yield tuple(
+                sorted(
+                    (models_by_score[index] for index in combination),
+                    key=original_position.get,
+                )
+            )
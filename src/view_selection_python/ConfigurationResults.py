@@ -0,0 +1,166 @@
+"""ConfigurationResults class."""
+
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+# Number of results per preallocated block of the results array
+CHUNK_SIZE = 65536
+
+# Model index used to pad configurations with less than `max_materializations` models
+NO_MODEL = -1
+
+
+class ConfigurationResults:
+    """This class stores the estimated costs of evaluated configurations compactly.
+
+    A configuration is stored as a fixed-width array of model indices (padded with
+    NO_MODEL), together with its total cost and storage cost, in a NumPy structured
+    array. The default configuration has no models at all. Model indices are only
+    resolved to model ids for the results that are actually needed, using `model_ids`.
+
+    If `max_best_results` is given, only the default result and the `max_best_results`
+    best other results are guaranteed to be kept: whenever a block of results is full,
+    all others are dropped. This bounds the memory used by a long search.
+    """
+
+    def __init__(
+        self,
+        model_ids: List[str],
+        max_materializations: int,
+        max_best_results: int | None = None,
+    ):
+        """Initialize ConfigurationResults class.
+
+        `model_ids` maps a model index to its model id.
+        """
+        self.model_ids = model_ids
+        self.max_best_results = max_best_results
+        self.model_indices = None
+        self.width = max(max_materializations, 1)
+        self.dtype = np.dtype([
+            ("models", np.int32, (self.width,)),
+            ("total_cost", np.float64),
+            ("storage_cost", np.float64),
+        ])
+        self.full_chunks = []
+        self.current_chunk = np.empty(CHUNK_SIZE, dtype=self.dtype)
+        self.n_in_current_chunk = 0
+
+    def __len__(self) -> int:
+        """Return the number of stored results."""
+        return len(self.full_chunks) * CHUNK_SIZE + self.n_in_current_chunk
+
+    def append(
+        self, config: None | Tuple[int], total_cost: float, storage_cost: float
+    ):
+        """Store the costs of a configuration, given as a tuple of model indices."""
+        if self.n_in_current_chunk == CHUNK_SIZE:
+            self._start_new_chunk()
+
+        models = tuple(config or ())
+        self.current_chunk[self.n_in_current_chunk] = (
+            models + (NO_MODEL,) * (self.width - len(models)),
+            total_cost,
+            storage_cost,
+        )
+        self.n_in_current_chunk += 1
+
+    def drop_results_not_needed(self):
+        """Drop all results but the default one and the `max_best_results` best others.
+
+        Nothing is dropped if `max_best_results` was not given, or if the results that
+        are kept would not fit in a single block.
+        """
+        if self.max_best_results is None or self.max_best_results >= CHUNK_SIZE:
+            return
+
+        kept_results = self.get_default_and_best_rows(self.max_best_results)
+        self.full_chunks = []
+        self.current_chunk = np.empty(CHUNK_SIZE, dtype=self.dtype)
+        self.current_chunk[:len(kept_results)] = kept_results
+        self.n_in_current_chunk = len(kept_results)
+
+    def _start_new_chunk(self):
+        """Make room for more results, dropping the ones that are not needed if possible."""
+        if (
+            self.max_best_results is not None
+            and self.max_best_results < CHUNK_SIZE // 2
+        ):
+            self.drop_results_not_needed()
+        else:
+            self.full_chunks.append(self.current_chunk)
+            self.current_chunk = np.empty(CHUNK_SIZE, dtype=self.dtype)
+            self.n_in_current_chunk = 0
+
+    def _get_model_indices(self) -> Dict[str, int]:
+        """Return a dict that maps a model id to its model index."""
+        if self.model_indices is None:
+            self.model_indices = {
+                model: index for index, model in enumerate(self.model_ids)
+            }
+        return self.model_indices
+
+    def append_named(
+        self, config: None | Iterable[str], total_cost: float, storage_cost: float
+    ):
+        """Store the costs of a configuration, given by its model ids."""
+        model_indices = self._get_model_indices()
+        self.append(
+            tuple(model_indices[model] for model in config) if config else None,
+            total_cost,
+            storage_cost,
+        )
+
+    def get_array(self) -> np.ndarray:
+        """Return all stored results as one structured array."""
+        return np.concatenate(
+            self.full_chunks + [self.current_chunk[:self.n_in_current_chunk]]
+        )
+
+    def get_config_indices(self, row: np.void) -> None | Tuple[int]:
+        """Return the model indices of the configuration in a result row."""
+        models = tuple(int(index) for index in row["models"] if index != NO_MODEL)
+        return models if models else None
+
+    def get_config(self, row: np.void) -> None | Tuple[str]:
+        """Return the model ids of the configuration in a result row."""
+        config_indices = self.get_config_indices(row)
+        if config_indices is None:
+            return None
+        return tuple(self.model_ids[index] for index in config_indices)
+
+    def get_default_rows(self) -> np.ndarray:
+        """Return the rows of the default configuration."""
+        results = self.get_array()
+        return results[results["models"][:, 0] == NO_MODEL]
+
+    def get_default_cost(self) -> float:
+        """Return the total cost of the default configuration."""
+        return float(self.get_default_rows()["total_cost"][0])
+
+    def get_best_rows(self, n_rows: int | None = None) -> np.ndarray:
+        """Return the `n_rows` non-default results with the lowest total cost, sorted.
+
+        By default, all non-default results are returned.
+        """
+        results = self.get_array()
+        results = results[results["models"][:, 0] != NO_MODEL]
+
+        if n_rows == 0:
+            return results[:0]
+
+        if n_rows is not None and n_rows < len(results):
+            best = np.argpartition(results["total_cost"], n_rows - 1)[:n_rows]
+            results = results[best]
+
+        return results[np.argsort(results["total_cost"], kind="stable")]
+
+    def get_default_and_best_rows(self, n_rows: int) -> np.ndarray:
+        """Return a default result, followed by the `n_rows` non-default results with the lowest total cost."""
+        return np.concatenate([self.get_default_rows()[:1], self.get_best_rows(n_rows)])
+
+    def get_top_rows(self, n_rows: int) -> np.ndarray:
+        """Return the `n_rows` results with the lowest total cost, including the default one."""
+        results = self.get_default_and_best_rows(n_rows)
+        return results[np.argsort(results["total_cost"], kind="stable")][:n_rows]
@@ -1,7 +1,15 @@
 """CostEstimatorSinglePlan class."""
 
+import re
 from typing import Dict, List, Tuple
 
+# Matches the expected rows and width of a node in the JSON text of a query plan.
+# Postgres writes them consecutively for every node, and the properties of a node
+# before its subplans, so the first match is the root of the plan.
+PLAN_ROWS_AND_WIDTH_PATTERN = re.compile(
+    r'"Plan Rows": ([0-9.eE+-]+),\s*"Plan Width": ([0-9.eE+-]+)'
+)
+
 
 def _check_for_subplans(plan: Dict) -> bool:
     """Check if the plan contains subplans."""
@@ -28,6 +36,25 @@ def _extract_plan_from_list(list_with_plan: List[Dict]) -> Dict:
     return list_with_plan[0]["Plan"]
 
 
+def estimate_costs_from_plan_text(query_plan_text: str) -> Tuple[float, float]:
+    """Return the storage and creation cost of a query plan in (unparsed) JSON format.
+
+    The same as CostEstimatorSinglePlan.estimate_costs(), but the expected rows and
+    width of the nodes are scanned from the text, instead of decoding the whole plan
+    into dicts first.
+    """
+    storage_cost = None
+    creation_cost = 0
+    for expected_rows, expected_width in PLAN_ROWS_AND_WIDTH_PATTERN.findall(
+        query_plan_text
+    ):
+        cost = _calculate_cost(float(expected_rows), float(expected_width))
+        if storage_cost is None:
+            storage_cost = cost
+        creation_cost += cost
+    return storage_cost, creation_cost
+
+
 class CostEstimatorSinglePlan:
     """This class estimates the cost of a single model.
 
@@ -3,7 +3,6 @@
 import os
 from typing import List
 
-from .CLI import CLI
 from .Exceptions.errors import (
     ERROR_DBT_PROJECT_NOT_FOUND,
     ERROR_PROFILES_NOT_FOUND,
@@ -18,13 +17,13 @@ class CwdChecker:
     These checks are necessary to ensure that the rest of the tool functions properly.
     """
 
-    def __init__(self):
+    def __init__(self, cwd: str | None = None):
         """Initialize class.
 
-        If we're done with developing and ready to deploy as PyPi package,
-        the working dir can probably be obtained using os.getcwd()
+        `cwd` is the directory of the dbt project, which defaults to the current
+        working directory.
         """
-        self.cwd = os.getcwd()
+        self.cwd = cwd if cwd is not None else os.getcwd()
         self.profile_path = None
         self.dbt_project_path = None
         self._do_all_checks()
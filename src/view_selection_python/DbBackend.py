@@ -0,0 +1,114 @@
+"""DbBackend class."""
+
+import json
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Tuple
+
+from .CostEstimatorSinglePlan import CostEstimatorSinglePlan
+
+
+class DbBackend:
+    """The queries the tool runs against the DB, which every backend implements.
+
+    These are the contents of the tables written by the dbt part of the view
+    selection tool, EXPLAIN of (rewritten) model code, the storage bound, and the
+    run history Elementary records.
+    ConfigRefiner additionally creates stub relations inside a single transaction
+    that is rolled back. PostgresHandler runs them against a Postgres DB, and
+    ReplayBackend answers them from a file written by RecordingBackend.
+    """
+
+    def get_all_models_and_code(self) -> List[Tuple[str]]:
+        """Return all models in the DAG, together with their code."""
+        raise NotImplementedError
+
+    def get_destination_nodes(self) -> List[Tuple[str]]:
+        """Return the destination nodes of the DAG."""
+        raise NotImplementedError
+
+    def get_model_dependencies(self) -> List[Tuple[str]]:
+        """Return the dependencies in the DAG."""
+        raise NotImplementedError
+
+    def get_maintenance_fractions(self) -> List[Tuple[str]]:
+        """Return maintenance fraction for each model."""
+        raise NotImplementedError
+
+    def get_storage_space_left(self) -> int:
+        """Return the #bytes left in the DB at this moment in time."""
+        raise NotImplementedError
+
+    def get_model_execution_times(self) -> List[Tuple[str, str, float, int]]:
+        """Return (model id, materialization, median seconds, number of runs) of every model in Elementary's run history.
+
+        Only successful runs with the materialization of the latest run of a model
+        count.
+        """
+        raise NotImplementedError
+
+    def get_output_explain(
+        self, query_to_explain: str, model_id: str | None = None
+    ) -> List[Dict]:
+        """Return the query plan of `query_to_explain` in JSON format.
+
+        The planning profile that was used is recorded for `model_id`.
+        """
+        raise NotImplementedError
+
+    def get_output_explains(
+        self, queries_to_explain: List[Tuple[str, str]]
+    ) -> Iterator[Tuple[str, List[Dict], float]]:
+        """Run EXPLAIN for every (model id, query), and yield (model id, query plan, seconds).
+
+        By default, the EXPLAINs run one by one, in order. PostgresHandler runs them
+        concurrently, as many as the load of the DB allows.
+        """
+        for model_id, query_to_explain in queries_to_explain:
+            start = time.perf_counter()
+            query_plan = self.get_output_explain(query_to_explain, model_id)
+            yield model_id, query_plan, time.perf_counter() - start
+
+    def get_plan_costs(
+        self, queries_to_explain: List[Tuple[str, str]]
+    ) -> Iterator[Tuple[str, Tuple[float, float], float, int]]:
+        """Run EXPLAIN for every (model id, query), and yield (model id, (storage cost, creation cost), seconds, bytes received).
+
+        By default, the whole query plans are received, see get_output_explains(), and
+        their costs are estimated by CostEstimatorSinglePlan. PostgresHandler reduces
+        the query plans to their costs in the DB, so only the costs are received.
+        """
+        for model_id, query_plan, seconds in self.get_output_explains(
+            queries_to_explain
+        ):
+            yield (
+                model_id,
+                CostEstimatorSinglePlan().estimate_costs(query_plan),
+                seconds,
+                len(json.dumps(query_plan)),
+            )
+
+    def get_planning_profiles_used(self) -> Dict[str, str]:
+        """Return the planning profile used for each explained model."""
+        return {}
+
+    @contextmanager
+    def rolled_back_transaction(self) -> Iterator[None]:
+        """Keep a single transaction open, which is rolled back afterwards."""
+        yield
+
+    def create_stub_relation(self, stub_name: str, query: str, n_rows: float):
+        """Create a stub relation that behaves like `query` materialized as a table.
+
+        Only use this inside rolled_back_transaction().
+        """
+        raise NotImplementedError
+
+    def get_output_explain_in_transaction(
+        self, query_to_explain: str, profile_name: str = "default"
+    ) -> List[Dict]:
+        """Return the query plan of `query_to_explain`, seeing the stub relations."""
+        raise NotImplementedError
+
+    def close(self):
+        """Release what the backend holds on to, e.g. connections or files."""
@@ -1,5 +1,5 @@
 from .YamlScraper import YamlScraper
-from .Exceptions.errors import NO_SCHEMA_ERROR
+from .Exceptions.errors import NO_ELEMENTARY_SCHEMA_ERROR, NO_SCHEMA_ERROR
 
 
 class DbtProjectScraper(YamlScraper):
@@ -26,7 +26,7 @@ class DbtProjectScraper(YamlScraper):
         Returns:
             str: The name of the dbt project.
         """
-        return self.contents['name']
+        return self._replace_env_vars(self.contents['name'])
 
     def get_schema_appendix(self, profile: str) -> str:
         """
@@ -42,12 +42,29 @@ class DbtProjectScraper(YamlScraper):
             ValueError: If the profile does not have an associated schema appendix in the YAML contents.
         """
         try:
-            return self.contents['models'][profile]['+schema']
+            return self._replace_env_vars(self.contents['models'][profile]['+schema'])
         except KeyError:
             raise ValueError(
                 NO_SCHEMA_ERROR.replace('REPLACE_WITH_PROFILE', profile)
             )
 
+    def get_elementary_schema(self) -> str:
+        """
+        Gets the schema of the Elementary tables, from the variables of the view_selection_tool package.
+
+        Returns:
+            str: The schema of the Elementary tables, e.g. `x_elementary`.
+
+        Raises:
+            ValueError: If the `src_schema` variable is not set in the YAML contents.
+        """
+        try:
+            return self._replace_env_vars(
+                self.contents['vars']['view_selection_tool']['src_schema']
+            )
+        except (KeyError, TypeError):
+            raise ValueError(NO_ELEMENTARY_SCHEMA_ERROR)
+
     def get_profile(self) -> str:
         """
         Gets the profile used in the dbt project from the YAML contents.
@@ -55,4 +72,4 @@ class DbtProjectScraper(YamlScraper):
         Returns:
             str: The profile used in the dbt project.
         """
-        return self.contents['profile']
+        return self._replace_env_vars(self.contents['profile'])
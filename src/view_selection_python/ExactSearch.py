@@ -0,0 +1,358 @@
+"""ExactSearch class."""
+
+import itertools
+from math import comb, inf
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from .ConfigCostEstimator import ConfigCostEstimator
+from .FudgeFactorCalculator import (
+    _get_fudge_list_index_to_use,
+    _get_next_fudge_factor,
+    fudge_factors_lists,
+)
+from .ModelGraph import ModelGraph
+
+# Number of fudge factors per list, beyond which the fudge factor is 1
+N_FUDGE_FACTORS = len(fudge_factors_lists[0])
+
+# The state of a model is the fudge list and distance of its nearest materialized
+# ancestor. State 0 means there is none (or it is too far away to matter).
+NO_ANCESTOR = 0
+N_STATES = 1 + len(fudge_factors_lists) * N_FUDGE_FACTORS
+
+
+def _get_state(fudge_list_index: int, fudge_factor_index: int) -> int:
+    """Return the state of a model `fudge_factor_index` nodes below a materialized model."""
+    if fudge_factor_index >= N_FUDGE_FACTORS:
+        return NO_ANCESTOR
+    return 1 + fudge_list_index * N_FUDGE_FACTORS + fudge_factor_index
+
+
+def _get_state_tables() -> Tuple[np.ndarray, np.ndarray]:
+    """Return the fudge factor of each state, and the state of a child in each state.
+
+    The child state is the one of a child of a model that is not materialized itself.
+    """
+    fudge_factors = np.ones(N_STATES)
+    child_states = np.zeros(N_STATES, dtype=np.int64)
+
+    for fudge_list_index in range(len(fudge_factors_lists)):
+        for fudge_factor_index in range(N_FUDGE_FACTORS):
+            state = _get_state(fudge_list_index, fudge_factor_index)
+            fudge_factors[state] = _get_next_fudge_factor(
+                fudge_list_index, fudge_factor_index
+            )
+            child_states[state] = _get_state(fudge_list_index, fudge_factor_index + 1)
+
+    return fudge_factors, child_states
+
+
+def _min_plus_convolve(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Return c with c[..., k] = min over j of a[..., k - j] + b[..., j].
+
+    `a` and `b` hold costs indexed by a number of materializations on their last axis.
+    """
+    result = np.full(np.broadcast_shapes(a.shape, b.shape), inf)
+    n = result.shape[-1]
+    for j in range(n):
+        np.minimum(
+            result[..., j:], a[..., :n - j] + b[..., j:j + 1], out=result[..., j:]
+        )
+    return result
+
+
+def _get_best_split(a: np.ndarray, b: np.ndarray, k: int) -> int:
+    """Return the j for which a[k - j] + b[j] is lowest."""
+    return int(np.argmin(a[k::-1] + b[:k + 1]))
+
+
+class ExactSearch:
+    """This class finds the optimal configuration of each size without enumerating them all.
+
+    The models are split into weakly connected components. Fudge factors never cross
+    components, so the cost of a configuration is the sum of the costs of its parts in
+    each component.
+
+    In a component that is a tree (every model depends on at most one other model),
+    the fudge factor of a model only depends on its nearest materialized ancestor. A
+    dynamic program over (model, materializations in its subtree, state) then finds
+    the cheapest configuration of the tree for every number of materializations, where
+    the state is the fudge list and distance of the nearest materialized ancestor.
+    Other components are enumerated. Finally, the components are combined by choosing
+    how many materializations each of them gets.
+
+    The storage space left is not taken into account.
+    """
+
+    def __init__(
+        self,
+        model_graph: ModelGraph,
+        config_cost_estimator: ConfigCostEstimator,
+        max_materializations: int,
+    ):
+        """Initialize ExactSearch class."""
+        self.model_graph = model_graph
+        self.config_cost_estimator = config_cost_estimator
+        self.max_materializations = max_materializations
+        self.state_fudge_factors, self.child_states = _get_state_tables()
+        self.components = None
+
+    def _get_neighbours(self, model: int) -> List[int]:
+        """Return the children and parents of a model."""
+        return list(self.model_graph.get_children(model)) + (
+            self.model_graph.get_parents(model).tolist()
+        )
+
+    def get_components(self) -> List[List[int]]:
+        """Return the weakly connected components of the model graph.
+
+        The models of a component are in breadth-first order from its first model.
+        """
+        if self.components is None:
+            self.components = []
+            visited = [False] * self.model_graph.n_models
+
+            for first_model in range(self.model_graph.n_models):
+                if visited[first_model]:
+                    continue
+
+                visited[first_model] = True
+                component = [first_model]
+                for model in component:
+                    for neighbour in self._get_neighbours(model):
+                        if not visited[neighbour]:
+                            visited[neighbour] = True
+                            component.append(neighbour)
+
+                self.components.append(component)
+
+        return self.components
+
+    def _is_tree(self, component: List[int]) -> bool:
+        """Return whether every model in `component` depends on at most one other model."""
+        return all(len(self.model_graph.get_parents(model)) <= 1 for model in component)
+
+    def _get_intermediate_models(self, component: List[int]) -> List[int]:
+        """Return the intermediate models of a component, in model index order."""
+        return sorted(
+            model for model in component if not self.model_graph.is_destination[model]
+        )
+
+    def _intermediate_models_exist(self, component: List[int]) -> bool:
+        """Return whether a component has models that can be materialized."""
+        return len(self._get_intermediate_models(component)) > 0
+
+    def get_number_of_enumerated_configurations(self) -> int:
+        """Return the number of configurations evaluated for components that are not trees."""
+        return sum(
+            comb(len(self._get_intermediate_models(component)), num_materializations)
+            for component in self.get_components()
+            if not self._is_tree(component)
+            for num_materializations in range(1, self.max_materializations + 1)
+        )
+
+    def _get_topological_order(self, component: List[int]) -> List[int]:
+        """Return the models of a tree component, parents before children."""
+        root = next(
+            model for model in component
+            if len(self.model_graph.get_parents(model)) == 0
+        )
+        order = [root]
+        for model in order:
+            order.extend(self.model_graph.get_children(model))
+        return order
+
+    def _get_child_state_of_materialized(self, model: int) -> int:
+        """Return the state of the children of `model` if it is materialized."""
+        return _get_state(
+            _get_fudge_list_index_to_use(self.model_graph.get_out_degree(model)), 0
+        )
+
+    def _combine_children(
+        self, costs: Dict[int, np.ndarray], model: int, state: int
+    ) -> np.ndarray:
+        """Return the lowest cost of the subtrees of the children of `model` per number of materializations.
+
+        All children are in `state`. The result is indexed by the number of
+        materializations in all subtrees together.
+        """
+        combined = np.full(self.max_materializations + 1, inf)
+        combined[0] = 0
+        for child in self.model_graph.get_children(model):
+            combined = _min_plus_convolve(combined, costs[child][state])
+        return combined
+
+    def _get_model_costs(
+        self, costs: Dict[int, np.ndarray], model: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the lowest cost of the subtree of `model` if it is not, and if it is materialized.
+
+        Both are indexed by (state of `model`, number of materializations in the
+        subtree).
+        """
+        fixed_cost = self.model_graph.fixed_costs[model]
+        own_costs = fixed_cost + (
+            self.model_graph.creation_costs[model] * self.state_fudge_factors
+        )
+
+        # Not materialized: the children are one step further from the ancestor
+        children_costs = np.full((N_STATES, self.max_materializations + 1), inf)
+        children_costs[:, 0] = 0
+        for child in self.model_graph.get_children(model):
+            children_costs = _min_plus_convolve(
+                children_costs, costs[child][self.child_states]
+            )
+        not_materialized = children_costs
+        if self.model_graph.is_destination[model]:
+            not_materialized = not_materialized + own_costs[:, None]
+
+        # Materialized: the children get the fudge factors of this model
+        materialized = np.full((N_STATES, self.max_materializations + 1), inf)
+        if not self.model_graph.is_destination[model]:
+            children_costs = self._combine_children(
+                costs, model, self._get_child_state_of_materialized(model)
+            )
+            materialized[:, 1:] = own_costs[:, None] + children_costs[None, :-1]
+
+        return not_materialized, materialized
+
+    def _get_materialized_models(
+        self,
+        costs: Dict[int, np.ndarray],
+        model_costs: Dict[int, Tuple[np.ndarray, np.ndarray]],
+        root: int,
+        n_materializations: int,
+    ) -> List[int]:
+        """Return the materialized models of the cheapest configuration of a tree.
+
+        The configuration has `n_materializations` models. It is reconstructed from
+        the root down, using the costs of the dynamic program.
+        """
+        materialized_models = []
+        to_visit = [(root, NO_ANCESTOR, n_materializations)]
+
+        while to_visit:
+            model, state, k = to_visit.pop()
+            if k == 0:
+                continue
+
+            not_materialized, materialized = model_costs[model]
+
+            if materialized[state, k] < not_materialized[state, k]:
+                materialized_models.append(model)
+                child_state = self._get_child_state_of_materialized(model)
+                k -= 1
+            else:
+                child_state = int(self.child_states[state])
+
+            # Divide the remaining materializations over the children, last one first
+            children = self.model_graph.get_children(model)
+            prefix_costs = [np.full(self.max_materializations + 1, inf)]
+            prefix_costs[0][0] = 0
+            for child in children:
+                prefix_costs.append(
+                    _min_plus_convolve(prefix_costs[-1], costs[child][child_state])
+                )
+
+            for position in range(len(children) - 1, -1, -1):
+                child = children[position]
+                k_child = _get_best_split(
+                    prefix_costs[position], costs[child][child_state], k
+                )
+                to_visit.append((child, child_state, k_child))
+                k -= k_child
+
+        return materialized_models
+
+    def _solve_tree(self, component: List[int]) -> Tuple[np.ndarray, List]:
+        """Return the lowest cost of a tree component per number of materializations.
+
+        Also returns, per number of materializations, the materialized models of the
+        configuration with that cost (or None if there is none).
+        """
+        costs = {}
+        model_costs = {}
+        order = self._get_topological_order(component)
+
+        for model in reversed(order):
+            model_costs[model] = self._get_model_costs(costs, model)
+            costs[model] = np.minimum(*model_costs[model])
+
+        root = order[0]
+        root_costs = costs[root][NO_ANCESTOR]
+        configs = [
+            self._get_materialized_models(costs, model_costs, root, k)
+            if root_costs[k] < inf
+            else None
+            for k in range(self.max_materializations + 1)
+        ]
+        return root_costs, configs
+
+    def _solve_by_enumeration(self, component: List[int]) -> Tuple[np.ndarray, List]:
+        """Return the lowest cost of a component per number of materializations, by enumeration.
+
+        The costs are relative to the default configuration. Also returns the
+        materialized models of the configuration with that cost (or None).
+        """
+        default_cost, _ = self.config_cost_estimator.estimate_cost_of_configuration(None)
+        intermediate_models = self._get_intermediate_models(component)
+
+        best_costs = np.full(self.max_materializations + 1, inf)
+        best_costs[0] = 0
+        configs = [[]] + [None] * self.max_materializations
+
+        for num_materializations in range(1, self.max_materializations + 1):
+            for config in itertools.combinations(
+                intermediate_models, num_materializations
+            ):
+                total_cost, _ = (
+                    self.config_cost_estimator.estimate_cost_of_configuration(config)
+                )
+                if total_cost - default_cost < best_costs[num_materializations]:
+                    best_costs[num_materializations] = total_cost - default_cost
+                    configs[num_materializations] = list(config)
+
+        return best_costs, configs
+
+    def get_best_configurations(self) -> List[Tuple[int]]:
+        """Return the cheapest configuration for each number of materializations.
+
+        Only sizes from 1 up to `max_materializations` for which a configuration exists
+        are included. The models in a configuration are sorted by model index.
+        """
+        # Lowest cost of all components so far, and the configurations per component
+        combined = np.full(self.max_materializations + 1, inf)
+        combined[0] = 0
+        steps = []
+
+        for component in self.get_components():
+            if not self._intermediate_models_exist(component):
+                continue
+
+            if self._is_tree(component):
+                costs, configs = self._solve_tree(component)
+                costs = costs - costs[0]
+            else:
+                costs, configs = self._solve_by_enumeration(component)
+
+            steps.append((combined, costs, configs))
+            combined = _min_plus_convolve(combined, costs)
+
+        best_configurations = []
+        for num_materializations in range(1, self.max_materializations + 1):
+            if combined[num_materializations] == inf:
+                continue
+
+            # Trace back how many materializations each component got
+            config = []
+            k = num_materializations
+            for previous_combined, costs, configs in reversed(steps):
+                k_component = _get_best_split(previous_combined, costs, k)
+                config.extend(configs[k_component])
+                k -= k_component
+
+            best_configurations.append(tuple(sorted(config)))
+
+        return best_configurations
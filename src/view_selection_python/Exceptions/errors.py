@@ -35,6 +35,12 @@ NO_SCHEMA_ERROR = (
     """
 )
 
+NO_ELEMENTARY_SCHEMA_ERROR = (
+    "Calibrating the costs requires the schema of the Elementary tables, but the `src_schema` "
+    "variable of `view_selection_tool` is not set in dbt_project.yml. Set it as shown in the "
+    "installation instructions."
+)
+
 """Errors for CwdChecker."""
 
 ERROR_DBT_PROJECT_NOT_FOUND = (
@@ -64,3 +70,153 @@ NOT_ALL_TABLES_IN_VST_SCHEMA_ERROR = (
     " - {missing_tables}\n"
     "Please make sure the dbt code of the view_selection_tool is run correctly."
 )
+
+EXPLAIN_TIMEOUT_ERROR = (
+    "Running EXPLAIN for model `{model_id}` exceeded the time budget of {timeout} seconds "
+    "with every planning profile that was tried ({profiles}). Consider increasing "
+    "the budget using `--explain_timeout`."
+)
+
+"""Errors for RuntimeCalibration."""
+
+TOO_FEW_MODELS_TO_CALIBRATE_ERROR = (
+    "Calibrating the costs requires the run history of at least {min_models} models that are "
+    "built as a table, but Elementary's `dbt_run_results` holds that of {n_models}. Run "
+    "`dbt run` with Elementary installed first, or leave out `--calibrate`."
+)
+
+"""Errors for ManifestBackend."""
+
+MANIFEST_NOT_COMPILED_ERROR = (
+    "Model `{model_id}` has no compiled code in `{filepath}`. Please run `dbt compile` "
+    "(or any other command that compiles the project) before using `--manifest`."
+)
+
+"""Errors for ReplayBackend."""
+
+RECORDING_VERSION_ERROR = (
+    "`{filepath}` is not a recording of this version of the tool (found version "
+    "{version}). Please record it again using `--record`."
+)
+
+QUERY_NOT_RECORDED_ERROR = (
+    "`{method}` was called with a query that is not in the recording `{filepath}`. "
+    "Please record it again using `--record`, with the same settings as the replay."
+)
+
+"""Errors for ShardResults."""
+
+INVALID_SHARD_ERROR = (
+    "'{shard}' is not a valid shard. Shards should be specified as `i/N`, where N is "
+    "the number of shards and 1 <= i <= N."
+)
+
+INCOMPATIBLE_SHARD_FILES_ERROR = (
+    "The shard files to merge do not belong to the same search: they differ in the "
+    "number of configurations or in `max_materializations`."
+)
+
+"""Errors for CheckpointManager."""
+
+CHECKPOINT_NOT_FOUND_ERROR = (
+    "Cannot resume the search: no checkpoint was found at `{filepath}`."
+)
+
+CHECKPOINT_FINGERPRINT_ERROR = (
+    "Cannot resume the search from `{filepath}`: the checkpoint was written for a different "
+    "model graph or `max_materializations`. Please start a new search without `--resume`."
+)
+
+CHECKPOINT_SEARCH_MISMATCH_ERROR = (
+    "Cannot resume the search from `{filepath}`: the checkpoint was written for a different "
+    "shard. Please resume with the same `--shard` as the original search."
+)
+
+"""Errors for MilpSearch."""
+
+MILP_REQUIRES_SCIPY_ERROR = (
+    "`--strategy milp` requires SciPy, which is not installed. Please install it using "
+    "`pip install scipy`."
+)
+
+"""Errors for ResultWriter."""
+
+PARQUET_REQUIRES_PYARROW_ERROR = (
+    "Writing results in the Parquet format requires pyarrow, which is not installed. "
+    "Please install it using `pip install pyarrow`, or choose another `--format`."
+)
+
+"""Errors for CLI."""
+
+PARETO_INCOMPATIBLE_ERROR = (
+    "`--pareto` cannot be combined with `--shard`, `--checkpoint`, `--resume`, "
+    "`--refine`, `--sensitivity`, `--strategy exact` or `--strategy milp`, as the "
+    "exact and MILP searches only find the cheapest configurations."
+)
+
+RECORD_REPLAY_INCOMPATIBLE_ERROR = (
+    "`--record` cannot be combined with `--replay`."
+)
+
+INVALID_TARGETS_ERROR = (
+    "Invalid targets `{targets}`, specify a comma-separated list of targets, e.g. "
+    "`dev,staging,prod`."
+)
+
+INVALID_MODEL_EXPLAIN_TIMEOUT_ERROR = (
+    "Invalid EXPLAIN timeout `{value}`, specify a model pattern and a number of seconds, "
+    "e.g. `model.my_project.big_*=120`."
+)
+
+INVALID_POSITIVE_INT_ERROR = "Invalid value `{value}`, specify a positive integer."
+
+TARGETS_INCOMPATIBLE_ERROR = (
+    "`--targets` cannot be combined with `--target`, `--shard`, `--checkpoint`, "
+    "`--resume`, `--pareto`, `--output`, `--refine`, `--sensitivity`, `--record`, "
+    "`--replay`, `--cprofile` or `--calibrate`."
+)
+
+"""Errors for ViewSelectionAdvisor."""
+
+REFINE_REQUIRES_DB_ERROR = (
+    "Refining configurations requires query plans from the DB, but the models were not "
+    "read from the DB."
+)
+
+CALIBRATE_REQUIRES_DB_ERROR = (
+    "Calibrating the costs requires the run history from the DB, but the models were not "
+    "read from the DB."
+)
+
+PARETO_STRATEGY_ERROR = (
+    "The Pareto frontier cannot be searched with the `{strategy}` strategy, as it only "
+    "finds the cheapest configurations."
+)
+
+"""Errors for AdvisorSession."""
+
+UNKNOWN_MODEL_ERROR = (
+    "Model `{model}` is not part of the model graph."
+)
+
+RELOAD_REQUIRES_DB_ERROR = (
+    "Reloading the models requires the DB, but the session was created from a model graph."
+)
+
+UNKNOWN_STRATEGY_ERROR = (
+    "Unknown search strategy `{strategy}`, choose one of {strategies}."
+)
+
+"""Errors for AdvisorServer."""
+
+INVALID_REQUEST_FIELD_ERROR = (
+    "Invalid field `{field}` in the request, specify {description}."
+)
+
+SERVER_ERROR = "The request failed: {error}"
+
+"""Errors for MultiTargetAdvisor."""
+
+UNKNOWN_TARGET_ERROR = (
+    "Target `{target}` is not one of the outputs of profile `{profile}` in profiles.yml."
+)
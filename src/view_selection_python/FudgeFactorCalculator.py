@@ -1,6 +1,8 @@
 """FudgeFactorCalculator class."""
 
-from typing import Dict, Tuple
+from typing import List, Tuple
+
+from .ModelGraph import ModelGraph
 
 fudge_factors_lists = [
     [0.01, 0.25, 0.50, 0.70, 0.80, 0.90],
@@ -37,47 +39,56 @@ def _get_next_fudge_factor(fudge_list_index: int, fudge_factor_index: int):
 class FudgeFactorCalculator:
     """FudgeFactorCalculator class.
 
-    This class creates a dict of the form
-    {
-        model_id: fudge_factor
-    }
+    This class creates a list of the form
+    [
+        fudge_factor of model 0,
+        fudge_factor of model 1,
+        ...
+    ]
 
     The fudge factor a model receives depends on
      - the amount of nodes it lies from a materialized model
      - the number of outgoing edges that materialized model has
+
+    If a model is downstream of several materialized models, or reachable from one
+    through several paths, it receives the lowest of the fudge factors, so the result
+    does not depend on the order of the models in the configuration. In a tree, this is
+    the fudge factor of the nearest materialized ancestor.
     """
 
-    def __init__(self, config: None | Tuple[str], models_info_dict: Dict[str, Dict]):
-        """Initialize the class."""
+    def __init__(self, config: None | Tuple[int], model_graph: ModelGraph):
+        """Initialize the class.
+
+        `config` is a tuple of the indices of the materialized models in `model_graph`.
+        """
         self.config = config
-        self.models_info_dict = models_info_dict
-        self.fudge_factor_dict = self._get_dict_template()
+        self.model_graph = model_graph
+        self.fudge_factors = self._get_list_template()
 
-    def _get_dict_template(self):
-        """Create template for dictionary to keep track of fudge factors.
+    def _get_list_template(self) -> List[float]:
+        """Create template for list to keep track of fudge factors.
 
-        This dict is of the form:
-        {
-            model_id: fudge_factor
-        }
+        The fudge factor of model i is at position i.
         """
-        return {model: 1 for model in self.models_info_dict.keys()}
+        return [1] * self.model_graph.n_models
 
-    def _get_number_downstream_references_of_model(self, model: str) -> int:
+    def _get_number_downstream_references_of_model(self, model: int) -> int:
         """Return the number of outgoing edges of a model."""
-        all_downstream_refs = self.models_info_dict[model]["referenced_by"]
-        return len(all_downstream_refs)
+        return self.model_graph.get_out_degree(model)
 
     def _update_fudge_factor(
-        self, model: str, fudge_list_index: int, fudge_factor_index: int
+        self, model: int, fudge_list_index: int, fudge_factor_index: int
     ):
         """Update the fudge factors of all models downstream of a materialized model."""
-        self.fudge_factor_dict[model] = _get_next_fudge_factor(
-            fudge_list_index=fudge_list_index, fudge_factor_index=fudge_factor_index
+        self.fudge_factors[model] = min(
+            self.fudge_factors[model],
+            _get_next_fudge_factor(
+                fudge_list_index=fudge_list_index, fudge_factor_index=fudge_factor_index
+            ),
         )
 
         # Go to next downstream model, do same recursively
-        downstream_models = self.models_info_dict[model]["referenced_by"]
+        downstream_models = self.model_graph.get_children(model)
 
         for downstream_model in downstream_models:
             self._update_fudge_factor(
@@ -102,9 +113,7 @@ class FudgeFactorCalculator:
                     n_outgoing_edges=n_downstream_refs
                 )
 
-                downstream_models = self.models_info_dict[materialized_model][
-                    "referenced_by"
-                ]
+                downstream_models = self.model_graph.get_children(materialized_model)
 
                 for downstream_model in downstream_models:
                     self._update_fudge_factor(
@@ -113,17 +122,12 @@ class FudgeFactorCalculator:
                         fudge_factor_index=0,
                     )
 
-    def get_fudge_factors(self) -> Dict[str, int]:
-        """Return the dict of fudge factors.
-
-        This dict has the following form:
-        {
-            model_id: fudge_factor
-        }
+    def get_fudge_factors(self) -> List[float]:
+        """Return the list of fudge factors, indexed by model index.
 
         If config is None, there are no materialized intermediate models, so
         no fudge factors are needed -> all models have factor 1
         """
         if self.config is not None:
             self._core_logic()
-        return self.fudge_factor_dict
+        return self.fudge_factors
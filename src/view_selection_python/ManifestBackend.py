@@ -0,0 +1,173 @@
+"""ManifestBackend class."""
+
+import json
+import os
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Tuple
+
+from .DbBackend import DbBackend
+from .Exceptions.errors import MANIFEST_NOT_COMPILED_ERROR
+
+
+def _load_json(filepath: str) -> Dict:
+    """Return the contents of a JSON file, parsed with orjson if it is installed.
+
+    Manifests of large projects are tens of megabytes, which orjson parses several
+    times faster than the json module.
+    """
+    with open(filepath, "rb") as f:
+        contents = f.read()
+
+    try:
+        import orjson
+    except ImportError:
+        return json.loads(contents)
+    return orjson.loads(contents)
+
+
+class ManifestBackend(DbBackend):
+    """Reads the models of the DAG from dbt's manifest.json, and passes the other queries on to a backend.
+
+    The models, their compiled code, their dependencies, their relation names and the
+    destination nodes are taken from the manifest, so the `all_models_plus_code`,
+    `model_dependencies` and `destination_nodes` tables are not needed. EXPLAIN, the
+    storage bound, the maintenance fractions and the run history still come from
+    `backend`.
+
+    Only the enabled models of `package_name` that are built as a relation (so not
+    ephemeral models) are read, by default those of the project the manifest was
+    written for. The destination nodes are the models no other model depends on. The
+    manifest is read again when it changed, e.g. when a session is reloaded.
+    """
+
+    def __init__(
+        self, filepath: str, backend: DbBackend, package_name: str | None = None
+    ):
+        """Initialize the class, the manifest is read on the first query."""
+        self.filepath = filepath
+        self.backend = backend
+        self.package_name = package_name
+        self.manifest_mtime = None
+        self.models: Dict[str, Dict] = {}
+
+    def _get_models(self) -> Dict[str, Dict]:
+        """Return the models of the manifest, read it if it changed since it was last read."""
+        mtime = os.stat(self.filepath).st_mtime_ns
+        if mtime != self.manifest_mtime:
+            self.models = self._read_models()
+            self.manifest_mtime = mtime
+        return self.models
+
+    def _read_models(self) -> Dict[str, Dict]:
+        """Return the compiled code, dependencies and relation name of every model."""
+        manifest = _load_json(self.filepath)
+        package_name = self.package_name or manifest["metadata"].get("project_name")
+
+        models = {}
+        for node_id, node in manifest["nodes"].items():
+            if (
+                node["resource_type"] != "model"
+                or (package_name is not None and node["package_name"] != package_name)
+                or not node.get("relation_name")
+            ):
+                continue
+
+            # dbt < 1.3 calls the compiled code `compiled_sql`
+            compiled_code = node.get("compiled_code", node.get("compiled_sql"))
+            if compiled_code is None:
+                raise RuntimeError(
+                    MANIFEST_NOT_COMPILED_ERROR.format(
+                        filepath=self.filepath, model_id=node_id
+                    )
+                )
+
+            models[node_id] = {
+                "compiled_code": compiled_code,
+                "depends_on": node["depends_on"]["nodes"],
+                "relation_name": node["relation_name"],
+            }
+        return models
+
+    def get_all_models_and_code(self) -> List[Tuple[str]]:
+        """Return all models in the DAG, together with their compiled code."""
+        return [
+            (model_id, model["compiled_code"])
+            for model_id, model in self._get_models().items()
+        ]
+
+    def get_destination_nodes(self) -> List[Tuple[str]]:
+        """Return the models no other model depends on."""
+        models = self._get_models()
+        upstream_models = {
+            upstream_model
+            for model in models.values()
+            for upstream_model in model["depends_on"]
+        }
+        return [(model_id,) for model_id in models if model_id not in upstream_models]
+
+    def get_model_dependencies(self) -> List[Tuple]:
+        """Return (model id, upstream node ids, relation name) of every model.
+
+        Unlike the `model_dependencies` table, the upstream node ids are a list
+        already. It is a copy, as SQLRewriter empties the lists it is given.
+        """
+        return [
+            (model_id, list(model["depends_on"]), model["relation_name"])
+            for model_id, model in self._get_models().items()
+        ]
+
+    def get_maintenance_fractions(self) -> List[Tuple[str]]:
+        """Return maintenance fraction for each model."""
+        return self.backend.get_maintenance_fractions()
+
+    def get_storage_space_left(self) -> int:
+        """Return the #bytes left in the DB at this moment in time."""
+        return self.backend.get_storage_space_left()
+
+    def get_model_execution_times(self) -> List[Tuple[str, str, float, int]]:
+        """Return the median execution time of every model in Elementary's run history."""
+        return self.backend.get_model_execution_times()
+
+    def get_output_explain(
+        self, query_to_explain: str, model_id: str | None = None
+    ) -> List[Dict]:
+        """Return the query plan of `query_to_explain` in JSON format."""
+        return self.backend.get_output_explain(query_to_explain, model_id)
+
+    def get_output_explains(
+        self, queries_to_explain: List[Tuple[str, str]]
+    ) -> Iterator[Tuple[str, List[Dict], float]]:
+        """Run EXPLAIN for every (model id, query) in the backend, see DbBackend.get_output_explains()."""
+        return self.backend.get_output_explains(queries_to_explain)
+
+    def get_plan_costs(
+        self, queries_to_explain: List[Tuple[str, str]]
+    ) -> Iterator[Tuple[str, Tuple[float, float], float, int]]:
+        """Run EXPLAIN for every (model id, query) in the backend, see DbBackend.get_plan_costs()."""
+        return self.backend.get_plan_costs(queries_to_explain)
+
+    def get_planning_profiles_used(self) -> Dict[str, str]:
+        """Return the planning profile used for each explained model."""
+        return self.backend.get_planning_profiles_used()
+
+    @contextmanager
+    def rolled_back_transaction(self) -> Iterator[None]:
+        """Keep a single transaction of the backend open, which is rolled back afterwards."""
+        with self.backend.rolled_back_transaction():
+            yield
+
+    def create_stub_relation(self, stub_name: str, query: str, n_rows: float):
+        """Create a stub relation in the backend, see PostgresHandler.create_stub_relation()."""
+        self.backend.create_stub_relation(stub_name, query, n_rows)
+
+    def get_output_explain_in_transaction(
+        self, query_to_explain: str, profile_name: str = "default"
+    ) -> List[Dict]:
+        """Return the query plan of `query_to_explain`, seeing the stub relations."""
+        return self.backend.get_output_explain_in_transaction(
+            query_to_explain, profile_name
+        )
+
+    def close(self):
+        """Close the backend."""
+        self.backend.close()
@@ -0,0 +1,213 @@
+"""MilpSearch class."""
+
+from math import inf
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from .Exceptions.errors import MILP_REQUIRES_SCIPY_ERROR
+from .FudgeFactorCalculator import (
+    _get_fudge_list_index_to_use,
+    _get_next_fudge_factor,
+    fudge_factors_lists,
+)
+from .ModelGraph import ModelGraph
+
+# Number of fudge factors per list, beyond which the fudge factor is 1
+N_FUDGE_FACTORS = len(fudge_factors_lists[0])
+
+# A configuration only fits if its storage cost is below the storage bound (see
+# ViewSelectionAdvisor), so the storage cost in the program must stay this much below
+# it. Storage costs are whole bytes (expected rows times width), so this excludes
+# exactly the configurations that use all of the storage space left.
+STORAGE_BOUND_MARGIN = 0.5
+
+
+class MilpSearch:
+    """This class finds the optimal configuration by solving a mixed-integer program.
+
+    Every intermediate model m gets a binary variable x[m], which is 1 if m is
+    materialized. The fudge factor of a model is the lowest fudge factor any of its
+    materialized ancestors gives it (see FudgeFactorCalculator), so every pair of a
+    model m and an ancestor a that is close enough to lower its fudge factor gets a
+    continuous variable y[m, a] in [0, 1], with
+        - y[m, a] <= x[a]: only materialized ancestors lower the fudge factor
+        - sum over a of y[m, a] <= x[m] (or <= 1 for destination nodes): the fudge
+          factor is lowered by at most one ancestor, and only for models whose cost
+          counts
+    The objective is the total cost of the configuration:
+        sum over intermediate m of x[m] * (fixed_cost + creation_cost)
+        + sum over destination nodes m of (fixed_cost + creation_cost)
+        - sum over (m, a) of y[m, a] * creation_cost[m] * (1 - fudge factor a gives m)
+    The fixed cost is the storage cost, unless the costs were calibrated to seconds,
+    see ModelGraph. Minimizing it makes y pick the ancestor with the lowest fudge
+    factor. The number of materialized models is capped at `max_materializations`,
+    and the storage cost of the configuration must be below `storage_bound`.
+
+    The program is solved with the HiGHS solver bundled with SciPy, which needs to be
+    installed separately.
+    """
+
+    def __init__(
+        self,
+        model_graph: ModelGraph,
+        max_materializations: int,
+        storage_bound: float,
+        time_limit: float,
+    ):
+        """Initialize MilpSearch class.
+
+        The solver stops after `time_limit` seconds, with the best configuration found
+        so far.
+        """
+        self.model_graph = model_graph
+        self.max_materializations = max_materializations
+        self.storage_bound = storage_bound
+        self.time_limit = time_limit
+        self.optimality_gap = None
+        self.is_optimal = False
+
+    def _get_fudge_sources(self, ancestor: int) -> Dict[int, float]:
+        """Return the models whose fudge factor `ancestor` lowers when materialized.
+
+        Returns a dict of model: fudge factor. The fudge factor is determined by the
+        shortest path from `ancestor` to the model.
+        """
+        fudge_list_index = _get_fudge_list_index_to_use(
+            self.model_graph.get_out_degree(ancestor)
+        )
+        fudge_factors = {}
+        current_models = list(self.model_graph.get_children(ancestor))
+
+        for fudge_factor_index in range(N_FUDGE_FACTORS):
+            next_models = []
+            for model in current_models:
+                if model not in fudge_factors:
+                    fudge_factors[model] = _get_next_fudge_factor(
+                        fudge_list_index, fudge_factor_index
+                    )
+                    next_models.extend(self.model_graph.get_children(model))
+            current_models = next_models
+
+        return fudge_factors
+
+    def _get_fudge_pairs(self) -> List[Tuple[int, int, float]]:
+        """Return (model, ancestor, fudge factor) for every y variable."""
+        return [
+            (model, ancestor, fudge_factor)
+            for ancestor in self.model_graph.intermediate_indices.tolist()
+            for model, fudge_factor in self._get_fudge_sources(ancestor).items()
+            if fudge_factor < 1
+        ]
+
+    def solve(self) -> None | Tuple[int]:
+        """Return the optimal configuration, as a tuple of model indices.
+
+        Returns None if the default configuration is the best one, or if no
+        configuration was found within the time limit.
+        """
+        try:
+            from scipy.optimize import Bounds, LinearConstraint, milp
+            from scipy.sparse import coo_array
+        except ImportError:
+            raise RuntimeError(MILP_REQUIRES_SCIPY_ERROR)
+
+        graph = self.model_graph
+        intermediate_models = graph.intermediate_indices.tolist()
+
+        # Without intermediate models, the default configuration is the only one
+        if not intermediate_models:
+            self.is_optimal = True
+            self.optimality_gap = 0
+            return None
+
+        x_position = {model: i for i, model in enumerate(intermediate_models)}
+        fudge_pairs = self._get_fudge_pairs()
+        n_variables = len(intermediate_models) + len(fudge_pairs)
+
+        # Objective
+        objective = np.zeros(n_variables)
+        for model, i in x_position.items():
+            objective[i] = graph.fixed_costs[model] + graph.creation_costs[model]
+        for j, (model, _, fudge_factor) in enumerate(fudge_pairs):
+            objective[len(intermediate_models) + j] = (
+                -graph.creation_costs[model] * (1 - fudge_factor)
+            )
+
+        # Constraints, as rows of a sparse matrix with an upper bound per row
+        rows, columns, values, upper_bounds = [], [], [], []
+
+        def add_row(entries: List[Tuple[int, float]], upper_bound: float):
+            for column, value in entries:
+                rows.append(len(upper_bounds))
+                columns.append(column)
+                values.append(value)
+            upper_bounds.append(upper_bound)
+
+        add_row([(i, 1) for i in x_position.values()], self.max_materializations)
+
+        destination_storage = graph.storage_costs[graph.destination_indices].sum()
+        if self.storage_bound < inf:
+            add_row(
+                [(i, graph.storage_costs[model]) for model, i in x_position.items()],
+                self.storage_bound - destination_storage - STORAGE_BOUND_MARGIN,
+            )
+
+        pairs_per_model = {}
+        for j, (model, ancestor, _) in enumerate(fudge_pairs):
+            y_position = len(intermediate_models) + j
+            add_row([(y_position, 1), (x_position[ancestor], -1)], 0)
+            pairs_per_model.setdefault(model, []).append(y_position)
+
+        for model, y_positions in pairs_per_model.items():
+            entries = [(y_position, 1) for y_position in y_positions]
+            if graph.is_destination[model]:
+                add_row(entries, 1)
+            else:
+                add_row(entries + [(x_position[model], -1)], 0)
+
+        constraint_matrix = coo_array(
+            (values, (rows, columns)), shape=(len(upper_bounds), n_variables)
+        )
+        integrality = np.zeros(n_variables)
+        integrality[:len(intermediate_models)] = 1
+
+        result = milp(
+            c=objective,
+            integrality=integrality,
+            bounds=Bounds(0, 1),
+            constraints=LinearConstraint(constraint_matrix, -inf, upper_bounds),
+            options={"time_limit": self.time_limit},
+        )
+
+        self.is_optimal = result.status == 0
+
+        if result.x is None:
+            self.optimality_gap = None
+            return None
+
+        # The gap relative to the total cost, which includes the destination nodes
+        destination_cost = (
+            graph.fixed_costs[graph.destination_indices].sum()
+            + graph.creation_costs[graph.destination_indices].sum()
+        )
+        self.optimality_gap = max(result.fun - result.mip_dual_bound, 0) / (
+            result.fun + destination_cost
+        )
+
+        config = tuple(
+            model for model, i in x_position.items() if result.x[i] > 0.5
+        )
+        return config if config else None
+
+    def get_optimality_gap(self) -> float | None:
+        """Return the gap between the solution of the last solve() and the best lower bound.
+
+        The gap is relative to the total cost of the solution. Returns None if no
+        solution was found.
+        """
+        return self.optimality_gap
+
+    def solution_is_optimal(self) -> bool:
+        """Return whether the last solve() proved its solution optimal."""
+        return self.is_optimal
@@ -0,0 +1,222 @@
+"""ModelGraph class."""
+
+import hashlib
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+
+def _get_adjacency_arrays(
+    n_models: int, edges: List[Tuple[int, int]]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Return the CSR (offsets, indices) arrays of the edges (from, to).
+
+    The neighbours of model i are indices[offsets[i]:offsets[i + 1]], in the order of
+    `edges`.
+    """
+    counts = [0] * (n_models + 1)
+    for from_index, _ in edges:
+        counts[from_index + 1] += 1
+    offsets = np.cumsum(counts, dtype=np.int32)
+
+    indices = [0] * len(edges)
+    next_position = offsets[:-1].tolist()
+    for from_index, to_index in edges:
+        indices[next_position[from_index]] = to_index
+        next_position[from_index] += 1
+
+    return offsets, np.array(indices, dtype=np.int32)
+
+
+def _make_read_only(array: np.ndarray) -> np.ndarray:
+    """Return `array`, after making it read-only."""
+    array.setflags(write=False)
+    return array
+
+
+class ModelGraph:
+    """Immutable, integer-indexed representation of the models in the DAG.
+
+    Model i is the i-th model id in `model_ids`. The graph stores
+        - the children (referenced_by) and parents of every model as CSR adjacency
+          arrays: the children of model i are
+          child_indices[child_offsets[i]:child_offsets[i + 1]]
+        - the storage and creation cost of every model as vectors
+        - the fixed cost of every model, the part of its cost when it is materialized
+          that the fudge factors don't lower. This is its storage cost, unless the
+          costs were calibrated to seconds, see RuntimeCalibration
+        - which models are destination nodes
+
+    All arrays are read-only, and no attributes can be set after construction.
+    """
+
+    __slots__ = (
+        "model_ids",
+        "n_models",
+        "child_offsets",
+        "child_indices",
+        "parent_offsets",
+        "parent_indices",
+        "storage_costs",
+        "creation_costs",
+        "fixed_costs",
+        "is_destination",
+        "destination_indices",
+        "intermediate_indices",
+        "_model_indices",
+        "_children",
+        "_frozen",
+    )
+
+    def __init__(
+        self,
+        model_ids: Iterable[str],
+        edges: List[Tuple[int, int]],
+        storage_costs: Iterable[float],
+        creation_costs: Iterable[float],
+        destination_indices: Iterable[int],
+        fixed_costs: Iterable[float] | None = None,
+    ):
+        """Initialize the class.
+
+        `edges` contains a (parent index, child index) tuple for every dependency, in
+        the order the children should have. The fixed costs are the storage costs, if
+        not given.
+        """
+        self.model_ids = tuple(model_ids)
+        self.n_models = len(self.model_ids)
+        self._model_indices = {
+            model: index for index, model in enumerate(self.model_ids)
+        }
+
+        child_offsets, child_indices = _get_adjacency_arrays(self.n_models, edges)
+        parent_offsets, parent_indices = _get_adjacency_arrays(
+            self.n_models, [(child, parent) for parent, child in edges]
+        )
+        self.child_offsets = _make_read_only(child_offsets)
+        self.child_indices = _make_read_only(child_indices)
+        self.parent_offsets = _make_read_only(parent_offsets)
+        self.parent_indices = _make_read_only(parent_indices)
+
+        self.storage_costs = _make_read_only(
+            np.fromiter(storage_costs, dtype=np.float64, count=self.n_models)
+        )
+        self.creation_costs = _make_read_only(
+            np.fromiter(creation_costs, dtype=np.float64, count=self.n_models)
+        )
+        self.fixed_costs = (
+            self.storage_costs
+            if fixed_costs is None
+            else _make_read_only(
+                np.fromiter(fixed_costs, dtype=np.float64, count=self.n_models)
+            )
+        )
+
+        is_destination = np.zeros(self.n_models, dtype=bool)
+        is_destination[list(destination_indices)] = True
+        self.is_destination = _make_read_only(is_destination)
+        self.destination_indices = _make_read_only(np.flatnonzero(is_destination))
+        self.intermediate_indices = _make_read_only(np.flatnonzero(~is_destination))
+
+        # Children as tuples of ints, for fast traversals in pure Python
+        self._children = tuple(
+            tuple(child_indices[child_offsets[i]:child_offsets[i + 1]].tolist())
+            for i in range(self.n_models)
+        )
+        self._frozen = True
+
+    def __setattr__(self, name: str, value):
+        """Prevent changing the graph after construction."""
+        if getattr(self, "_frozen", False):
+            raise AttributeError("ModelGraph is immutable")
+        object.__setattr__(self, name, value)
+
+    def __getstate__(self) -> Dict:
+        """Return the attributes of the graph, to pickle it, e.g. to search it in another process."""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __setstate__(self, state: Dict):
+        """Restore the attributes of a pickled graph, and make its arrays read-only again."""
+        for name, value in state.items():
+            if isinstance(value, np.ndarray):
+                value = _make_read_only(value)
+            object.__setattr__(self, name, value)
+
+    def with_costs(
+        self, fixed_costs: np.ndarray, creation_costs: np.ndarray
+    ) -> "ModelGraph":
+        """Return a copy of the graph with other fixed and creation costs.
+
+        The storage costs stay the same, as they are compared to the storage space
+        left. The other arrays are shared with this graph.
+        """
+        state = self.__getstate__()
+        state["fixed_costs"] = np.array(fixed_costs, dtype=np.float64)
+        state["creation_costs"] = np.array(creation_costs, dtype=np.float64)
+
+        model_graph = ModelGraph.__new__(ModelGraph)
+        model_graph.__setstate__(state)
+        return model_graph
+
+    @classmethod
+    def from_model_info_dict(
+        cls, model_info_dict: Dict[str, Dict], destination_nodes: Iterable[str]
+    ) -> "ModelGraph":
+        """Build the graph from a model info dict as created by ModelInfoManager.
+
+        The model indices follow the order of `model_info_dict`.
+        """
+        model_indices = {model: index for index, model in enumerate(model_info_dict)}
+        edges = [
+            (model_indices[model], model_indices[downstream_model])
+            for model, info in model_info_dict.items()
+            for downstream_model in info["referenced_by"]
+        ]
+        return cls(
+            model_ids=model_info_dict.keys(),
+            edges=edges,
+            storage_costs=(info["storage_cost"] for info in model_info_dict.values()),
+            creation_costs=(
+                info["creation_cost"] for info in model_info_dict.values()
+            ),
+            destination_indices=(
+                model_indices[model]
+                for model in destination_nodes
+                if model in model_indices
+            ),
+        )
+
+    def get_model_index(self, model: str) -> int:
+        """Return the index of a model."""
+        return self._model_indices[model]
+
+    def get_children(self, index: int) -> Tuple[int]:
+        """Return the indices of the models that reference model `index`."""
+        return self._children[index]
+
+    def get_parents(self, index: int) -> np.ndarray:
+        """Return the indices of the models that model `index` depends on."""
+        return self.parent_indices[
+            self.parent_offsets[index]:self.parent_offsets[index + 1]
+        ]
+
+    def get_out_degree(self, index: int) -> int:
+        """Return the number of models that reference model `index`."""
+        return len(self._children[index])
+
+    def get_fingerprint(self) -> str:
+        """Return a fingerprint of the graph.
+
+        The fingerprint changes if models, their dependencies, the destination nodes, or
+        the order of the intermediate models (which determines the order in which the
+        configurations are enumerated) change.
+        """
+        graph_description = repr((
+            sorted(
+                (model, sorted(self.model_ids[child] for child in children))
+                for model, children in zip(self.model_ids, self._children)
+            ),
+            sorted(self.model_ids[index] for index in self.destination_indices),
+            [self.model_ids[index] for index in self.intermediate_indices],
+        ))
+        return hashlib.sha256(graph_description.encode()).hexdigest()
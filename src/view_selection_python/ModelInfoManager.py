@@ -1,15 +1,19 @@
 """ModelInfoManager class."""
 
 from ast import literal_eval
-from typing import Dict, KeysView, List, Tuple
+from typing import Dict, KeysView, List, Set, Tuple
 
 from .CostEstimatorSinglePlan import CostEstimatorSinglePlan
-from .PostgresHandler import PostgresHandler
+from .ModelGraph import ModelGraph
+from .DbBackend import DbBackend
+from .RunStats import RunStats
 from .SQLRewriter import SQLRewriter
 
 
 def _fill_depends_on(downstream_model_info: Dict, dependencies: List[str]):
     downstream_model_info["depends_on"] = dependencies
+    # SQLRewriter empties `depends_on`, this copy is kept to compare with on a reload
+    downstream_model_info["upstream_models"] = sorted(dependencies)
 
 
 def _fill_in_compiled_code_ref(downstream_model_info: Dict, compiled_code_ref: str):
@@ -24,20 +28,47 @@ class ModelInfoManager:
         model_id:
             {
                 code: CODE
+                compiled_code: CODE
                 referenced_by: [downstream_model_id]
                 depends_on: [upstream_model_id]
+                upstream_models: [upstream_model_id]
                 compiled_code_reference: "db_name"."schema_name"."alias"
+                is_destination: is_destination
                 storage_cost: storage_cost
                 creation_cost: creation_cost
                 maintenance_fraction: maintenance_fraction
             }
     }
+
+    Once the dict is filled, the same info is also available as an integer-indexed
+    ModelGraph, which is what the search uses.
     """
 
-    def __init__(self, postgres_handler: PostgresHandler):
-        """Initialize the class, fill the dict with all relevant info."""
+    def __init__(
+        self,
+        postgres_handler: DbBackend,
+        previous_model_info_dict: Dict[str, Dict] | None = None,
+        run_stats: RunStats | None = None,
+        reduce_plans: bool = False,
+    ):
+        """Initialize the class, fill the dict with all relevant info.
+
+        If the dict of an earlier ModelInfoManager is given, the costs of the models
+        that, and whose upstream models, did not change are reused instead of running
+        EXPLAIN again, see _model_has_changed(). The time spent and the EXPLAINs are added to
+        `run_stats`, if given. With `reduce_plans`, only the costs of the query plans
+        are received from the backend, not the plans themselves, see
+        DbBackend.get_plan_costs().
+        """
         self.postgres_handler = postgres_handler
+        self.reduce_plans = reduce_plans
+        self.run_stats = run_stats or RunStats()
+        self.previous_model_info_dict = previous_model_info_dict or {}
+        self.explained_models: List[str] = []
         self.model_info_dict = {}
+        self.known_references: Set[Tuple[str, str]] = set()
+        self.destination_nodes = None
+        self.model_graph = None
         self._fill_dict()
 
     def _create_skeleton_from_models_and_code(self):
@@ -48,14 +79,19 @@ class ModelInfoManager:
             model_id:
                 {
                     code: CODE
+                    compiled_code: CODE
                     referenced_by: []
                 }
         }
+
+        `code` is rewritten by SQLRewriter later on, `compiled_code` keeps the code
+        as compiled by dbt.
         """
         models_and_code = self.postgres_handler.get_all_models_and_code()
         for model_id, compiled_code in models_and_code:
             self.model_info_dict[model_id] = {
                 "code": compiled_code,
+                "compiled_code": compiled_code,
                 "referenced_by": [],
             }
 
@@ -82,11 +118,12 @@ class ModelInfoManager:
 
                 # If the dependency under investigation is recorded already,
                 # we do not have to record it again
-                currently_known_references = self.model_info_dict[upstream_model_id][
-                    "referenced_by"
-                ]
-                if downstream_model_id not in currently_known_references:
-                    currently_known_references.append(downstream_model_id)
+                reference = (upstream_model_id, downstream_model_id)
+                if reference not in self.known_references:
+                    self.known_references.add(reference)
+                    self.model_info_dict[upstream_model_id]["referenced_by"].append(
+                        downstream_model_id
+                    )
 
     def _include_info_model_dependencies(self):
         """Add model dependencies and compiled_code_references.
@@ -97,14 +134,22 @@ class ModelInfoManager:
                 {
                     referenced_by: []
                     depends_on: [upstream_model_id]
+                    upstream_models: [upstream_model_id]
                     compiled_code_reference: "db_name"."schema_name"."alias"
                 }
         }
+
+        `depends_on` is emptied by SQLRewriter later on, `upstream_models` keeps a
+        sorted copy.
         """
         model_dependencies = self.postgres_handler.get_model_dependencies()
-        for model_id, dependencies_str, compiled_code_ref in model_dependencies:
+        for model_id, dependencies, compiled_code_ref in model_dependencies:
             model_id_dict = self.model_info_dict[model_id]
-            dependencies_list = literal_eval(dependencies_str)
+            # The `model_dependencies` table holds the dependencies as a stringified
+            # list, ManifestBackend gives a list
+            dependencies_list = (
+                literal_eval(dependencies) if isinstance(dependencies, str) else dependencies
+            )
 
             self._update_referenced_by(
                 downstream_model_id=model_id, upstream_model_ids=dependencies_list
@@ -118,6 +163,21 @@ class ModelInfoManager:
                 downstream_model_info=model_id_dict, compiled_code_ref=compiled_code_ref
             )
 
+    def _include_destination_status(self):
+        """Add whether each model is a destination node to the dict.
+
+        This results in the following addition to the dict:
+        {
+            model_id:
+                {
+                    is_destination: is_destination
+                }
+        }
+        """
+        destination_nodes = set(self.get_list_of_destination_nodes())
+        for model, info in self.model_info_dict.items():
+            info["is_destination"] = model in destination_nodes
+
     def _rewrite_sql(self):
         """Rewrite the sql of the models using SQLRewriter."""
         sql_rewriter = SQLRewriter(
@@ -125,11 +185,99 @@ class ModelInfoManager:
         )
         sql_rewriter.update_all_sql_code()
 
-    def _retrieve_storage_and_creation_cost(self, model: str) -> Tuple[float, float]:
-        """Return the storage and creation cost of a model."""
-        explain_friendly_code = self.model_info_dict[model]["code"]
-        query_plan = self.postgres_handler.get_output_explain(explain_friendly_code)
-        return CostEstimatorSinglePlan().estimate_costs(query_plan)
+    def _retrieve_storage_and_creation_costs(
+        self, models: List[str]
+    ) -> Dict[str, Tuple[float, float]]:
+        """Return the storage and creation cost of each of `models`.
+
+        The backend may run the EXPLAINs concurrently, see
+        DbBackend.get_output_explains(). Each query plan is walked as soon as it
+        arrives, while the other EXPLAINs are still running.
+        """
+        if self.reduce_plans:
+            return self._retrieve_plan_costs(models)
+
+        explained = self.postgres_handler.get_output_explains(
+            [(model, self.model_info_dict[model]["code"]) for model in models]
+        )
+        costs = {}
+
+        while True:
+            with self.run_stats.phase("explain"):
+                model, query_plan, seconds = next(explained, (None, None, None))
+            if model is None:
+                return costs
+
+            self.run_stats.add_explain(
+                self.model_info_dict[model]["code"], query_plan, seconds
+            )
+            with self.run_stats.phase("walk_plans"):
+                costs[model] = CostEstimatorSinglePlan().estimate_costs(query_plan)
+
+    def _retrieve_plan_costs(
+        self, models: List[str]
+    ) -> Dict[str, Tuple[float, float]]:
+        """Return the storage and creation cost of each of `models`, receiving only the costs of their query plans."""
+        explained = self.postgres_handler.get_plan_costs(
+            [(model, self.model_info_dict[model]["code"]) for model in models]
+        )
+        costs = {}
+
+        while True:
+            with self.run_stats.phase("explain"):
+                model, model_costs, seconds, n_plan_bytes = next(
+                    explained, (None, None, None, None)
+                )
+            if model is None:
+                return costs
+
+            self.run_stats.add_explain(
+                self.model_info_dict[model]["code"], None, seconds, n_plan_bytes
+            )
+            costs[model] = model_costs
+
+    def _model_has_changed(self, model: str) -> bool:
+        """Return whether a model differs from the previous dict.
+
+        A model has changed if its compiled code, its reference, its upstream models
+        or whether it is a destination node differ. Changes in the DB that leave the
+        models as they are, e.g. new table statistics, are not detected, those need
+        EXPLAIN to be run for all models again.
+        """
+        if model not in self.previous_model_info_dict:
+            return True
+
+        info = self.model_info_dict[model]
+        previous_info = self.previous_model_info_dict[model]
+        return any(
+            info.get(key) != previous_info.get(key)
+            for key in (
+                "compiled_code",
+                "compiled_code_reference",
+                "upstream_models",
+                "is_destination",
+            )
+        )
+
+    def _get_models_to_explain(self) -> Set[str]:
+        """Return the models whose costs cannot be reused from the previous dict.
+
+        These are the changed models and all models downstream of them, because the
+        code of upstream models is part of the rewritten code of a model.
+        """
+        models_to_explain = {
+            model for model in self.model_info_dict if self._model_has_changed(model)
+        }
+        to_visit = list(models_to_explain)
+
+        while to_visit:
+            model = to_visit.pop()
+            for downstream_model in self.model_info_dict[model]["referenced_by"]:
+                if downstream_model not in models_to_explain:
+                    models_to_explain.add(downstream_model)
+                    to_visit.append(downstream_model)
+
+        return models_to_explain
 
     def _add_costs_per_model(self):
         """Add storage and creation cost to the info dict.
@@ -142,11 +290,23 @@ class ModelInfoManager:
                     creation_cost: creation_cost
                 }
         }
+
+        The costs of models that did not change are taken from the previous dict.
         """
+        models_to_explain = self._get_models_to_explain()
+        explained_costs = self._retrieve_storage_and_creation_costs(
+            [model for model in self.model_info_dict if model in models_to_explain]
+        )
+
         for model, info in self.model_info_dict.items():
-            storage_cost, creation_cost = self._retrieve_storage_and_creation_cost(
-                model
-            )
+            if model in models_to_explain:
+                storage_cost, creation_cost = explained_costs[model]
+                self.explained_models.append(model)
+            else:
+                previous_info = self.previous_model_info_dict[model]
+                storage_cost = previous_info["storage_cost"]
+                creation_cost = previous_info["creation_cost"]
+
             info["storage_cost"] = storage_cost
             info["creation_cost"] = creation_cost
 
@@ -185,14 +345,33 @@ class ModelInfoManager:
                 mf if mf is not None else 1
             )
 
+    def _build_model_graph(self):
+        """Build the integer-indexed graph from the filled dict.
+
+        The model indices follow the order of the dict.
+        """
+        self.model_graph = ModelGraph.from_model_info_dict(
+            self.model_info_dict, self.get_list_of_destination_nodes()
+        )
+
     def _fill_dict(self):
         """Fill the dict with all relevant info."""
-        self._create_skeleton_from_models_and_code()
-        self._include_info_model_dependencies()
-        self._rewrite_sql()
+        with self.run_stats.phase("read_metadata"):
+            self._create_skeleton_from_models_and_code()
+            self._include_info_model_dependencies()
+            self._include_destination_status()
+        with self.run_stats.phase("rewrite_sql"):
+            self._rewrite_sql()
         self._add_costs_per_model()
-        self._fill_with_default_mf()
-        self._include_maintenance_fractions()
+        with self.run_stats.phase("read_metadata"):
+            self._fill_with_default_mf()
+            self._include_maintenance_fractions()
+        with self.run_stats.phase("build_model_graph"):
+            self._build_model_graph()
+
+    def get_explained_models(self) -> List[str]:
+        """Return the models EXPLAIN was run for, the costs of the others were reused."""
+        return self.explained_models
 
     def get_model_info_dict(self) -> Dict[str, Dict]:
         """Return the model info dictionary."""
@@ -203,12 +382,39 @@ class ModelInfoManager:
         return self.model_info_dict.keys()
 
     def get_list_of_destination_nodes(self) -> List[str]:
-        """Transform List[Tuple[str]] to List[str]."""
-        postgres_output = self.postgres_handler.get_destination_nodes()
-        return [model for model_tuple in postgres_output for model in model_tuple]
+        """Transform List[Tuple[str]] to List[str].
+
+        The destination nodes are only retrieved from the DB once.
+        """
+        if self.destination_nodes is None:
+            postgres_output = self.postgres_handler.get_destination_nodes()
+            self.destination_nodes = [
+                model for model_tuple in postgres_output for model in model_tuple
+            ]
+        return self.destination_nodes
 
     def get_all_intermediate_models(self) -> List[str]:
         """Return all intermediate nodes/models."""
-        destination_nodes = self.get_list_of_destination_nodes()
+        destination_nodes = set(self.get_list_of_destination_nodes())
         all_models = self.get_all_models_ids()
         return [model for model in all_models if model not in destination_nodes]
+
+    def get_model_graph(self) -> ModelGraph:
+        """Return the integer-indexed graph of the models."""
+        return self.model_graph
+
+    def get_model_ids(self) -> Tuple[str]:
+        """Return all model ids, ordered by model index."""
+        return self.model_graph.model_ids
+
+    def get_model_index(self, model: str) -> int:
+        """Return the integer index of a model."""
+        return self.model_graph.get_model_index(model)
+
+    def get_all_intermediate_model_indices(self) -> List[int]:
+        """Return the indices of all intermediate nodes/models."""
+        return self.model_graph.intermediate_indices.tolist()
+
+    def get_model_graph_fingerprint(self) -> str:
+        """Return a fingerprint of the model graph, see ModelGraph.get_fingerprint()."""
+        return self.model_graph.get_fingerprint()
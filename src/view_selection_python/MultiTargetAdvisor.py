@@ -0,0 +1,227 @@
+"""MultiTargetAdvisor class."""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import Dict, List, Tuple
+
+from .ConfigurationResults import ConfigurationResults
+from .CwdChecker import CwdChecker
+from .DbtProjectScraper import DbtProjectScraper
+from .Exceptions.errors import UNKNOWN_TARGET_ERROR
+from .ModelGraph import ModelGraph
+from .PostgresHandler import DEFAULT_MAX_CONCURRENT_EXPLAINS
+from .ProfilesScraper import ProfilesScraper
+from .RunStats import RunStats
+from .ViewSelectionAdvisor import ViewSelectionAdvisor
+
+
+def _search_target(
+    model_graph: ModelGraph,
+    storage_space_left: float,
+    n_mater_in_config: int,
+    time_budget: float | None,
+    strategy: str,
+    n_results_to_keep: int | None,
+) -> Tuple[ConfigurationResults, str, int, float, RunStats]:
+    """Search the configurations of a single target, in a worker process.
+
+    Only the default and the `n_results_to_keep` best configurations are returned,
+    if given, so the results sent back to the main process stay small.
+
+    Returns:
+        Tuple[ConfigurationResults, str, int, float, RunStats]: The results, the chosen
+        search strategy, the number of configurations, the fraction of them that was
+        explored, and the time spent in each phase of the search.
+    """
+    run_stats = RunStats()
+    view_selection_advisor = ViewSelectionAdvisor(
+        n_mater_in_config=n_mater_in_config,
+        time_budget=time_budget,
+        strategy=strategy,
+        model_graph=model_graph,
+        show_progress=False,
+        run_stats=run_stats,
+        storage_space_left=storage_space_left,
+        n_results_to_keep=n_results_to_keep,
+    )
+    chosen_strategy = view_selection_advisor.plan_search()
+    results = view_selection_advisor.advise()
+    results.drop_results_not_needed()
+    return (
+        results,
+        chosen_strategy,
+        view_selection_advisor.get_number_of_configurations(),
+        view_selection_advisor.get_fraction_of_space_covered(),
+        run_stats,
+    )
+
+
+class MultiTargetAdvisor:
+    """Advises on several targets of the same dbt project, e.g. dev, staging and prod, in one run.
+
+    dbt_project.yml and profiles.yml are read once, and every target reads its own
+    VST schema. The models of all targets are read concurrently, one thread per target,
+    as this mostly waits for the DB. As soon as the models of a target are read, its
+    search starts in a process pool shared by all targets, as the search is CPU-bound.
+    A comparison of the targets then takes about as long as the slowest target.
+
+    The time spent in each phase and counters of the work done for all targets are
+    added to `run_stats`.
+    """
+
+    def __init__(
+        self,
+        targets: List[str],
+        n_mater_in_config: int = 2,
+        planning_profile: str = "default",
+        explain_timeout: float = 30,
+        time_budget: float | None = None,
+        strategy: str = "auto",
+        project_dir: str | None = None,
+        profile: str | None = None,
+        manifest_path: str | None = None,
+        n_workers: int | None = None,
+        run_stats: RunStats | None = None,
+        max_concurrent_explains: int = DEFAULT_MAX_CONCURRENT_EXPLAINS,
+        max_db_load: int | None = None,
+        model_explain_timeouts: Dict[str, float] | None = None,
+        reduce_plans: bool = False,
+        n_results_to_keep: int | None = None,
+    ):
+        """Initialize the class.
+
+        The arguments are those of ViewSelectionAdvisor. The searches run in at most
+        `n_workers` processes, by default one per target, up to the number of CPUs. If
+        `n_results_to_keep` is given, only the default and that many of the best
+        configurations of each target are kept.
+        """
+        self.targets = targets
+        self.n_mater_in_config = n_mater_in_config
+        self.planning_profile = planning_profile
+        self.explain_timeout = explain_timeout
+        self.time_budget = time_budget
+        self.strategy = strategy
+        self.project_dir = project_dir
+        self.profile = profile
+        self.manifest_path = manifest_path
+        self.max_concurrent_explains = max_concurrent_explains
+        self.max_db_load = max_db_load
+        self.model_explain_timeouts = model_explain_timeouts
+        self.reduce_plans = reduce_plans
+        self.n_results_to_keep = n_results_to_keep
+        self.n_workers = n_workers or min(len(targets), os.cpu_count() or 1)
+        self.run_stats = run_stats or RunStats()
+        self.run_stats_per_target = {target: RunStats() for target in targets}
+        self.chosen_strategies: Dict[str, str] = {}
+        self.numbers_of_configurations: Dict[str, int] = {}
+        self.fractions_of_space_covered: Dict[str, float] = {}
+
+    def _read_yaml(self):
+        """Read dbt_project.yml and profiles.yml, and check that all targets exist.
+
+        The contents of both files are cached (see YamlScraper), so the advisors of
+        the targets don't read them again.
+        """
+        with self.run_stats.phase("load_yaml"):
+            cwd_checker = CwdChecker(cwd=self.project_dir)
+            dbt_project_scraper = DbtProjectScraper(
+                filepath=cwd_checker.get_dbt_project_path()
+            )
+            profile_name = self.profile or dbt_project_scraper.get_profile()
+            profiles_scraper = ProfilesScraper(
+                filepath=cwd_checker.get_profiles_path(), profile_name=profile_name
+            )
+
+        for target in self.targets:
+            if target not in profiles_scraper.profile_outputs:
+                raise ValueError(
+                    UNKNOWN_TARGET_ERROR.format(target=target, profile=profile_name)
+                )
+
+    def _load_target(self, target: str) -> Tuple[ModelGraph, float]:
+        """Read the models of a target, and return its model graph and storage space left."""
+        view_selection_advisor = ViewSelectionAdvisor(
+            planning_profile=self.planning_profile,
+            explain_timeout=self.explain_timeout,
+            project_dir=self.project_dir,
+            profile=self.profile,
+            target=target,
+            show_progress=False,
+            run_stats=self.run_stats_per_target[target],
+            manifest_path=self.manifest_path,
+            max_concurrent_explains=self.max_concurrent_explains,
+            max_db_load=self.max_db_load,
+            model_explain_timeouts=self.model_explain_timeouts,
+            reduce_plans=self.reduce_plans,
+        )
+        try:
+            return (
+                view_selection_advisor.model_graph,
+                view_selection_advisor.get_storage_space_left(),
+            )
+        finally:
+            view_selection_advisor.close()
+
+    def advise(self) -> Dict[str, ConfigurationResults]:
+        """Search the best configurations of every target.
+
+        Returns:
+            Dict[str, ConfigurationResults]: The valid configurations of each target, in
+            the order of the targets.
+        """
+        self._read_yaml()
+        results_per_target = {}
+
+        # Worker processes are spawned rather than forked, as other threads hold DB
+        # connections
+        with ThreadPoolExecutor(max_workers=len(self.targets)) as load_pool, ProcessPoolExecutor(
+            max_workers=self.n_workers, mp_context=multiprocessing.get_context("spawn")
+        ) as search_pool:
+            load_futures = {
+                load_pool.submit(self._load_target, target): target
+                for target in self.targets
+            }
+            search_futures = {}
+            for load_future in as_completed(load_futures):
+                model_graph, storage_space_left = load_future.result()
+                search_futures[load_futures[load_future]] = search_pool.submit(
+                    _search_target,
+                    model_graph,
+                    storage_space_left,
+                    self.n_mater_in_config,
+                    self.time_budget,
+                    self.strategy,
+                    self.n_results_to_keep,
+                )
+
+            for target in self.targets:
+                (
+                    results_per_target[target],
+                    self.chosen_strategies[target],
+                    self.numbers_of_configurations[target],
+                    self.fractions_of_space_covered[target],
+                    search_run_stats,
+                ) = search_futures[target].result()
+                self.run_stats_per_target[target].add_run_stats(search_run_stats)
+
+        for target_run_stats in self.run_stats_per_target.values():
+            self.run_stats.add_run_stats(target_run_stats)
+
+        return results_per_target
+
+    def get_chosen_strategy(self, target: str) -> str:
+        """Return the search strategy used for `target`."""
+        return self.chosen_strategies[target]
+
+    def get_number_of_configurations(self, target: str) -> int:
+        """Return the number of possible configurations of `target`, including the default one."""
+        return self.numbers_of_configurations[target]
+
+    def get_fraction_of_space_covered(self, target: str) -> float:
+        """Return the fraction of all configurations of `target` that was explored."""
+        return self.fractions_of_space_covered[target]
+
+    def get_run_stats(self) -> Dict:
+        """Return the time spent in each phase and counters of the work done for all targets, see RunStats.get_stats()."""
+        return self.run_stats.get_stats()
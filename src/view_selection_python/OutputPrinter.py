@@ -1,51 +1,41 @@
-from typing import Dict, List, Deque
+from typing import Dict, List, Tuple
+
 from tabulate import tabulate
-from .CLI import CLI
+from .ConfigurationResults import ConfigurationResults
+from .ParetoFrontier import ParetoFrontier
 
 
 class OutputPrinter:
-    def __init__(self, results: Deque):
+    def __init__(self, results: ConfigurationResults | ParetoFrontier, top_x: int = 10):
         """
-        Initializes the OutputPrinter with sorted results and calculates the default cost.
+        Initializes the OutputPrinter with the results and calculates the default cost.
 
         Args:
-            results (Deque): A deque of dictionaries containing configuration results.
+            results (ConfigurationResults | ParetoFrontier): The estimated costs of the evaluated
+                configurations.
+            top_x (int): The number of configurations print_output() prints.
         """
-        self.results_sorted = self._get_sorted_results(results)
+        self.results = results
+        self.top_x = top_x
         self.default_cost = self._get_default_cost()
 
-    @staticmethod
-    def _get_sorted_results(unsorted_results: Deque) -> List[Dict]:
+    def _get_default_cost(self) -> float:
         """
-        Sorts the results by the total configuration cost.
+        Retrieves the default cost from the results.
 
-        Args:
-            unsorted_results (Deque): A deque of unsorted result. Has a 'config' and a
-                                      'total_config_cost' key
+        The default configuration contains no materialized models.
 
         Returns:
-            List[Dict]: A sorted list of dictionaries by 'total_config_cost'.
+            float: The default total configuration cost.
         """
-        return sorted(unsorted_results, key=lambda x: x['total_config_cost'])
+        return self.results.get_default_cost()
 
-    def _get_default_cost(self) -> int:
-        """
-        Retrieves the default cost from the sorted results.
-
-        The default cost is determined by finding the first result where the 'config' key is None,
-        since the default configuration contains no materialized models.
-
-        Returns:
-            int: The default total configuration cost.
-        """
-        return next(result['total_config_cost'] for result in self.results_sorted if result['config'] is None)
-
-    def _calc_diff_with_default(self, config_cost: int) -> float:
+    def _calc_diff_with_default(self, config_cost: float) -> float:
         """
         Calculates the percentage difference between a given configuration cost and the default cost.
 
         Args:
-            config_cost (int): The total configuration cost to compare with the default cost.
+            config_cost (float): The total configuration cost to compare with the default cost.
 
         Returns:
             float: The percentage difference, rounded to three decimal places.
@@ -53,7 +43,7 @@ class OutputPrinter:
         percentage_diff = ((config_cost / self.default_cost) - 1) * 100
         return round(percentage_diff, 3)
 
-    def _format_difference_cell(self, config_cost: int) -> str:
+    def _format_difference_cell(self, config_cost: float) -> str:
         """
         Formats the percentage difference between a given configuration cost and the default cost.
 
@@ -61,7 +51,7 @@ class OutputPrinter:
         A negative difference already contains a '-' automatically.
 
         Args:
-            config_cost (int): The total configuration cost to compare with the default cost.
+            config_cost (float): The total configuration cost to compare with the default cost.
 
         Returns:
             str: A string representing the formatted percentage difference.
@@ -85,38 +75,147 @@ class OutputPrinter:
         """
         return config if config else 'None'
 
-    @staticmethod
-    def _get_number_of_configs_to_print() -> int:
+    def _get_table_data(self) -> List[Tuple[str, str]]:
         """
-        Retrieves the number of configurations to display from the command-line interface.
+        Formats the top configurations and their percentage difference from the default cost.
 
-        This method initializes a CLI instance and fetches the number of top configurations
-        that the user wants to display.
+        Model ids are only looked up for these configurations.
 
         Returns:
-            int: The number of configurations to print.
+            List[Tuple[str, str]]: The formatted configuration and difference of each top configuration.
         """
-        cli = CLI()
-        return cli.get_top_x()
+        return [
+            (self._format_config_col(self.results.get_config(row)), self._format_difference_cell(row['total_cost']))
+            for row in self.results.get_top_rows(self.top_x)
+        ]
 
     def print_output(self):
         """
         Prints a table of configurations and their percentage difference from the default cost.
 
-        This method retrieves the number of configurations to display, formats the data accordingly,
-        and then prints the table with two columns: 'Config' and '% Difference with default'.
+        This method formats the data of the configurations to display, and then prints the table with two columns: 'Config' and '% Difference with default'.
 
         The table only includes the top configurations as specified by the user.
 
         """
-        # Get number of configs to print
-        top_x = self._get_number_of_configs_to_print()
-
         # Extracting data for the table
-        table_data = [
-            (self._format_config_col(result['config']), self._format_difference_cell(result['total_config_cost']))
-            for result in self.results_sorted[:top_x]
-        ]
+        table_data = self._get_table_data()
 
         # Printing the table
         print(tabulate(table_data, headers=['Config', '% Difference with default'], tablefmt='pretty'))
+
+    @staticmethod
+    def print_comparison(output_printers: Dict[str, "OutputPrinter"]):
+        """
+        Prints the top configurations of several targets side by side.
+
+        Row i shows the i-th best configuration of each target, with its percentage difference from
+        the default cost of that target.
+
+        Args:
+            output_printers (Dict[str, OutputPrinter]): An OutputPrinter for the results of each target.
+        """
+        columns = [
+            [f"{config} ({difference})" for config, difference in output_printer._get_table_data()]
+            for output_printer in output_printers.values()
+        ]
+        n_rows = max(len(column) for column in columns)
+
+        table_data = [
+            [rank + 1] + [column[rank] if rank < len(column) else '' for column in columns]
+            for rank in range(n_rows)
+        ]
+
+        print(tabulate(table_data, headers=['Rank', *output_printers], tablefmt='pretty'))
+
+    def print_pareto_frontier(self, storage_space_left: float):
+        """
+        Prints a table of all configurations on the Pareto frontier, by ascending storage cost.
+
+        Along the frontier, every configuration needs more storage but has a lower total cost
+        than the previous one. The best configuration for a storage budget is therefore the last
+        one in the table with a storage cost below that budget. The last column shows whether a
+        configuration fits in the storage space that is currently left.
+
+        Args:
+            storage_space_left (float): The storage space left in the DB.
+        """
+        table_data = [
+            (
+                self._format_config_col(config),
+                round(storage_cost, 3),
+                self._format_difference_cell(total_cost),
+                'Yes' if storage_cost < storage_space_left else 'No',
+            )
+            for config, total_cost, storage_cost in self.results.get_points()
+        ]
+
+        print(tabulate(
+            table_data,
+            headers=['Config', 'Storage cost', '% Difference with default', 'Fits in storage left'],
+            tablefmt='pretty'
+        ))
+
+    def print_sensitivity(self, sensitivity_rows: List[Tuple[Tuple[str] | None, float, float, float]]):
+        """
+        Prints a table of the configurations that stay in the top x most often if the fudge factors are off.
+
+        The columns show the % difference with the default cost using the original fudge factors,
+        and the percentage of the perturbed fudge factor tables with which the configuration was in
+        the top x, and with which it was the best configuration.
+
+        Args:
+            sensitivity_rows (List[Tuple[Tuple[str] | None, float, float, float]]): The configurations,
+                their total cost, and the fractions of the samples in which they were in the top x
+                and the best, as returned by ViewSelectionAdvisor.analyze_sensitivity().
+        """
+        table_data = [
+            (
+                self._format_config_col(config),
+                self._format_difference_cell(total_cost),
+                f"{fraction_in_top_x:.1%}",
+                f"{fraction_best:.1%}",
+            )
+            for config, total_cost, fraction_in_top_x, fraction_best in sensitivity_rows[:self.top_x]
+        ]
+
+        print(tabulate(
+            table_data,
+            headers=['Config', '% Difference with default', f'In top {self.top_x}', 'Best'],
+            tablefmt='pretty'
+        ))
+
+    @staticmethod
+    def print_calibration_report(report: Dict):
+        """
+        Prints how well the calibrated costs predict the build times of the models in the run history.
+
+        The first table shows the size and quality of the fit and its coefficients, per GB for the
+        stored and processed bytes. The second table shows the models whose build time is predicted
+        worst.
+
+        Args:
+            report (Dict): The fit report, as returned by ViewSelectionAdvisor.get_calibration_report().
+        """
+        coefficients = report['coefficients']
+        median_relative_error = report['median_relative_error']
+        print(tabulate(
+            [
+                ('Models fitted', f"{report['n_models']} ({report['n_runs']} runs)"),
+                ('R²', f"{report['r_squared']:.3f}"),
+                ('RMSE', f"{report['rmse_seconds']:.2f} s"),
+                ('Median relative error', f"{median_relative_error:.1%}" if median_relative_error is not None else '-'),
+                ('Seconds per model', f"{coefficients['seconds_per_model']:.3g}"),
+                ('Seconds per GB stored', f"{coefficients['seconds_per_stored_byte'] * 1e9:.3g}"),
+                ('Seconds per GB processed', f"{coefficients['seconds_per_processed_byte'] * 1e9:.3g}"),
+            ],
+            tablefmt='pretty'
+        ))
+        print(tabulate(
+            [
+                (model, f"{observed:.2f}", f"{predicted:.2f}")
+                for model, observed, predicted in report['worst_predicted_models']
+            ],
+            headers=['Worst predicted model', 'Observed (s)', 'Predicted (s)'],
+            tablefmt='pretty'
+        ))
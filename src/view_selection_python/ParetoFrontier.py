@@ -0,0 +1,103 @@
+"""ParetoFrontier class."""
+
+from bisect import bisect_left
+from typing import Iterator, List, Tuple
+
+
+class ParetoFrontier:
+    """This class keeps the configurations that are not dominated in cost and storage.
+
+    A configuration dominates another one if it has a lower or equal total cost and a
+    lower or equal storage cost. The frontier (or skyline) is stored as lists sorted
+    by ascending storage cost, so the total cost is strictly descending along them.
+    A new configuration is placed using binary search, after which the configurations
+    it dominates are exactly the ones directly following it. Memory is proportional to
+    the size of the frontier, not to the number of evaluated configurations.
+
+    The best configuration for a storage budget is the last one on the frontier that
+    fits in it, so any budget can be answered after a single search.
+    """
+
+    def __init__(self, model_ids: List[str]):
+        """Initialize ParetoFrontier class.
+
+        `model_ids` maps a model index to its model id.
+        """
+        self.model_ids = model_ids
+        self.storage_costs = []
+        self.total_costs = []
+        self.configs = []
+        self.default_cost = None
+
+    def __len__(self) -> int:
+        """Return the number of configurations on the frontier."""
+        return len(self.configs)
+
+    def append(
+        self, config: None | Tuple[int], total_cost: float, storage_cost: float
+    ):
+        """Add a configuration, given as a tuple of model indices, if it's not dominated."""
+        if config is None:
+            self.default_cost = total_cost
+
+        position = bisect_left(self.storage_costs, storage_cost)
+
+        # A configuration with less storage and a lower or equal cost dominates it
+        if position > 0 and self.total_costs[position - 1] <= total_cost:
+            return
+
+        # So does a configuration with equal storage and a lower or equal cost
+        if (
+            position < len(self.storage_costs)
+            and self.storage_costs[position] == storage_cost
+            and self.total_costs[position] <= total_cost
+        ):
+            return
+
+        # Remove the configurations that are dominated by the new one
+        end = position
+        while end < len(self.total_costs) and self.total_costs[end] >= total_cost:
+            end += 1
+        del self.storage_costs[position:end]
+        del self.total_costs[position:end]
+        del self.configs[position:end]
+
+        self.storage_costs.insert(position, storage_cost)
+        self.total_costs.insert(position, total_cost)
+        self.configs.insert(position, config)
+
+    def get_default_cost(self) -> float:
+        """Return the total cost of the default configuration."""
+        return self.default_cost
+
+    def get_config(self, position: int) -> None | Tuple[str]:
+        """Return the model ids of the configuration at `position` on the frontier."""
+        config = self.configs[position]
+        if config is None:
+            return None
+        return tuple(self.model_ids[index] for index in config)
+
+    def get_points(self) -> Iterator[Tuple[None | Tuple[str], float, float]]:
+        """Yield (config, total cost, storage cost) along the frontier, by ascending storage cost."""
+        for position in range(len(self.configs)):
+            yield (
+                self.get_config(position),
+                self.total_costs[position],
+                self.storage_costs[position],
+            )
+
+    def get_best_within(
+        self, storage_budget: float
+    ) -> None | Tuple[None | Tuple[str], float, float]:
+        """Return the (config, total cost, storage cost) with the lowest cost that fits in `storage_budget`.
+
+        Returns None if no configuration fits.
+        """
+        position = bisect_left(self.storage_costs, storage_budget)
+        if position == 0:
+            return None
+        return (
+            self.get_config(position - 1),
+            self.total_costs[position - 1],
+            self.storage_costs[position - 1],
+        )
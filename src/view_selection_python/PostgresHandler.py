@@ -1,11 +1,20 @@
 """PostgresHanlder class."""
 
-from typing import Dict, List, Tuple
+import time
+from contextlib import contextmanager
+from fnmatch import fnmatchcase
+from functools import partial
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, List, Tuple, TypeVar
 
-import psycopg2
-from .Exceptions.errors import NOT_ALL_TABLES_IN_VST_SCHEMA_ERROR
-from psycopg2.extensions import connection, cursor
-from ruamel.yaml.comments import CommentedMap
+from .AdaptiveLimiter import AdaptiveLimiter
+from .CostEstimatorSinglePlan import estimate_costs_from_plan_text
+from .DbBackend import DbBackend
+from .Exceptions.errors import EXPLAIN_TIMEOUT_ERROR, NOT_ALL_TABLES_IN_VST_SCHEMA_ERROR
+
+# psycopg2 is imported when the first connection is opened, so that the CLI, which
+# imports PLANNING_PROFILES, and sessions without a DB do not import it
+if TYPE_CHECKING:
+    from psycopg2.extensions import connection, cursor
 
 REQUIRED_TABLES = [
     "avg_maintenance_fractions",
@@ -14,33 +23,148 @@ REQUIRED_TABLES = [
     "model_dependencies",
 ]
 
+# The tables that are still read from the DB when the models come from manifest.json
+REQUIRED_TABLES_WITH_MANIFEST = ["avg_maintenance_fractions"]
+
+# Planner settings applied with `SET LOCAL` before running EXPLAIN, ordered from most
+# to least planning effort. If planning a model exceeds the time budget under one
+# profile, the next (cheaper) profile is tried.
+PLANNING_PROFILES = {
+    "default": {},
+    "reduced": {
+        "join_collapse_limit": 4,
+        "from_collapse_limit": 4,
+        "geqo_threshold": 6,
+    },
+    "minimal": {
+        "join_collapse_limit": 1,
+        "from_collapse_limit": 1,
+        "geqo_threshold": 2,
+    },
+}
+
+
+# The connections of the tool identify themselves with this name, so they can be told
+# apart from the queries of other clients in pg_stat_activity
+APPLICATION_NAME = "view_selection_tool"
+
+# Number of EXPLAINs that may run at once when the DB is idle
+DEFAULT_MAX_CONCURRENT_EXPLAINS = 8
+
+# Number of seconds between two checks of the load of the DB in pg_stat_activity
+DB_LOAD_CHECK_INTERVAL = 1
+
+# Runs EXPLAIN of a query in the DB, and returns the storage cost and creation cost of
+# its plan (see CostEstimatorSinglePlan) instead of the plan itself. The function is
+# temporary, so it disappears with the transaction that creates it. The nodes of the
+# plan are the objects with "Plan Rows", found at any depth with jsonpath (Postgres 12
+# or later). Strict mode keeps lax mode from visiting nodes in arrays twice.
+PLAN_COSTS_FUNCTION = """
+CREATE FUNCTION pg_temp.vst_plan_costs(
+    query text, OUT storage_cost float8, OUT creation_cost float8
+) LANGUAGE plpgsql AS $$
+DECLARE
+    query_plan jsonb;
+BEGIN
+    EXECUTE 'EXPLAIN (FORMAT JSON) ' || query INTO query_plan;
+    storage_cost := (query_plan #>> '{0,Plan,Plan Rows}')::float8
+        * (query_plan #>> '{0,Plan,Plan Width}')::float8;
+    SELECT sum((node ->> 'Plan Rows')::float8 * (node ->> 'Plan Width')::float8)
+    INTO creation_cost
+    FROM jsonb_path_query(
+        query_plan, 'strict $.** ? (exists (@."Plan Rows"))'
+    ) AS node;
+END
+$$;
+"""
+
+# Number of bytes the DB returns for the two costs of a plan
+PLAN_COSTS_BYTES = 16
+
+T = TypeVar("T")
+
+
+def _get_planning_profiles_from(planning_profile: str) -> List[str]:
+    """Return `planning_profile` followed by all cheaper planning profiles."""
+    profile_names = list(PLANNING_PROFILES.keys())
+    return profile_names[profile_names.index(planning_profile):]
+
 
-class PostgresHandler:
+class PostgresHandler(DbBackend):
     """This class handles all queries that need to be run against the postgres DB."""
 
-    def __init__(self, db_creds: CommentedMap):
-        """Initialize the class variables."""
+    def __init__(
+        self,
+        db_creds: Dict,
+        planning_profile: str = "default",
+        explain_timeout: float = 30,
+        required_tables: List[str] = REQUIRED_TABLES,
+        max_concurrent_explains: int = DEFAULT_MAX_CONCURRENT_EXPLAINS,
+        max_db_load: int | None = None,
+        model_explain_timeouts: Dict[str, float] | None = None,
+        elementary_schema: str | None = None,
+        reduce_plans_in_db: bool = True,
+    ):
+        """Initialize the class variables.
+
+        `planning_profile` is the first profile from PLANNING_PROFILES used for
+        EXPLAIN, and `explain_timeout` the number of seconds a single EXPLAIN may take
+        before falling back to the next profile (0 disables the time budget).
+        `model_explain_timeouts` overrides the time budget for the models matching a
+        pattern, e.g. {"model.my_project.big_*": 120}, the first match is used. The
+        `required_tables` must be present in the VST schema.
+
+        get_output_explains() runs at most `max_concurrent_explains` EXPLAINs at once,
+        fewer while the DB is busy, see AdaptiveLimiter. With `max_db_load`, it also
+        backs off while at least that many queries of other clients are active in the
+        DB, according to pg_stat_activity.
+
+        `elementary_schema` is the schema of the Elementary tables, which
+        get_model_execution_times() reads the run history from.
+
+        get_plan_costs() reduces the query plans to their costs in the DB if
+        `reduce_plans_in_db`, and as long as the DB supports it.
+        """
         self.db_host = db_creds["host"]
         self.db_port = db_creds["port"]
         self.db_name = db_creds["dbname"]
         self.db_user = db_creds["user"]
-        self.db_password = db_creds.get(["password"], db_creds['pass'])
+        self.db_password = db_creds.get("password", db_creds.get("pass"))
         self.db_schema = db_creds["schema"]
-        self.conn: None | connection = None
-        self.cursor: None | cursor = None
+        self.conn: "None | connection" = None
+        self.cursor: "None | cursor" = None
+        self.planning_profiles = _get_planning_profiles_from(planning_profile)
+        self.explain_timeout = explain_timeout
+        self.planning_profiles_used: Dict[str, str] = {}
+        self.required_tables = required_tables
+        self.model_explain_timeouts = model_explain_timeouts or {}
+        self.max_concurrent_explains = max_concurrent_explains
+        self.max_db_load = max_db_load
+        self.elementary_schema = elementary_schema
+        self.reduce_plans_in_db = reduce_plans_in_db
+        # The limit that was learned is kept for the next batch of EXPLAINs
+        self.explain_limiter = AdaptiveLimiter(
+            max_limit=max_concurrent_explains, max_db_load=max_db_load
+        )
 
         self._check_if_necessary_tables_present()
 
-    def _open_connection(self):
-        """Open the connection to the DB."""
-        self.conn = psycopg2.connect(
+    def _connect(self) -> "connection":
+        """Return a new connection to the DB."""
+        import psycopg2
+
+        return psycopg2.connect(
             host=self.db_host,
             port=self.db_port,
             dbname=self.db_name,
             user=self.db_user,
             password=self.db_password,
+            application_name=APPLICATION_NAME,
         )
 
+    def _open_connection(self):
+        """Open the connection to the DB."""
+        self.conn = self._connect()
         self.cursor = self.conn.cursor()
 
     def _close_connection(self):
@@ -48,6 +172,11 @@ class PostgresHandler:
         self.cursor.close()
         self.conn.close()
 
+    def close(self):
+        """Close the connection to the DB, if a query left it open."""
+        if self.conn is not None and not self.conn.closed:
+            self._close_connection()
+
     def _get_tables_present_vst_schema(self) -> List[str]:
         """Retrieve a list of all tables in the view_selection_tool schema."""
         self._open_connection()
@@ -72,7 +201,7 @@ class PostgresHandler:
 
         missing_tables = [
             required_table
-            for required_table in REQUIRED_TABLES
+            for required_table in self.required_tables
             if required_table not in present_tables
         ]
 
@@ -125,8 +254,369 @@ class PostgresHandler:
         bytes_left = self._execute_query(query)[0][0]
         return bytes_left
 
-    def get_output_explain(self, query_to_explain: str) -> List[Dict]:
-        """Execute the EXPLAIN statement and return the query plan in JSON format."""
-        explain_query = f"EXPLAIN (FORMAT JSON) {query_to_explain}"
-        query_plan = self._execute_query(explain_query)[0][0]
-        return query_plan
+    def get_model_execution_times(self) -> List[Tuple[str, str, float, int]]:
+        """Return the median execution time of every model in Elementary's run history.
+
+        Returns (model id, materialization, median seconds, number of runs), only
+        counting the successful runs with the materialization of the latest run of a
+        model, as the build time of a model depends on its materialization.
+        """
+        query = (
+            "WITH runs AS ("
+            + "SELECT unique_id, materialization, execution_time, "
+            + "first_value(materialization) OVER ("
+            + "PARTITION BY unique_id ORDER BY generated_at DESC"
+            + ") AS latest_materialization "
+            + f"FROM {self.elementary_schema}.dbt_run_results "
+            + "WHERE resource_type = 'model' AND status = 'success' "
+            + "AND execution_time IS NOT NULL) "
+            + "SELECT unique_id, materialization, "
+            + "percentile_cont(0.5) WITHIN GROUP (ORDER BY execution_time), count(*) "
+            + "FROM runs "
+            + "WHERE materialization = latest_materialization "
+            + "GROUP BY unique_id, materialization;"
+        )
+        return self._execute_query(query)
+
+    def _get_db_load(self) -> int:
+        """Return the number of queries of other clients that are active in the DB."""
+        query = (
+            "SELECT count(*) "
+            + "FROM pg_stat_activity "
+            + "WHERE state = 'active' "
+            + "AND datname = current_database() "
+            + "AND pid <> pg_backend_pid() "
+            + f"AND application_name <> '{APPLICATION_NAME}';"
+        )
+        return self._execute_query(query)[0][0]
+
+    def _get_explain_timeout(self, model_id: str | None) -> float:
+        """Return the number of seconds a single EXPLAIN of `model_id` may take."""
+        if model_id is not None:
+            for pattern, timeout in self.model_explain_timeouts.items():
+                if fnmatchcase(model_id, pattern):
+                    return timeout
+        return self.explain_timeout
+
+    def _set_local_planner_settings(
+        self, cursor: "cursor", profile_name: str, statement_timeout: float
+    ):
+        """Apply the settings of a planning profile to the current transaction of `cursor`.
+
+        Settings that the profile does not specify are reset to their default, so
+        profiles can be switched within one transaction.
+        """
+        all_settings = {
+            setting for profile in PLANNING_PROFILES.values() for setting in profile
+        }
+        profile = PLANNING_PROFILES[profile_name]
+
+        for setting in sorted(all_settings):
+            value = profile.get(setting, "DEFAULT")
+            cursor.execute(f"SET LOCAL {setting} = {value};")
+
+        cursor.execute(
+            f"SET LOCAL statement_timeout = {int(statement_timeout * 1000)};"
+        )
+
+    def _explain_with_profile(
+        self,
+        run_explain: Callable[["cursor"], T],
+        profile_name: str,
+        statement_timeout: float,
+    ) -> T:
+        """Run EXPLAIN with `run_explain` inside a transaction using a planning profile.
+
+        The transaction is always rolled back, so the `SET LOCAL` settings never
+        outlive the EXPLAIN. Raises QueryCanceled if the time budget is exceeded. The
+        EXPLAIN gets a connection of its own, so several can run concurrently.
+        """
+        conn = self._connect()
+
+        try:
+            with conn.cursor() as cursor:
+                self._set_local_planner_settings(
+                    cursor, profile_name, statement_timeout
+                )
+                return run_explain(cursor)
+        finally:
+            conn.rollback()
+            conn.close()
+
+    def _explain_with_planning_profiles(
+        self, run_explain: Callable[["cursor"], T], model_id: str | None
+    ) -> T:
+        """Run EXPLAIN with `run_explain`, trying the planning profiles from most to least expensive.
+
+        The first profile that finishes within the time budget of `model_id` is
+        recorded for `model_id`, see get_planning_profiles_used().
+        """
+        from psycopg2.errors import QueryCanceled
+
+        explain_timeout = self._get_explain_timeout(model_id)
+
+        for profile_name in self.planning_profiles:
+            try:
+                result = self._explain_with_profile(
+                    run_explain, profile_name, explain_timeout
+                )
+            except QueryCanceled:
+                continue
+
+            if model_id is not None:
+                self.planning_profiles_used[model_id] = profile_name
+            return result
+
+        raise RuntimeError(
+            EXPLAIN_TIMEOUT_ERROR.format(
+                model_id=model_id,
+                timeout=explain_timeout,
+                profiles=", ".join(self.planning_profiles),
+            )
+        )
+
+    @staticmethod
+    def _fetch_query_plan(cursor: "cursor", query_to_explain: str) -> List[Dict]:
+        """Run EXPLAIN of `query_to_explain`, and return the query plan in JSON format."""
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {query_to_explain}")
+        return cursor.fetchall()[0][0]
+
+    @staticmethod
+    def _fetch_plan_costs_in_db(
+        cursor: "cursor", query_to_explain: str
+    ) -> Tuple[Tuple[float, float], int]:
+        """Run EXPLAIN of `query_to_explain`, and reduce the plan to its costs in the DB.
+
+        The function is created and called in a single round trip.
+
+        Returns:
+            Tuple[Tuple[float, float], int]: The storage and creation cost, and the
+            number of bytes received.
+        """
+        cursor.execute(
+            PLAN_COSTS_FUNCTION
+            + "SELECT storage_cost, creation_cost FROM pg_temp.vst_plan_costs(%s);",
+            (query_to_explain,),
+        )
+        storage_cost, creation_cost = cursor.fetchone()
+        return (storage_cost, creation_cost), PLAN_COSTS_BYTES
+
+    @staticmethod
+    def _fetch_plan_costs_from_text(
+        cursor: "cursor", query_to_explain: str
+    ) -> Tuple[Tuple[float, float], int]:
+        """Run EXPLAIN of `query_to_explain`, and scan the costs from the JSON text of the plan.
+
+        The plan is received as text, as psycopg2 would decode it into dicts, see
+        estimate_costs_from_plan_text().
+
+        Returns:
+            Tuple[Tuple[float, float], int]: The storage and creation cost, and the
+            number of bytes received.
+        """
+        from psycopg2.extras import register_default_json
+
+        register_default_json(cursor, loads=str)
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {query_to_explain}")
+        query_plan_text = cursor.fetchall()[0][0]
+        return estimate_costs_from_plan_text(query_plan_text), len(query_plan_text)
+
+    def get_output_explain(
+        self, query_to_explain: str, model_id: str | None = None
+    ) -> List[Dict]:
+        """Execute the EXPLAIN statement and return the query plan in JSON format.
+
+        The planning profiles are tried from most to least expensive until one
+        finishes within the time budget of `model_id`. The profile that was used is
+        recorded for `model_id`, see get_planning_profiles_used().
+        """
+        return self._explain_with_planning_profiles(
+            partial(self._fetch_query_plan, query_to_explain=query_to_explain),
+            model_id,
+        )
+
+    def get_plan_costs_of_query(
+        self, query_to_explain: str, model_id: str | None = None
+    ) -> Tuple[Tuple[float, float], int]:
+        """Run EXPLAIN, and return the storage and creation cost of the query plan.
+
+        The plan is reduced to its costs in the DB if `reduce_plans_in_db`. If the DB
+        does not support that (Postgres 11 or older, no privilege to create temporary
+        objects, or a read-only replica), the costs are scanned from the text of the
+        whole plan instead, for this and all later queries. The planning profiles are
+        tried as in get_output_explain().
+
+        Returns:
+            Tuple[Tuple[float, float], int]: The storage and creation cost, and the
+            number of bytes received.
+        """
+        from psycopg2.errors import (
+            FeatureNotSupported,
+            InsufficientPrivilege,
+            ReadOnlySqlTransaction,
+            UndefinedFunction,
+        )
+
+        if self.reduce_plans_in_db:
+            try:
+                return self._explain_with_planning_profiles(
+                    partial(
+                        self._fetch_plan_costs_in_db, query_to_explain=query_to_explain
+                    ),
+                    model_id,
+                )
+            except (
+                FeatureNotSupported,
+                InsufficientPrivilege,
+                ReadOnlySqlTransaction,
+                UndefinedFunction,
+            ):
+                self.reduce_plans_in_db = False
+
+        return self._explain_with_planning_profiles(
+            partial(
+                self._fetch_plan_costs_from_text, query_to_explain=query_to_explain
+            ),
+            model_id,
+        )
+
+    def _run_timed_explain(
+        self,
+        explain: Callable[[str, str], T],
+        query_to_explain: str,
+        model_id: str,
+    ) -> Tuple[T, float, bool]:
+        """Return the result of `explain` for `query_to_explain`, the seconds it took, and whether a cheaper profile was needed."""
+        start = time.perf_counter()
+        result = explain(query_to_explain, model_id)
+        timed_out = self.planning_profiles_used[model_id] != self.planning_profiles[0]
+        return result, time.perf_counter() - start, timed_out
+
+    def _run_explains_concurrently(
+        self,
+        explain: Callable[[str, str], T],
+        queries_to_explain: List[Tuple[str, str]],
+    ) -> Iterator[Tuple[str, T, float]]:
+        """Run `explain` for every (model id, query), concurrently, and yield (model id, result, seconds).
+
+        The results are yielded as soon as they are available, not necessarily in the
+        order of `queries_to_explain`. The number of concurrent EXPLAINs is adapted to
+        the load of the DB by the AdaptiveLimiter: it grows while the latency stays
+        stable and shrinks when EXPLAINs slow down, time out (and need a cheaper
+        planning profile), or, with `max_db_load`, when other clients keep the DB busy.
+        As the larger models take longer to plan, the latency is measured per kilobyte
+        of SQL.
+        """
+        # Only imported here, it takes a while and the CLI imports this module
+        from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+        queries_to_explain = list(queries_to_explain)
+        n_submitted = 0
+        running = {}
+        next_load_check = time.monotonic()
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrent_explains) as pool:
+            while n_submitted < len(queries_to_explain) or running:
+                if self.max_db_load is not None and time.monotonic() >= next_load_check:
+                    self.explain_limiter.set_db_load(self._get_db_load())
+                    next_load_check = time.monotonic() + DB_LOAD_CHECK_INTERVAL
+
+                while (
+                    n_submitted < len(queries_to_explain)
+                    and len(running) < self.explain_limiter.get_limit()
+                ):
+                    model_id, query_to_explain = queries_to_explain[n_submitted]
+                    future = pool.submit(
+                        self._run_timed_explain, explain, query_to_explain, model_id
+                    )
+                    running[future] = (model_id, len(query_to_explain))
+                    n_submitted += 1
+
+                done, _ = wait(
+                    running,
+                    timeout=DB_LOAD_CHECK_INTERVAL if self.max_db_load else None,
+                    return_when=FIRST_COMPLETED,
+                )
+                for future in done:
+                    model_id, query_length = running.pop(future)
+                    result, seconds, timed_out = future.result()
+                    if timed_out:
+                        self.explain_limiter.add_timeout()
+                    else:
+                        self.explain_limiter.add_latency(
+                            seconds / max(query_length / 1000, 1)
+                        )
+                    yield model_id, result, seconds
+
+    def get_output_explains(
+        self, queries_to_explain: List[Tuple[str, str]]
+    ) -> Iterator[Tuple[str, List[Dict], float]]:
+        """Run EXPLAIN for every (model id, query), concurrently, and yield (model id, query plan, seconds).
+
+        See _run_explains_concurrently() for the order of the results and how many
+        EXPLAINs run at once.
+        """
+        return self._run_explains_concurrently(
+            self.get_output_explain, queries_to_explain
+        )
+
+    def get_plan_costs(
+        self, queries_to_explain: List[Tuple[str, str]]
+    ) -> Iterator[Tuple[str, Tuple[float, float], float, int]]:
+        """Run EXPLAIN for every (model id, query), concurrently, and yield (model id, (storage cost, creation cost), seconds, bytes received).
+
+        Only the costs of the query plans are received, see get_plan_costs_of_query().
+        See _run_explains_concurrently() for the order of the results and how many
+        EXPLAINs run at once.
+        """
+        for model_id, (costs, n_bytes), seconds in self._run_explains_concurrently(
+            self.get_plan_costs_of_query, queries_to_explain
+        ):
+            yield model_id, costs, seconds, n_bytes
+
+    def get_planning_profiles_used(self) -> Dict[str, str]:
+        """Return the planning profile used for each explained model."""
+        return self.planning_profiles_used
+
+    @contextmanager
+    def rolled_back_transaction(self) -> Iterator[None]:
+        """Keep a single connection open whose transaction is always rolled back.
+
+        Everything created in the meantime (e.g. using create_stub_relation()) is
+        discarded afterwards, which leaves the DB untouched.
+        """
+        self._open_connection()
+        try:
+            yield
+        finally:
+            self.conn.rollback()
+            self._close_connection()
+
+    def create_stub_relation(self, stub_name: str, query: str, n_rows: float):
+        """Create a stub relation that behaves like `query` materialized as a table.
+
+        The stub is a temporary, empty table with the columns of `query`, wrapped in
+        a set returning function that tells the planner it returns `n_rows` rows. It
+        can be referenced as `pg_temp.{stub_name}()`. Only use this inside
+        rolled_back_transaction().
+        """
+        self.cursor.execute(
+            f"CREATE TEMPORARY TABLE {stub_name}_table AS {query} WITH NO DATA;"
+        )
+        self.cursor.execute(
+            f"CREATE FUNCTION pg_temp.{stub_name}() "
+            + f"RETURNS SETOF pg_temp.{stub_name}_table "
+            + f"LANGUAGE plpgsql ROWS {max(int(n_rows), 1)} "
+            + f"AS $$ BEGIN RETURN QUERY SELECT * FROM pg_temp.{stub_name}_table; END $$;"
+        )
+
+    def get_output_explain_in_transaction(
+        self, query_to_explain: str, profile_name: str = "default"
+    ) -> List[Dict]:
+        """Return the query plan of `query_to_explain` in JSON format.
+
+        Unlike get_output_explain(), this uses the connection opened by
+        rolled_back_transaction(), so the stub relations created in it are visible.
+        """
+        self._set_local_planner_settings(self.cursor, profile_name, statement_timeout=0)
+        return self._fetch_query_plan(self.cursor, query_to_explain)
@@ -1,17 +1,5 @@
 from .YamlScraper import YamlScraper
-from ruamel.yaml.comments import CommentedMap
-from .CLI import CLI
-
-
-def _get_cli_specified_target() -> str | None:
-    """
-    Retrieves the target specified via the command-line interface (CLI).
-
-    Returns:
-        str | None: The target specified by the CLI, or None if no target is specified.
-    """
-    cli = CLI()
-    return cli.get_target()
+from typing import Dict
 
 
 class ProfilesScraper(YamlScraper):
@@ -19,35 +7,37 @@ class ProfilesScraper(YamlScraper):
     A class to scrape and process profile.yml files.
     """
 
-    def __init__(self, filepath: str, profile_name: str):
+    def __init__(self, filepath: str, profile_name: str, target: str | None = None):
         """
         Initializes a ProfilesScraper instance with the provided filepath and profile name.
 
         Args:
             filepath (str): The path to the profiles YAML file.
             profile_name (str): The name of the profile to be processed.
+            target (str | None): The target to use, e.g. as specified through the CLI. If None,
+                the target of the profile is used.
         """
         super().__init__(filepath)
         self.profile_name = profile_name
         self.profile_content = self._get_profile_content()
         self.profile_outputs = self._get_profile_outputs()
-        self.cli_specified_target = _get_cli_specified_target()
+        self.specified_target = target
 
-    def _get_profile_content(self) -> CommentedMap:
+    def _get_profile_content(self) -> Dict:
         """
         Retrieves the content of the specified profile from the YAML file.
 
         Returns:
-            CommentedMap: The content of the specified profile.
+            Dict: The content of the specified profile.
         """
         return self.contents[self.profile_name]
 
-    def _get_profile_outputs(self) -> CommentedMap:
+    def _get_profile_outputs(self) -> Dict:
         """
         Retrieves the outputs section of the specified profile.
 
         Returns:
-            CommentedMap: The outputs section of the specified profile.
+            Dict: The outputs section of the specified profile.
         """
         return self._get_profile_content()['outputs']
 
@@ -58,12 +48,12 @@ class ProfilesScraper(YamlScraper):
         Returns:
             str: The determined target.
         """
-        # Check if the user manually specified a target through the CLI
-        if self.cli_specified_target:
-            return self.cli_specified_target
+        # Check if the user manually specified a target
+        if self.specified_target:
+            return self.specified_target
 
         # Check if a target is specified in profiles.yml
-        specified_target = self.profile_content.get('target', None)
+        specified_target = self._replace_env_vars(self.profile_content.get('target', None))
 
         # If a target is specified, use it
         if specified_target:
@@ -74,20 +64,23 @@ class ProfilesScraper(YamlScraper):
         else:
             return list(self.profile_outputs.keys())[0]
 
-    def get_db_creds(self, schema_appendix: str) -> CommentedMap:
+    def get_db_creds(self, schema_appendix: str) -> Dict:
         """
         Retrieves the database credentials for the current profile,
         appending the given schema appendix to the schema variable.
 
+        The env vars are only replaced in the credentials of the target that is used.
+
         Args:
             schema_appendix (str): The schema appendix to append to the database schema.
 
         Returns:
-            CommentedMap: The database credentials with the schema appendix added.
+            Dict: The database credentials with the schema appendix added.
         """
         target = self._get_target()
 
-        db_creds = self.profile_outputs[target]
+        # A copy, as the contents of the file are shared with other scrapers
+        db_creds = self._replace_env_vars(self.profile_outputs[target])
 
         # append the schema appendix
         db_creds['schema'] = f"{db_creds['schema']}_{schema_appendix}"
@@ -0,0 +1,164 @@
+"""RecordingBackend class."""
+
+import json
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Tuple
+
+from .DbBackend import DbBackend
+
+RECORDING_VERSION = 1
+
+
+def get_recording_key(method: str, *args) -> str:
+    """Return the key under which the result of a call is recorded.
+
+    EXPLAIN is keyed on the query (and planning profile), so replaying finds the same
+    plan for the same rewritten code regardless of the order of the calls.
+    """
+    return json.dumps([method, *args])
+
+
+class RecordingBackend(DbBackend):
+    """Passes every query on to another backend, and records each query and its result.
+
+    Every call is appended to a JSON lines file as soon as it returns, so a run that
+    is interrupted still leaves a usable recording. The first line holds the version
+    of the format. ReplayBackend answers the same queries from the file without a DB,
+    which makes runs on production-shaped data reproducible and network-free.
+    """
+
+    def __init__(self, backend: DbBackend, filepath: str):
+        """Initialize the class, and start a new recording at `filepath`."""
+        self.backend = backend
+        self.filepath = filepath
+        self.file = open(filepath, "w")
+        self._write_line({"version": RECORDING_VERSION})
+
+    def _write_line(self, record: Dict):
+        """Append a single record to the recording."""
+        self.file.write(json.dumps(record) + "\n")
+        self.file.flush()
+
+    def _record(self, key: str, result, **extra_fields):
+        """Record the result of a call, and return it."""
+        self._write_line({"key": key, "result": result, **extra_fields})
+        return result
+
+    def close(self):
+        """Close the recording, and the backend."""
+        self.file.close()
+        self.backend.close()
+
+    def get_all_models_and_code(self) -> List[Tuple[str]]:
+        """Return all models in the DAG, together with their code."""
+        return self._record(
+            get_recording_key("get_all_models_and_code"),
+            self.backend.get_all_models_and_code(),
+        )
+
+    def get_destination_nodes(self) -> List[Tuple[str]]:
+        """Return the destination nodes of the DAG."""
+        return self._record(
+            get_recording_key("get_destination_nodes"),
+            self.backend.get_destination_nodes(),
+        )
+
+    def get_model_dependencies(self) -> List[Tuple[str]]:
+        """Return the dependencies in the DAG."""
+        return self._record(
+            get_recording_key("get_model_dependencies"),
+            self.backend.get_model_dependencies(),
+        )
+
+    def get_maintenance_fractions(self) -> List[Tuple[str]]:
+        """Return maintenance fraction for each model."""
+        return self._record(
+            get_recording_key("get_maintenance_fractions"),
+            self.backend.get_maintenance_fractions(),
+        )
+
+    def get_storage_space_left(self) -> int:
+        """Return the #bytes left in the DB at this moment in time."""
+        return self._record(
+            get_recording_key("get_storage_space_left"),
+            self.backend.get_storage_space_left(),
+        )
+
+    def get_model_execution_times(self) -> List[Tuple[str, str, float, int]]:
+        """Return the median execution time of every model in Elementary's run history."""
+        return self._record(
+            get_recording_key("get_model_execution_times"),
+            self.backend.get_model_execution_times(),
+        )
+
+    def get_output_explain(
+        self, query_to_explain: str, model_id: str | None = None
+    ) -> List[Dict]:
+        """Return the query plan of `query_to_explain`, and the planning profile used."""
+        query_plan = self.backend.get_output_explain(query_to_explain, model_id)
+        return self._record(
+            get_recording_key("get_output_explain", query_to_explain),
+            query_plan,
+            model_id=model_id,
+            planning_profile=self.backend.get_planning_profiles_used().get(model_id),
+        )
+
+    def get_output_explains(
+        self, queries_to_explain: List[Tuple[str, str]]
+    ) -> Iterator[Tuple[str, List[Dict], float]]:
+        """Run EXPLAIN for every (model id, query) in the backend, and record each result as it arrives."""
+        queries = dict(queries_to_explain)
+        for model_id, query_plan, seconds in self.backend.get_output_explains(
+            queries_to_explain
+        ):
+            self._record(
+                get_recording_key("get_output_explain", queries[model_id]),
+                query_plan,
+                model_id=model_id,
+                planning_profile=self.backend.get_planning_profiles_used().get(model_id),
+            )
+            yield model_id, query_plan, seconds
+
+    def get_plan_costs(
+        self, queries_to_explain: List[Tuple[str, str]]
+    ) -> Iterator[Tuple[str, Tuple[float, float], float, int]]:
+        """Run EXPLAIN for every (model id, query) in the backend, and record the costs of each plan as they arrive."""
+        queries = dict(queries_to_explain)
+        for model_id, costs, seconds, n_bytes in self.backend.get_plan_costs(
+            queries_to_explain
+        ):
+            self._record(
+                get_recording_key("get_plan_costs", queries[model_id]),
+                list(costs),
+                model_id=model_id,
+                planning_profile=self.backend.get_planning_profiles_used().get(model_id),
+            )
+            yield model_id, costs, seconds, n_bytes
+
+    def get_planning_profiles_used(self) -> Dict[str, str]:
+        """Return the planning profile used for each explained model."""
+        return self.backend.get_planning_profiles_used()
+
+    @contextmanager
+    def rolled_back_transaction(self) -> Iterator[None]:
+        """Keep a single transaction of the backend open, which is rolled back afterwards."""
+        with self.backend.rolled_back_transaction():
+            yield
+
+    def create_stub_relation(self, stub_name: str, query: str, n_rows: float):
+        """Create a stub relation in the backend, see PostgresHandler.create_stub_relation().
+
+        Stubs only affect the query plans recorded afterwards, so they are not recorded.
+        """
+        self.backend.create_stub_relation(stub_name, query, n_rows)
+
+    def get_output_explain_in_transaction(
+        self, query_to_explain: str, profile_name: str = "default"
+    ) -> List[Dict]:
+        """Return the query plan of `query_to_explain`, seeing the stub relations."""
+        return self._record(
+            get_recording_key(
+                "get_output_explain_in_transaction", query_to_explain, profile_name
+            ),
+            self.backend.get_output_explain_in_transaction(query_to_explain, profile_name),
+        )
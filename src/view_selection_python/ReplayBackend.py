@@ -0,0 +1,129 @@
+"""ReplayBackend class."""
+
+import json
+import time
+from typing import Dict, Iterator, List, Tuple
+
+from .CostEstimatorSinglePlan import CostEstimatorSinglePlan
+from .DbBackend import DbBackend
+from .Exceptions.errors import QUERY_NOT_RECORDED_ERROR, RECORDING_VERSION_ERROR
+from .RecordingBackend import RECORDING_VERSION, get_recording_key
+
+
+class ReplayBackend(DbBackend):
+    """Answers the queries of the tool from a recording written by RecordingBackend.
+
+    No DB is needed, so a run on the recorded data is deterministic and network-free,
+    which makes it suitable for profiling the whole pipeline. Queries that were not
+    recorded, e.g. EXPLAIN of code that changed since, raise a RuntimeError.
+    """
+
+    def __init__(self, filepath: str):
+        """Initialize the class, and read the recording at `filepath`."""
+        self.filepath = filepath
+        self.records: Dict[str, Dict] = {}
+        self.planning_profiles_used: Dict[str, str] = {}
+        self._read_recording()
+
+    def _read_recording(self):
+        """Read every record of the recording, a later record of a query replaces an earlier one."""
+        with open(self.filepath, "r") as f:
+            header = json.loads(f.readline() or "{}")
+            if header.get("version") != RECORDING_VERSION:
+                raise RuntimeError(
+                    RECORDING_VERSION_ERROR.format(
+                        filepath=self.filepath, version=header.get("version")
+                    )
+                )
+
+            for line in f:
+                record = json.loads(line)
+                self.records[record["key"]] = record
+
+    def _get_record(self, method: str, *args) -> Dict:
+        """Return the record of a call."""
+        key = get_recording_key(method, *args)
+        if key not in self.records:
+            raise RuntimeError(
+                QUERY_NOT_RECORDED_ERROR.format(method=method, filepath=self.filepath)
+            )
+        return self.records[key]
+
+    def _get_rows(self, method: str) -> List[Tuple]:
+        """Return the recorded rows of a table, as tuples like the DB returns them."""
+        return [tuple(row) for row in self._get_record(method)["result"]]
+
+    def get_all_models_and_code(self) -> List[Tuple[str]]:
+        """Return all models in the DAG, together with their code."""
+        return self._get_rows("get_all_models_and_code")
+
+    def get_destination_nodes(self) -> List[Tuple[str]]:
+        """Return the destination nodes of the DAG."""
+        return self._get_rows("get_destination_nodes")
+
+    def get_model_dependencies(self) -> List[Tuple[str]]:
+        """Return the dependencies in the DAG."""
+        return self._get_rows("get_model_dependencies")
+
+    def get_maintenance_fractions(self) -> List[Tuple[str]]:
+        """Return maintenance fraction for each model."""
+        return self._get_rows("get_maintenance_fractions")
+
+    def get_storage_space_left(self) -> int:
+        """Return the #bytes left in the DB when the recording was made."""
+        return self._get_record("get_storage_space_left")["result"]
+
+    def get_model_execution_times(self) -> List[Tuple[str, str, float, int]]:
+        """Return the median execution time of every model in the recorded run history."""
+        return self._get_rows("get_model_execution_times")
+
+    def get_output_explain(
+        self, query_to_explain: str, model_id: str | None = None
+    ) -> List[Dict]:
+        """Return the recorded query plan, and the planning profile recorded with it."""
+        record = self._get_record("get_output_explain", query_to_explain)
+        if model_id is not None and record.get("planning_profile") is not None:
+            self.planning_profiles_used[model_id] = record["planning_profile"]
+        return record["result"]
+
+    def get_plan_costs(
+        self, queries_to_explain: List[Tuple[str, str]]
+    ) -> Iterator[Tuple[str, Tuple[float, float], float, int]]:
+        """Yield the recorded costs of the query plan of every (model id, query), see DbBackend.get_plan_costs().
+
+        Recordings of runs that received the whole query plans can be replayed too,
+        the costs are then estimated from the recorded plans.
+        """
+        for model_id, query_to_explain in queries_to_explain:
+            start = time.perf_counter()
+            key = get_recording_key("get_plan_costs", query_to_explain)
+            if key in self.records:
+                record = self.records[key]
+                costs = tuple(record["result"])
+            else:
+                record = self._get_record("get_output_explain", query_to_explain)
+                costs = CostEstimatorSinglePlan().estimate_costs(record["result"])
+
+            if record.get("planning_profile") is not None:
+                self.planning_profiles_used[model_id] = record["planning_profile"]
+            yield (
+                model_id,
+                costs,
+                time.perf_counter() - start,
+                len(json.dumps(record["result"])),
+            )
+
+    def get_planning_profiles_used(self) -> Dict[str, str]:
+        """Return the planning profile used for each explained model."""
+        return self.planning_profiles_used
+
+    def create_stub_relation(self, stub_name: str, query: str, n_rows: float):
+        """Do nothing, the recorded query plans already saw the stub relations."""
+
+    def get_output_explain_in_transaction(
+        self, query_to_explain: str, profile_name: str = "default"
+    ) -> List[Dict]:
+        """Return the recorded query plan of `query_to_explain`."""
+        return self._get_record(
+            "get_output_explain_in_transaction", query_to_explain, profile_name
+        )["result"]
@@ -0,0 +1,167 @@
+"""Classes to stream the results of the search to a file."""
+
+import csv
+import json
+from typing import Dict, List, Tuple
+
+from .Exceptions.errors import PARQUET_REQUIRES_PYARROW_ERROR
+
+OUTPUT_FORMATS = ["jsonl", "csv", "parquet"]
+
+# Number of results per row group of a Parquet file
+PARQUET_BATCH_SIZE = 65536
+
+# Separator between the models of a configuration in a CSV file
+CSV_MODEL_SEPARATOR = ";"
+
+
+class ResultWriter:
+    """Base class for writing results to a file while the search runs.
+
+    Every result is written with its configuration, total cost, storage cost, and the
+    percentage difference with the total cost of the default configuration. Results
+    are written as they come in, so memory use does not depend on their number.
+    """
+
+    def __init__(self, filepath: str, default_cost: float):
+        """Initialize the class, `default_cost` is the total cost of the default configuration."""
+        self.filepath = filepath
+        self.default_cost = default_cost
+        self.n_written = 0
+
+    def _get_diff_with_default(self, total_cost: float) -> float:
+        """Return the percentage difference with the default cost, rounded to three decimals."""
+        return round(((total_cost / self.default_cost) - 1) * 100, 3)
+
+    def _get_record(
+        self, config: None | Tuple[str], total_cost: float, storage_cost: float
+    ) -> Dict:
+        """Return the fields of a single result."""
+        return {
+            "config": list(config) if config else [],
+            "total_cost": float(total_cost),
+            "storage_cost": float(storage_cost),
+            "diff_with_default": self._get_diff_with_default(total_cost),
+        }
+
+    def write(self, config: None | Tuple[str], total_cost: float, storage_cost: float):
+        """Write a single result, `config` holds model ids."""
+        self._write_record(self._get_record(config, total_cost, storage_cost))
+        self.n_written += 1
+
+    def _write_record(self, record: Dict):
+        """Write the fields of a single result."""
+        raise NotImplementedError
+
+    def close(self):
+        """Flush all results and close the file."""
+        raise NotImplementedError
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class JsonlResultWriter(ResultWriter):
+    """Writes one JSON object per line."""
+
+    def __init__(self, filepath: str, default_cost: float):
+        """Initialize the class and open the file."""
+        super().__init__(filepath, default_cost)
+        self.file = open(filepath, "w")
+
+    def _write_record(self, record: Dict):
+        """Write the fields of a single result as a line of JSON."""
+        self.file.write(json.dumps(record))
+        self.file.write("\n")
+
+    def close(self):
+        """Close the file."""
+        self.file.close()
+
+
+class CsvResultWriter(ResultWriter):
+    """Writes a CSV file with a header, the models of a configuration are separated by ';'."""
+
+    def __init__(self, filepath: str, default_cost: float):
+        """Initialize the class, open the file and write the header."""
+        super().__init__(filepath, default_cost)
+        self.file = open(filepath, "w", newline="")
+        self.csv_writer = csv.writer(self.file)
+        self.csv_writer.writerow(
+            ["config", "total_cost", "storage_cost", "diff_with_default"]
+        )
+
+    def _write_record(self, record: Dict):
+        """Write the fields of a single result as a CSV row."""
+        self.csv_writer.writerow([
+            CSV_MODEL_SEPARATOR.join(record["config"]),
+            record["total_cost"],
+            record["storage_cost"],
+            record["diff_with_default"],
+        ])
+
+    def close(self):
+        """Close the file."""
+        self.file.close()
+
+
+class ParquetResultWriter(ResultWriter):
+    """Writes a Parquet file, in row groups of PARQUET_BATCH_SIZE results.
+
+    Requires pyarrow, which is not installed by default.
+    """
+
+    def __init__(self, filepath: str, default_cost: float):
+        """Initialize the class and open the file."""
+        super().__init__(filepath, default_cost)
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise RuntimeError(PARQUET_REQUIRES_PYARROW_ERROR)
+
+        self.pyarrow = pyarrow
+        self.schema = pyarrow.schema([
+            ("config", pyarrow.list_(pyarrow.string())),
+            ("total_cost", pyarrow.float64()),
+            ("storage_cost", pyarrow.float64()),
+            ("diff_with_default", pyarrow.float64()),
+        ])
+        self.parquet_writer = pyarrow.parquet.ParquetWriter(filepath, self.schema)
+        self.batch: Dict[str, List] = {name: [] for name in self.schema.names}
+
+    def _write_batch(self):
+        """Write the buffered results as a row group."""
+        self.parquet_writer.write_table(
+            self.pyarrow.table(self.batch, schema=self.schema)
+        )
+        self.batch = {name: [] for name in self.schema.names}
+
+    def _write_record(self, record: Dict):
+        """Buffer the fields of a single result, and write the buffer when it is full."""
+        for name, value in record.items():
+            self.batch[name].append(value)
+
+        if len(self.batch["config"]) == PARQUET_BATCH_SIZE:
+            self._write_batch()
+
+    def close(self):
+        """Write the remaining results and close the file."""
+        if self.batch["config"]:
+            self._write_batch()
+        self.parquet_writer.close()
+
+
+def create_result_writer(
+    filepath: str, output_format: str, default_cost: float
+) -> ResultWriter:
+    """Return a ResultWriter for `output_format`, one of OUTPUT_FORMATS."""
+    result_writers = {
+        "jsonl": JsonlResultWriter,
+        "csv": CsvResultWriter,
+        "parquet": ParquetResultWriter,
+    }
+    return result_writers[output_format](filepath, default_cost)
@@ -0,0 +1,255 @@
+"""RunStats class."""
+
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Dict, Iterator, List, Set, Tuple
+
+# cProfile and pstats are only imported when profiling, see RunStats.phase()
+if TYPE_CHECKING:
+    from cProfile import Profile
+    from pstats import Stats
+
+# Percentiles reported for every latency distribution
+LATENCY_PERCENTILES = [50, 90, 99]
+
+# Stacks that took less than this number of seconds are left out of the collapsed stacks
+MIN_STACK_SECONDS = 1e-6
+
+
+def _get_percentile(sorted_values: List[float], percentile: float) -> float:
+    """Return the `percentile` of `sorted_values`, the nearest value below it."""
+    index = int(percentile / 100 * (len(sorted_values) - 1))
+    return sorted_values[index]
+
+
+def _summarize_latencies(latencies: List[float]) -> Dict[str, float]:
+    """Return the number, total, mean, percentiles and maximum of `latencies`."""
+    sorted_latencies = sorted(latencies)
+    return {
+        "count": len(sorted_latencies),
+        "total_seconds": sum(sorted_latencies),
+        "mean_seconds": sum(sorted_latencies) / len(sorted_latencies),
+        **{
+            f"p{percentile}_seconds": _get_percentile(sorted_latencies, percentile)
+            for percentile in LATENCY_PERCENTILES
+        },
+        "max_seconds": sorted_latencies[-1],
+    }
+
+
+def get_peak_rss_mb() -> float | None:
+    """Return the peak resident set size of the process in MB, None if it is unknown."""
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak_rss / 1e6 if sys.platform == "darwin" else peak_rss / 1e3
+
+
+def _get_function_name(function: Tuple[str, int, str]) -> str:
+    """Return the name of a function in a stack, as `module:function`."""
+    filename, _, name = function
+    module = os.path.splitext(os.path.basename(filename))[0]
+    return f"{module}:{name}" if module not in ("~", "") else name
+
+
+def get_collapsed_stacks(stats: "Stats") -> Dict[str, float]:
+    """Return the seconds spent in each call stack, derived from the call graph of `stats`.
+
+    cProfile only records callers and callees, not full stacks, so the time of a
+    function is divided over the stacks leading to it in proportion to the time its
+    callers spent in it. Stacks are keyed as `outer;inner`, like flame graph tools
+    expect.
+    """
+    callees: Dict[Tuple, Dict[Tuple, float]] = {}
+    for function, (_, _, _, _, callers) in stats.stats.items():
+        for caller, (_, _, _, cumulative_time) in callers.items():
+            callees.setdefault(caller, {})[function] = cumulative_time
+
+    collapsed_stacks: Dict[str, float] = {}
+
+    def add_stacks(function: Tuple, stack: List[Tuple], fraction: float):
+        _, _, own_time, _, _ = stats.stats[function]
+        stack = stack + [function]
+        if own_time * fraction > 0:
+            key = ";".join(_get_function_name(frame) for frame in stack)
+            collapsed_stacks[key] = collapsed_stacks.get(key, 0) + own_time * fraction
+
+        for callee, time_in_callee in callees.get(function, {}).items():
+            callee_cumulative_time = stats.stats[callee][3]
+            # Skipping negligible stacks keeps the number of stacks visited small
+            if callee in stack or fraction * time_in_callee < MIN_STACK_SECONDS:
+                continue
+            add_stacks(callee, stack, fraction * time_in_callee / callee_cumulative_time)
+
+    for function, (_, _, _, _, callers) in stats.stats.items():
+        if not callers:
+            add_stacks(function, [], 1)
+
+    return collapsed_stacks
+
+
+class RunStats:
+    """Collects the time spent in each phase of a run, and counters of the work done.
+
+    Phases are the coarse steps of the tool, e.g. loading the YAML files, reading the
+    VST tables, rewriting the SQL, EXPLAIN, walking the query plans, and the search.
+    A phase may be entered many times, its time is summed. Counters sum amounts, e.g.
+    the bytes of SQL sent, and latencies keep every measurement of e.g. EXPLAIN, so
+    their distribution can be reported.
+
+    With a `profile_dir`, every phase is also run under cProfile, and write_profiles()
+    writes a pstats file and collapsed stacks per phase to that directory.
+    """
+
+    def __init__(self, profile_dir: str | None = None):
+        """Initialize the class, `profile_dir` enables profiling."""
+        self.profile_dir = profile_dir
+        self.phase_seconds: Dict[str, float] = {}
+        self.phase_entries: Dict[str, int] = {}
+        self.counters: Dict[str, float] = {}
+        self.latencies: Dict[str, List[float]] = {}
+        self.profilers: Dict[str, "Profile"] = {}
+        self.profiled_phase: str | None = None
+        self.active_phases: Set[str] = set()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Add the time spent in the block to phase `name`, and profile it if enabled.
+
+        A phase entered inside another one is timed, but profiled as part of the
+        outer phase, as cProfile can only profile one phase at a time. A phase entered
+        inside itself is only timed once.
+        """
+        if name in self.active_phases:
+            yield
+            return
+
+        profiler = None
+        if self.profile_dir is not None and self.profiled_phase is None:
+            from cProfile import Profile
+
+            profiler = self.profilers.setdefault(name, Profile())
+            self.profiled_phase = name
+            profiler.enable()
+
+        self.active_phases.add(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+            self.active_phases.remove(name)
+            if profiler is not None:
+                profiler.disable()
+                self.profiled_phase = None
+
+    def add_time(self, name: str, seconds: float):
+        """Add `seconds` to phase `name`, and count the entry."""
+        self.phase_seconds[name] = self.phase_seconds.get(name, 0) + seconds
+        self.phase_entries[name] = self.phase_entries.get(name, 0) + 1
+
+    def count(self, name: str, amount: float = 1):
+        """Add `amount` to counter `name`."""
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def add_latency(self, name: str, seconds: float):
+        """Add a single measurement to the latency distribution `name`."""
+        self.latencies.setdefault(name, []).append(seconds)
+
+    def add_explain(
+        self,
+        query: str,
+        query_plan: List[Dict] | None,
+        seconds: float,
+        n_plan_bytes: int | None = None,
+    ):
+        """Count a single EXPLAIN of `query`, which returned `query_plan` in `seconds`.
+
+        If the query plan was reduced to its costs in the DB, there is no `query_plan`,
+        and `n_plan_bytes` is the number of bytes received instead.
+        """
+        self.add_latency("explain", seconds)
+        self.count("explains")
+        self.count("sql_bytes_sent", len(query.encode()))
+        self.count(
+            "plan_json_bytes",
+            n_plan_bytes if n_plan_bytes is not None else len(json.dumps(query_plan)),
+        )
+
+    def add_run_stats(self, run_stats: "RunStats"):
+        """Add the phases, counters and latencies of another RunStats, e.g. of a search in another process."""
+        for name, seconds in run_stats.phase_seconds.items():
+            self.phase_seconds[name] = self.phase_seconds.get(name, 0) + seconds
+            self.phase_entries[name] = (
+                self.phase_entries.get(name, 0) + run_stats.phase_entries[name]
+            )
+        for name, amount in run_stats.counters.items():
+            self.count(name, amount)
+        for name, latencies in run_stats.latencies.items():
+            self.latencies.setdefault(name, []).extend(latencies)
+
+    def get_stats(self) -> Dict:
+        """Return the phases, counters and latency distributions collected so far.
+
+        The number of configurations evaluated per second of the search, and the
+        peak resident set size of the process, are derived when the stats are read.
+        """
+        counters = dict(self.counters)
+        search_seconds = self.phase_seconds.get("search", 0)
+        if search_seconds > 0 and "configurations_evaluated" in counters:
+            counters["configurations_per_second"] = (
+                counters["configurations_evaluated"] / search_seconds
+            )
+
+        return {
+            "phases": {
+                name: {"seconds": seconds, "entries": self.phase_entries[name]}
+                for name, seconds in self.phase_seconds.items()
+            },
+            "counters": counters,
+            "latencies": {
+                name: _summarize_latencies(latencies)
+                for name, latencies in self.latencies.items()
+            },
+            "peak_rss_mb": get_peak_rss_mb(),
+        }
+
+    def write(self, filepath: str):
+        """Write the stats to `filepath` as JSON."""
+        with open(filepath, "w") as f:
+            json.dump(self.get_stats(), f, indent=2)
+
+    def write_profiles(self) -> List[str]:
+        """Write `<phase>.pstats` and `<phase>.collapsed` for every profiled phase.
+
+        Returns:
+            List[str]: The files that were written.
+        """
+        from pstats import Stats
+
+        os.makedirs(self.profile_dir, exist_ok=True)
+        filepaths = []
+
+        for name, profiler in self.profilers.items():
+            pstats_filepath = os.path.join(self.profile_dir, f"{name}.pstats")
+            profiler.dump_stats(pstats_filepath)
+
+            collapsed_filepath = os.path.join(self.profile_dir, f"{name}.collapsed")
+            collapsed_stacks = get_collapsed_stacks(Stats(profiler))
+            with open(collapsed_filepath, "w") as f:
+                for stack, seconds in collapsed_stacks.items():
+                    # Flame graph tools expect integer sample counts, use microseconds
+                    microseconds = round(seconds * 1e6)
+                    if microseconds > 0:
+                        f.write(f"{stack} {microseconds}\n")
+
+            filepaths += [pstats_filepath, collapsed_filepath]
+
+        return filepaths
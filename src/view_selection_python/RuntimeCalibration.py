@@ -0,0 +1,221 @@
+"""RuntimeCalibration class."""
+
+import itertools
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from .Exceptions.errors import TOO_FEW_MODELS_TO_CALIBRATE_ERROR
+from .FudgeFactorCalculator import FudgeFactorCalculator
+from .ModelGraph import ModelGraph
+
+# Materializations whose build time is the time to run the query of the model and to
+# store its result. Views are created without running their query, and incremental
+# models only process new rows.
+CALIBRATED_MATERIALIZATIONS = ("table",)
+
+# Minimum number of models with a run history to fit the coefficients to
+MIN_MODELS_TO_CALIBRATE = 5
+
+# The coefficients of the terms of the fit, in order
+COEFFICIENT_NAMES = (
+    "seconds_per_model",
+    "seconds_per_stored_byte",
+    "seconds_per_processed_byte",
+)
+
+# Number of models with the largest prediction errors listed in the fit report
+N_WORST_PREDICTED_MODELS = 5
+
+
+def _fit_non_negative_least_squares(
+    features: np.ndarray, targets: np.ndarray
+) -> np.ndarray:
+    """Return the non-negative coefficients that best fit `features` (one column per term) to `targets`.
+
+    With few terms, the fit is found exactly by ordinary least squares on every subset
+    of the terms, keeping the best fit whose coefficients are all non-negative. The
+    columns are scaled to a maximum of 1 first, as the terms differ by many orders of
+    magnitude.
+    """
+    scales = np.abs(features).max(axis=0)
+    scales[scales == 0] = 1
+    scaled_features = features / scales
+
+    best_coefficients = np.zeros(features.shape[1])
+    best_residual = float(targets @ targets)
+    for n_terms in range(1, features.shape[1] + 1):
+        for terms in itertools.combinations(range(features.shape[1]), n_terms):
+            terms = list(terms)
+            coefficients, *_ = np.linalg.lstsq(
+                scaled_features[:, terms], targets, rcond=None
+            )
+            if (coefficients < 0).any():
+                continue
+
+            errors = scaled_features[:, terms] @ coefficients - targets
+            residual = float(errors @ errors)
+            if residual < best_residual:
+                best_residual = residual
+                best_coefficients = np.zeros(features.shape[1])
+                best_coefficients[terms] = coefficients
+
+    return best_coefficients / scales
+
+
+class RuntimeCalibration:
+    """Fits the build time of the models to their estimated costs, to rank configurations in seconds.
+
+    The costs estimated from the query plans (see CostEstimatorSinglePlan) are bytes,
+    not time. Elementary records the execution time of every model in every dbt run.
+    For the models built as a table in their latest run, the median execution time is
+    fitted to
+        seconds = seconds_per_model
+                  + seconds_per_stored_byte * storage_cost
+                  + seconds_per_processed_byte * creation_cost * fudge_factor
+    where the fudge factors follow from the intermediate models that are currently
+    built as a table. The coefficients are non-negative, so no configuration gains
+    from a negative time. The fit is a least squares fit of all models at once, so the
+    models with the longest build times weigh most, as they do in the total build time.
+
+    The total cost of a configuration is linear in the same terms, so the calibrated
+    model graph (see get_calibrated_model_graph()) makes every search strategy rank the
+    configurations on the predicted build time of their materialized models.
+    """
+
+    def __init__(
+        self,
+        model_graph: ModelGraph,
+        execution_times: List[Tuple[str, str, float, int]],
+    ):
+        """Initialize the class, and fit the coefficients.
+
+        `execution_times` holds (model id, materialization, median seconds, number of
+        runs) of every model with a run history, see
+        DbBackend.get_model_execution_times(). Models that are not in `model_graph`
+        are ignored.
+        """
+        self.model_graph = model_graph
+        self.observed_models, self.observed_seconds, self.n_runs = (
+            self._get_observations(execution_times)
+        )
+
+        if len(self.observed_models) < MIN_MODELS_TO_CALIBRATE:
+            raise RuntimeError(
+                TOO_FEW_MODELS_TO_CALIBRATE_ERROR.format(
+                    min_models=MIN_MODELS_TO_CALIBRATE,
+                    n_models=len(self.observed_models),
+                )
+            )
+
+        self.features = self._get_features()
+        self.coefficients = _fit_non_negative_least_squares(
+            self.features, self.observed_seconds
+        )
+        self.predicted_seconds = self.features @ self.coefficients
+
+    def _get_observations(
+        self, execution_times: List[Tuple[str, str, float, int]]
+    ) -> Tuple[np.ndarray, np.ndarray, int]:
+        """Return the indices of the models to fit, their median execution times, and the number of runs."""
+        model_ids = set(self.model_graph.model_ids)
+        observations = sorted(
+            (self.model_graph.get_model_index(model_id), float(seconds), int(n_runs))
+            for model_id, materialization, seconds, n_runs in execution_times
+            if materialization in CALIBRATED_MATERIALIZATIONS and model_id in model_ids
+        )
+        return (
+            np.array([model for model, _, _ in observations], dtype=np.int64),
+            np.array([seconds for _, seconds, _ in observations], dtype=np.float64),
+            sum(n_runs for _, _, n_runs in observations),
+        )
+
+    def _get_features(self) -> np.ndarray:
+        """Return the terms of the fit of every observed model, one row per model.
+
+        The intermediate models built as a table form the current configuration, which
+        gives the fudge factors.
+        """
+        is_destination = self.model_graph.is_destination[self.observed_models]
+        current_config = tuple(self.observed_models[~is_destination].tolist())
+        fudge_factors = np.array(
+            FudgeFactorCalculator(
+                config=current_config if current_config else None,
+                model_graph=self.model_graph,
+            ).get_fudge_factors()
+        )
+
+        return np.column_stack((
+            np.ones(len(self.observed_models)),
+            self.model_graph.storage_costs[self.observed_models],
+            self.model_graph.creation_costs[self.observed_models]
+            * fudge_factors[self.observed_models],
+        ))
+
+    def get_seconds(self, storage_cost: float, creation_cost: float) -> float:
+        """Return the predicted build time of a model with the given storage and creation cost."""
+        seconds_per_model, seconds_per_stored_byte, seconds_per_processed_byte = (
+            self.coefficients.tolist()
+        )
+        return (
+            seconds_per_model
+            + seconds_per_stored_byte * storage_cost
+            + seconds_per_processed_byte * creation_cost
+        )
+
+    def get_calibrated_model_graph(self) -> ModelGraph:
+        """Return a copy of the model graph whose costs are the predicted build times in seconds.
+
+        The fixed cost of a model is seconds_per_model plus the time to store it, and
+        its creation cost the time to run its query. The storage costs stay bytes.
+        """
+        seconds_per_model, seconds_per_stored_byte, seconds_per_processed_byte = (
+            self.coefficients.tolist()
+        )
+        return self.model_graph.with_costs(
+            fixed_costs=(
+                seconds_per_model
+                + seconds_per_stored_byte * self.model_graph.storage_costs
+            ),
+            creation_costs=seconds_per_processed_byte * self.model_graph.creation_costs,
+        )
+
+    def get_fit_report(self) -> Dict:
+        """Return how well the fit predicts the observed build times.
+
+        The report holds the number of models and runs the fit is based on, the
+        coefficients, the coefficient of determination (R²), the root mean squared
+        error in seconds, the median relative error, and the models whose build time is
+        predicted worst, as (model id, observed seconds, predicted seconds).
+        """
+        errors = self.predicted_seconds - self.observed_seconds
+        squared_error = float(errors @ errors)
+        deviations = self.observed_seconds - self.observed_seconds.mean()
+        total_squared_deviation = float(deviations @ deviations)
+        has_time = self.observed_seconds > 0
+        worst_predicted = np.argsort(-np.abs(errors))[:N_WORST_PREDICTED_MODELS]
+
+        return {
+            "n_models": len(self.observed_models),
+            "n_runs": self.n_runs,
+            "coefficients": dict(zip(COEFFICIENT_NAMES, self.coefficients.tolist())),
+            "r_squared": (
+                1 - squared_error / total_squared_deviation
+                if total_squared_deviation > 0
+                else float(squared_error == 0)
+            ),
+            "rmse_seconds": float(np.sqrt(squared_error / len(errors))),
+            "median_relative_error": (
+                float(np.median(np.abs(errors[has_time]) / self.observed_seconds[has_time]))
+                if has_time.any()
+                else None
+            ),
+            "worst_predicted_models": [
+                (
+                    self.model_graph.model_ids[self.observed_models[i]],
+                    float(self.observed_seconds[i]),
+                    float(self.predicted_seconds[i]),
+                )
+                for i in worst_predicted.tolist()
+            ],
+        }
@@ -0,0 +1,144 @@
+"""SearchPlanner class."""
+
+import random
+import time
+from math import comb
+from typing import TYPE_CHECKING, Dict, List, Tuple
+
+from .ConfigurationGenerator import MaterializationConfigurationGenerator
+
+# The CLI imports SEARCH_STRATEGIES, so numpy is not imported here
+if TYPE_CHECKING:
+    from .ConfigCostEstimator import ConfigCostEstimator
+
+SEARCH_STRATEGIES = ["auto", "exhaustive", "exact", "milp", "pruned", "heuristic"]
+
+# Strategies that only find the cheapest configurations, so not the Pareto frontier
+CHEAPEST_ONLY_STRATEGIES = ["exact", "milp"]
+
+# Default number of seconds the search may take when choosing a strategy automatically
+DEFAULT_TARGET_TIME = 600
+
+# Limits of the micro-benchmark of estimate_cost_of_configuration()
+N_BENCHMARK_CONFIGS = 200
+MAX_BENCHMARK_SECONDS = 1
+
+
+def get_number_of_pruned_configurations(
+    n_models: int, n_beneficial_models: int, max_materializations: int
+) -> int:
+    """Return the number of configurations the pruned search evaluates.
+
+    These are the default configuration, all single-model configurations, and all
+    larger configurations consisting of beneficial models only.
+    """
+    return 1 + n_models + sum(
+        comb(n_beneficial_models, num_materializations)
+        for num_materializations in range(2, max_materializations + 1)
+    )
+
+
+class SearchPlanner:
+    """This class predicts the runtime of the search and chooses a search strategy.
+
+    The runtime is projected by multiplying the exact number of configurations with
+    the time estimating the cost of a configuration takes for a random sample of them.
+    Models are identified by their model index.
+    The available strategies are:
+        - exhaustive: evaluate all configurations
+        - exact: find the cheapest configuration of each size using ExactSearch, which
+          only enumerates the configurations of components that are not trees
+        - milp: find the cheapest configuration by solving a mixed-integer program
+          using MilpSearch (never chosen automatically, as it needs SciPy)
+        - pruned: evaluate all configurations consisting of models that lower the
+          total cost when materialized on their own
+        - heuristic: evaluate configurations in order of estimated promise until
+          the time budget is spent
+    """
+
+    def __init__(
+        self,
+        config_generator: MaterializationConfigurationGenerator,
+        config_cost_estimator: "ConfigCostEstimator",
+        target_time: float = DEFAULT_TARGET_TIME,
+    ):
+        """Initialize SearchPlanner class."""
+        self.config_generator = config_generator
+        self.config_cost_estimator = config_cost_estimator
+        self.target_time = target_time
+        self.seconds_per_configuration = None
+
+    def _sample_configuration(self) -> Tuple[int]:
+        """Return a configuration drawn uniformly from all non-default configurations."""
+        models = self.config_generator.all_intermediate_models
+        sizes = range(1, min(self.config_generator.max_materializations, len(models)) + 1)
+        size = random.choices(sizes, weights=[comb(len(models), s) for s in sizes])[0]
+        return tuple(random.sample(models, size))
+
+    def _benchmark_seconds_per_configuration(self) -> float:
+        """Return the average number of seconds it takes to estimate a configuration."""
+        n_evaluated = 0
+        start = time.perf_counter()
+
+        while n_evaluated < N_BENCHMARK_CONFIGS:
+            self.config_cost_estimator.estimate_cost_of_configuration(
+                self._sample_configuration()
+            )
+            n_evaluated += 1
+            if time.perf_counter() - start > MAX_BENCHMARK_SECONDS:
+                break
+
+        return (time.perf_counter() - start) / n_evaluated
+
+    def get_seconds_per_configuration(self) -> float:
+        """Return the average number of seconds it takes to estimate a configuration."""
+        if self.seconds_per_configuration is None:
+            if self.get_number_of_configurations() == 1:
+                self.seconds_per_configuration = 0
+            else:
+                self.seconds_per_configuration = (
+                    self._benchmark_seconds_per_configuration()
+                )
+        return self.seconds_per_configuration
+
+    def get_number_of_configurations(self) -> int:
+        """Return the number of possible configurations, including the default one."""
+        return self.config_generator.get_number_of_configurations()
+
+    def get_projected_runtime(self, n_configs: int | None = None) -> float:
+        """Return the projected number of seconds it takes to evaluate `n_configs`.
+
+        By default, this is the projected runtime of the exhaustive search.
+        """
+        if n_configs is None:
+            n_configs = self.get_number_of_configurations()
+        return n_configs * self.get_seconds_per_configuration()
+
+    def get_beneficial_models(self, model_scores: Dict[int, float]) -> List[int]:
+        """Return the models that lower the total cost when materialized on their own."""
+        return [
+            model
+            for model in self.config_generator.all_intermediate_models
+            if model_scores[model] < 0
+        ]
+
+    def exhaustive_search_fits(self) -> bool:
+        """Return whether the exhaustive search is projected to fit in the target time."""
+        return self.get_projected_runtime() <= self.target_time
+
+    def exact_search_fits(self, n_enumerated_configs: int) -> bool:
+        """Return whether the exact search is projected to fit in the target time.
+
+        Its runtime is dominated by the `n_enumerated_configs` configurations of the
+        components that are not trees.
+        """
+        return self.get_projected_runtime(n_enumerated_configs) <= self.target_time
+
+    def pruned_search_fits(self, model_scores: Dict[int, float]) -> bool:
+        """Return whether the pruned search is projected to fit in the target time."""
+        n_configs = get_number_of_pruned_configurations(
+            n_models=len(self.config_generator.all_intermediate_models),
+            n_beneficial_models=len(self.get_beneficial_models(model_scores)),
+            max_materializations=self.config_generator.max_materializations,
+        )
+        return self.get_projected_runtime(n_configs) <= self.target_time
@@ -0,0 +1,214 @@
+"""SensitivityAnalysis class."""
+
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from .ExactSearch import NO_ANCESTOR, N_FUDGE_FACTORS, _get_state, _get_state_tables
+from .FudgeFactorCalculator import _get_fudge_list_index_to_use, fudge_factors_lists
+from .ModelGraph import ModelGraph
+
+# Standard deviation of the log of the factor every fudge factor is multiplied with
+DEFAULT_SPREAD = 0.25
+
+# Seed of the perturbations, so an analysis can be repeated exactly
+DEFAULT_SEED = 0
+
+# Lowest fudge factor a perturbation can lead to
+MIN_FUDGE_FACTOR = 0.001
+
+# Number of best configurations that are re-scored for every configuration in the top K
+N_CANDIDATES_PER_TOP_K = 10
+
+# Number of perturbed tables that are re-scored at once, which bounds the memory used
+SAMPLES_PER_BATCH = 1024
+
+
+class SensitivityAnalysis:
+    """Measures how stable the best configurations are if the fudge factors are off.
+
+    The fudge factor tables (`fudge_factors_lists`) are perturbed `n_samples` times, by
+    multiplying every fudge factor with a log-normally distributed factor. Each table
+    is then sorted, so a model further away from a materialized model never gets a
+    lower fudge factor. The candidate configurations are re-scored with every
+    perturbed table, and the analysis counts how often each of them ends up in the
+    top K.
+
+    Because the tables stay sorted, the fudge factor of a model is determined by the
+    distance to each of its materialized ancestors, whatever the table. These
+    distances are found once per candidate, and the models with the same nearest
+    ancestors (as states: the fudge list and distance, as in ExactSearch) are combined.
+    Re-scoring all candidates with a batch of tables is then a single matrix product.
+    """
+
+    def __init__(
+        self,
+        model_graph: ModelGraph,
+        n_samples: int,
+        top_k: int,
+        spread: float = DEFAULT_SPREAD,
+        seed: int = DEFAULT_SEED,
+    ):
+        """Initialize the class."""
+        self.model_graph = model_graph
+        self.n_samples = n_samples
+        self.top_k = top_k
+        self.spread = spread
+        self.seed = seed
+        self.descendant_states: Dict[int, Dict[int, int]] = {}
+
+    def _get_descendant_states(self, model: int) -> Dict[int, int]:
+        """Return the state each model close enough below `model` gets from it, if it's materialized.
+
+        The state follows from the shortest distance to `model`, found breadth-first.
+        """
+        if model not in self.descendant_states:
+            fudge_list_index = _get_fudge_list_index_to_use(
+                self.model_graph.get_out_degree(model)
+            )
+            states = {}
+            current_models = self.model_graph.get_children(model)
+            for fudge_factor_index in range(N_FUDGE_FACTORS):
+                next_models = []
+                for current_model in current_models:
+                    if current_model not in states:
+                        states[current_model] = _get_state(
+                            fudge_list_index, fudge_factor_index
+                        )
+                        next_models += self.model_graph.get_children(current_model)
+                current_models = next_models
+            self.descendant_states[model] = states
+        return self.descendant_states[model]
+
+    def get_sample_tables(self) -> np.ndarray:
+        """Return the fudge factor of each state in each of the perturbed tables.
+
+        Row i holds the fudge factors of sample i, indexed by state. The fudge factor
+        without a materialized ancestor stays 1.
+        """
+        fudge_factors, _ = _get_state_tables()
+        rng = np.random.default_rng(self.seed)
+
+        # The states of a fudge list are consecutive, in order of distance
+        n_lists = len(fudge_factors_lists)
+        factors = np.broadcast_to(
+            fudge_factors[1:].reshape(n_lists, N_FUDGE_FACTORS),
+            (self.n_samples, n_lists, N_FUDGE_FACTORS),
+        )
+        perturbed = factors * np.exp(
+            rng.normal(0, self.spread, size=factors.shape)
+        )
+        perturbed = np.sort(np.clip(perturbed, MIN_FUDGE_FACTOR, 1), axis=2)
+
+        tables = np.ones((self.n_samples, len(fudge_factors)))
+        tables[:, 1:] = perturbed.reshape(self.n_samples, -1)
+        return tables
+
+    def _get_nearest_states(self, config: Tuple[int]) -> Dict[int, List[int]]:
+        """Return the state of the nearest materialized ancestor in each fudge list, for every model below `config`.
+
+        As the tables stay sorted, the nearest ancestor of each list gives the lowest
+        fudge factor of that list. The states of a list are consecutive, in order of
+        distance, so the nearest one has the lowest state. Lists without an ancestor
+        close enough get NO_ANCESTOR.
+        """
+        nearest_states: Dict[int, List[int]] = {}
+        for materialized_model in config:
+            for model, state in self._get_descendant_states(materialized_model).items():
+                states = nearest_states.setdefault(
+                    model, [NO_ANCESTOR] * len(fudge_factors_lists)
+                )
+                fudge_list_index = (state - 1) // N_FUDGE_FACTORS
+                if states[fudge_list_index] == NO_ANCESTOR:
+                    states[fudge_list_index] = state
+                else:
+                    states[fudge_list_index] = min(states[fudge_list_index], state)
+        return nearest_states
+
+    def _get_cost_terms(
+        self, configs: List[None | Tuple[int]]
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Return the cost of each configuration if all fudge factors were 1, and how the fudge factors lower it.
+
+        Every model of a configuration (a materialized or destination model) with a
+        materialized ancestor close enough lowers the cost by its creation cost times
+        (1 - its fudge factor). Its fudge factor is the lowest of the fudge factors of
+        its nearest states, so the models with the same nearest states are combined.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray]: The costs of the configurations,
+            every distinct combination of nearest states (one column per fudge list),
+            and the summed creation cost of the models of each configuration (rows)
+            with each combination (columns).
+        """
+        fixed_costs = self.model_graph.fixed_costs
+        creation_costs = self.model_graph.creation_costs
+        destination_indices = self.model_graph.destination_indices.tolist()
+        destination_cost = float(
+            fixed_costs[destination_indices].sum()
+            + creation_costs[destination_indices].sum()
+        )
+
+        base_costs = np.empty(len(configs))
+        term_configs = []
+        term_models = []
+        term_states = []
+
+        for config_index, config in enumerate(configs):
+            config = config or ()
+            base_costs[config_index] = destination_cost + sum(
+                fixed_costs[model] + creation_costs[model] for model in config
+            )
+
+            nearest_states = self._get_nearest_states(config)
+            for model in list(config) + destination_indices:
+                if model in nearest_states:
+                    term_configs.append(config_index)
+                    term_models.append(model)
+                    term_states.append(nearest_states[model])
+
+        term_states = np.array(term_states, dtype=np.int64).reshape(
+            -1, len(fudge_factors_lists)
+        )
+        state_combinations, combination_indices = np.unique(
+            term_states, axis=0, return_inverse=True
+        )
+        creation_cost_weights = np.zeros((len(configs), len(state_combinations)))
+        np.add.at(
+            creation_cost_weights,
+            (np.array(term_configs, dtype=np.int64), combination_indices.reshape(-1)),
+            creation_costs[np.array(term_models, dtype=np.int64)],
+        )
+
+        return base_costs, state_combinations, creation_cost_weights
+
+    def analyze(
+        self, configs: List[None | Tuple[int]]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Re-score `configs` with every perturbed table.
+
+        The samples are re-scored in batches of SAMPLES_PER_BATCH, each with a single
+        matrix product.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: For each configuration, the fraction of the
+            samples in which it was in the top K, and in which it was the best one.
+        """
+        base_costs, state_combinations, creation_cost_weights = (
+            self._get_cost_terms(configs)
+        )
+        top_k = min(self.top_k, len(configs))
+        n_in_top_k = np.zeros(len(configs), dtype=np.int64)
+        n_best = np.zeros(len(configs), dtype=np.int64)
+        sample_tables = self.get_sample_tables()
+
+        for start in range(0, self.n_samples, SAMPLES_PER_BATCH):
+            tables = sample_tables[start:start + SAMPLES_PER_BATCH]
+            fudge_factors = tables[:, state_combinations].min(axis=2)
+            costs = base_costs + (fudge_factors - 1) @ creation_cost_weights.T
+
+            in_top_k = np.argpartition(costs, top_k - 1, axis=1)[:, :top_k]
+            n_in_top_k += np.bincount(in_top_k.reshape(-1), minlength=len(configs))
+            n_best += np.bincount(np.argmin(costs, axis=1), minlength=len(configs))
+
+        return n_in_top_k / self.n_samples, n_best / self.n_samples
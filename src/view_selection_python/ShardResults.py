@@ -0,0 +1,148 @@
+"""Functions to write and merge the results of a single shard of the search."""
+
+import argparse
+import json
+from typing import TYPE_CHECKING, Dict, List, Tuple
+
+from .Exceptions.errors import INCOMPATIBLE_SHARD_FILES_ERROR, INVALID_SHARD_ERROR
+
+# The CLI imports parse_shard(), so ConfigurationResults (and numpy) is only imported
+# when results are merged
+if TYPE_CHECKING:
+    from .ConfigurationResults import ConfigurationResults
+
+
+def parse_shard(shard: str) -> Tuple[int, int]:
+    """Parse a shard specification of the form `i/N` into (i, N).
+
+    Shards are numbered starting at 1, so 1 <= i <= N.
+    """
+    try:
+        shard_number, n_shards = (int(part) for part in shard.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(INVALID_SHARD_ERROR.format(shard=shard))
+
+    if not 1 <= shard_number <= n_shards:
+        raise argparse.ArgumentTypeError(INVALID_SHARD_ERROR.format(shard=shard))
+
+    return shard_number, n_shards
+
+
+def get_shard_range(
+    shard_number: int, n_shards: int, n_configs: int
+) -> Tuple[int, int]:
+    """Return the (start, stop) configuration indices of a shard.
+
+    The configurations are split into `n_shards` contiguous ranges of (nearly)
+    equal size.
+    """
+    start = (shard_number - 1) * n_configs // n_shards
+    stop = shard_number * n_configs // n_shards
+    return start, stop
+
+
+def get_default_shard_filepath(shard_number: int, n_shards: int) -> str:
+    """Return the file the results of a shard are written to by default."""
+    return f"vst_shard_{shard_number}_of_{n_shards}.json"
+
+
+def write_shard_results(
+    filepath: str,
+    shard_range: Tuple[int, int],
+    n_configs: int,
+    max_materializations: int,
+    results: "ConfigurationResults",
+    top_x: int,
+):
+    """Write the best `top_x` results of a shard, and the default result, to a JSON file."""
+    rows = results.get_default_and_best_rows(top_x)
+
+    shard_contents = {
+        "start": shard_range[0],
+        "stop": shard_range[1],
+        "n_configurations": n_configs,
+        "max_materializations": max_materializations,
+        "results": [
+            {
+                "config": list(config) if (config := results.get_config(row)) else None,
+                "total_config_cost": float(row["total_cost"]),
+                "storage_cost": float(row["storage_cost"]),
+            }
+            for row in rows
+        ],
+    }
+
+    with open(filepath, "w") as f:
+        json.dump(shard_contents, f)
+
+
+def _read_shard_file(filepath: str) -> Dict:
+    """Return the contents of a file written by write_shard_results()."""
+    with open(filepath, "r") as f:
+        return json.load(f)
+
+
+def get_missing_ranges(shard_ranges: List[Tuple[int, int]], n_configs: int) -> List[Tuple[int, int]]:
+    """Return the ranges of configuration indices not covered by any shard."""
+    missing_ranges = []
+    covered_until = 0
+
+    for start, stop in sorted(shard_ranges):
+        if start > covered_until:
+            missing_ranges.append((covered_until, start))
+        covered_until = max(covered_until, stop)
+
+    if covered_until < n_configs:
+        missing_ranges.append((covered_until, n_configs))
+
+    return missing_ranges
+
+
+def merge_shard_results(
+    filepaths: List[str]
+) -> Tuple["ConfigurationResults", List[Tuple[int, int]]]:
+    """Combine the results of several shards.
+
+    Returns:
+        Tuple[ConfigurationResults, List[Tuple[int, int]]]: The configurations and
+        their costs (including the default configuration once), and the ranges of
+        configuration indices that were not covered by any of the shards.
+    """
+    from .ConfigurationResults import ConfigurationResults
+
+    shard_contents = [_read_shard_file(filepath) for filepath in filepaths]
+
+    search_spaces = {
+        (contents["n_configurations"], contents["max_materializations"])
+        for contents in shard_contents
+    }
+    if len(search_spaces) > 1:
+        raise RuntimeError(INCOMPATIBLE_SHARD_FILES_ERROR)
+
+    n_configs, max_materializations = search_spaces.pop()
+    model_ids = sorted({
+        model
+        for contents in shard_contents
+        for result in contents["results"]
+        for model in result["config"] or ()
+    })
+    results = ConfigurationResults(model_ids, max_materializations)
+    default_result_found = False
+
+    for contents in shard_contents:
+        for result in contents["results"]:
+            if result["config"] is None:
+                if default_result_found:
+                    continue
+                default_result_found = True
+
+            results.append_named(
+                result["config"], result["total_config_cost"], result["storage_cost"]
+            )
+
+    missing_ranges = get_missing_ranges(
+        [(contents["start"], contents["stop"]) for contents in shard_contents],
+        n_configs,
+    )
+
+    return results, missing_ranges
@@ -1,19 +1,43 @@
 """ViewSelectionAdvisor class."""
 
+import itertools
+import time
 from math import inf
-from typing import Deque, Tuple, List
+from typing import Dict, Iterable, Tuple, List
 
-from collections import deque
 from .ConfigCostEstimator import ConfigCostEstimator
+from .ConfigRefiner import ConfigRefiner
 from .ConfigurationGenerator import MaterializationConfigurationGenerator
+from .ConfigurationResults import ConfigurationResults
+from .CheckpointManager import CheckpointManager
 from .CwdChecker import CwdChecker
+from .DbBackend import DbBackend
+from .Exceptions.errors import (
+    CALIBRATE_REQUIRES_DB_ERROR,
+    PARETO_STRATEGY_ERROR,
+    REFINE_REQUIRES_DB_ERROR,
+)
+from .ExactSearch import ExactSearch
+from .ManifestBackend import ManifestBackend
+from .MilpSearch import MilpSearch
+from .ModelGraph import ModelGraph
 from .ModelInfoManager import ModelInfoManager
-from .PostgresHandler import PostgresHandler
-from ruamel.yaml.comments import CommentedMap
+from .ParetoFrontier import ParetoFrontier
+from .ResultWriter import ResultWriter
+from .RunStats import RunStats
+from .PostgresHandler import (
+    DEFAULT_MAX_CONCURRENT_EXPLAINS,
+    REQUIRED_TABLES,
+    REQUIRED_TABLES_WITH_MANIFEST,
+    PostgresHandler,
+)
+from .RecordingBackend import RecordingBackend
+from .RuntimeCalibration import RuntimeCalibration
+from .SensitivityAnalysis import N_CANDIDATES_PER_TOP_K, SensitivityAnalysis
 from .ProfilesScraper import ProfilesScraper
+from .SearchPlanner import CHEAPEST_ONLY_STRATEGIES, DEFAULT_TARGET_TIME, SearchPlanner
+from .ShardResults import get_shard_range
 from .DbtProjectScraper import DbtProjectScraper
-from tqdm import tqdm
-from .CLI import CLI
 
 
 class ViewSelectionAdvisor:
@@ -23,23 +47,134 @@ class ViewSelectionAdvisor:
     the one with the lowest expected cost.
     """
 
-    def __init__(self, n_mater_in_config: int = 2):
-        """Initialize, do checks to the environment, and create necessary objects."""
+    def __init__(
+        self,
+        n_mater_in_config: int = 2,
+        planning_profile: str = "default",
+        explain_timeout: float = 30,
+        time_budget: float | None = None,
+        strategy: str = "auto",
+        shard: Tuple[int, int] | None = None,
+        checkpoint_manager: CheckpointManager | None = None,
+        resume: bool = False,
+        pareto: bool = False,
+        n_results_to_keep: int | None = None,
+        project_dir: str | None = None,
+        profile: str | None = None,
+        target: str | None = None,
+        postgres_handler: DbBackend | None = None,
+        model_info_manager: ModelInfoManager | None = None,
+        model_graph: ModelGraph | None = None,
+        show_progress: bool = True,
+        record_filepath: str | None = None,
+        run_stats: RunStats | None = None,
+        manifest_path: str | None = None,
+        storage_space_left: float | None = None,
+        max_concurrent_explains: int = DEFAULT_MAX_CONCURRENT_EXPLAINS,
+        max_db_load: int | None = None,
+        model_explain_timeouts: Dict[str, float] | None = None,
+        calibrate: bool = False,
+        reduce_plans: bool = False,
+    ):
+        """Initialize, do checks to the environment, and create necessary objects.
+
+        `strategy` is one of SEARCH_STRATEGIES, see SearchPlanner. If `time_budget`
+        (in seconds) is given, the search stops when the budget is spent. It is also
+        the time the search should fit in when the strategy is chosen automatically.
+        If `shard` (i, N) is given, only the i-th of N contiguous ranges of all
+        configurations is evaluated exhaustively. If a `checkpoint_manager` is given,
+        the search is exhaustive and its state is written to a checkpoint periodically.
+        With `resume`, the search continues from the last checkpoint. With `pareto`,
+        only the configurations on the Pareto frontier of total cost and storage cost
+        are kept, regardless of the storage space left. The exact and MILP strategies
+        cannot find the frontier, so they cannot be combined with `pareto`. If
+        `n_results_to_keep` is given, only that many of the best configurations are
+        guaranteed to be kept in memory.
+
+        The models are read from the dbt project in `project_dir` (the current working
+        directory by default), using `profile` and `target` if given, and otherwise the
+        ones the project and profile specify. With `manifest_path`, the models and their
+        dependencies are read from dbt's manifest.json instead of the VST tables, see
+        ManifestBackend. With `record_filepath`, every query to the DB and its result
+        are recorded to that file, see RecordingBackend. `max_concurrent_explains`,
+        `max_db_load` and `model_explain_timeouts` limit the EXPLAINs the
+        PostgresHandler runs, see PostgresHandler. With `calibrate`, the costs are
+        calibrated to the build time in seconds using the run history Elementary
+        recorded, see RuntimeCalibration. With `reduce_plans`, only the costs of the
+        query plans are received, see ModelInfoManager. Objects that
+        were created before can be passed instead: a `postgres_handler` (any DbBackend,
+        e.g. a ReplayBackend), a `model_info_manager`, or only a `model_graph`. Without
+        a backend, there is no storage bound and the configurations cannot be refined,
+        unless the `storage_space_left` is given, e.g. when the search runs in another
+        process than the one that read the models.
+        With `show_progress`, a progress bar is shown during the search. The time spent
+        in each phase and counters of the work done are added to `run_stats`, see
+        get_run_stats().
+        """
+        if pareto and strategy in CHEAPEST_ONLY_STRATEGIES:
+            raise ValueError(PARETO_STRATEGY_ERROR.format(strategy=strategy))
+
         self.n_mater_in_config = n_mater_in_config
-        self.cwd_checker = CwdChecker()
+        self.planning_profile = planning_profile
+        self.explain_timeout = explain_timeout
+        self.time_budget = time_budget
+        self.strategy = strategy
+        self.shard = shard
+        self.checkpoint_manager = checkpoint_manager
+        self.resume = resume
+        self.pareto = pareto
+        self.n_results_to_keep = n_results_to_keep
+        self.project_dir = project_dir
+        self.profile = profile
+        self.target = target
+        self.show_progress = show_progress
+        self.record_filepath = record_filepath
+        self.run_stats = run_stats or RunStats()
+        self.manifest_path = manifest_path
+        self.storage_space_left = storage_space_left
+        self.max_concurrent_explains = max_concurrent_explains
+        self.max_db_load = max_db_load
+        self.model_explain_timeouts = model_explain_timeouts
+        self.calibrate = calibrate
+        self.reduce_plans = reduce_plans
+        self.runtime_calibration = None
+        self.result_writer = None
+        self.search_planner = None
+        self.exact_search = None
+        self.n_exact_configs_too_large = 0
+        self.milp_search = None
+        self.chosen_strategy = None
+        self.model_scores = None
+        self.search_position = None
+        self.fraction_of_space_covered = None
+        self.cwd_checker = None
         self.dbt_project_scraper = None
         self.profiles_scraper = None
-        self.postgres_handler = None
-        self.model_info_manager = None
+        self.postgres_handler = postgres_handler
+        self.model_info_manager = model_info_manager
+        self.model_graph = model_graph
         self.config_cost_estimator = None
         self._create_necessary_objects()
 
     def _create_necessary_objects(self):
-        """Create objects necessary for providing the view selection advise."""
-        self._create_dbt_project_scraper()
-        self._create_profiles_scraper()
-        self._create_postgres_handler()
-        self._create_model_info_manager()
+        """Create objects necessary for providing the view selection advise.
+
+        Only the objects that were not passed to the constructor are created.
+        """
+        if self.model_graph is None:
+            if self.model_info_manager is None:
+                if self.postgres_handler is None:
+                    with self.run_stats.phase("load_yaml"):
+                        self.cwd_checker = CwdChecker(cwd=self.project_dir)
+                        self._create_dbt_project_scraper()
+                        self._create_profiles_scraper()
+                    with self.run_stats.phase("read_metadata"):
+                        self._create_postgres_handler()
+                self._create_model_info_manager()
+            self.model_graph = self.model_info_manager.get_model_graph()
+        if self.calibrate:
+            with self.run_stats.phase("calibrate"):
+                self._calibrate_model_graph()
         self._create_config_cost_estimator()
 
     def _create_dbt_project_scraper(self):
@@ -49,14 +184,11 @@ class ViewSelectionAdvisor:
 
     def _get_profile_name(self) -> str:
         """Return the profile which contains the relevant db credentials."""
-        # If the user manually specified a profile through cli, use that one
-        cli = CLI()
-        cli_profile = cli.get_profile()
-
-        if cli_profile:
-            return cli_profile
+        # If the user manually specified a profile, use that one
+        if self.profile:
+            return self.profile
 
-        # If no specified profile in cli, use the profile specified in dbt_project.yml
+        # If no profile was specified, use the profile specified in dbt_project.yml
         else:
             return self.dbt_project_scraper.get_profile()
 
@@ -66,10 +198,11 @@ class ViewSelectionAdvisor:
         profile_name = self._get_profile_name()
         self.profiles_scraper = ProfilesScraper(
             filepath=profiles_yml_path,
-            profile_name=profile_name
+            profile_name=profile_name,
+            target=self.target,
         )
 
-    def _obtain_db_credentials(self) -> CommentedMap:
+    def _obtain_db_credentials(self) -> Dict:
         """Return the db credentials of the DB schema.
 
         This is the schema where the relevant tables from the dbt
@@ -82,9 +215,36 @@ class ViewSelectionAdvisor:
         )
 
     def _create_postgres_handler(self):
-        """Create an instance of PostgresHandler which will communicate with the DB."""
+        """Create an instance of PostgresHandler which will communicate with the DB.
+
+        With a manifest, the PostgresHandler is wrapped in a ManifestBackend. If a
+        recording is requested, the result is wrapped in a RecordingBackend.
+        """
         db_creds = self._obtain_db_credentials()
-        self.postgres_handler = PostgresHandler(db_creds=db_creds)
+        self.postgres_handler = PostgresHandler(
+            db_creds=db_creds,
+            planning_profile=self.planning_profile,
+            explain_timeout=self.explain_timeout,
+            required_tables=(
+                REQUIRED_TABLES_WITH_MANIFEST if self.manifest_path else REQUIRED_TABLES
+            ),
+            max_concurrent_explains=self.max_concurrent_explains,
+            max_db_load=self.max_db_load,
+            model_explain_timeouts=self.model_explain_timeouts,
+            elementary_schema=(
+                self.dbt_project_scraper.get_elementary_schema()
+                if self.calibrate
+                else None
+            ),
+        )
+        if self.manifest_path is not None:
+            self.postgres_handler = ManifestBackend(
+                filepath=self.manifest_path, backend=self.postgres_handler
+            )
+        if self.record_filepath is not None:
+            self.postgres_handler = RecordingBackend(
+                backend=self.postgres_handler, filepath=self.record_filepath
+            )
 
     def _create_model_info_manager(self):
         """Create an instance of ModelInfoManager.
@@ -92,8 +252,30 @@ class ViewSelectionAdvisor:
         This instance which will contain all potentially relevant info on the models.
         """
         self.model_info_manager = ModelInfoManager(
-            postgres_handler=self.postgres_handler
+            postgres_handler=self.postgres_handler,
+            run_stats=self.run_stats,
+            reduce_plans=self.reduce_plans,
+        )
+
+    def _calibrate_model_graph(self):
+        """Replace the costs of the model graph by the predicted build times in seconds, see RuntimeCalibration."""
+        if self.postgres_handler is None:
+            raise RuntimeError(CALIBRATE_REQUIRES_DB_ERROR)
+
+        self.runtime_calibration = RuntimeCalibration(
+            model_graph=self.model_graph,
+            execution_times=self.postgres_handler.get_model_execution_times(),
         )
+        self.model_graph = self.runtime_calibration.get_calibrated_model_graph()
+
+    def get_calibration_report(self) -> Dict | None:
+        """Return how well the calibrated costs predict the build times, see RuntimeCalibration.get_fit_report().
+
+        Returns None if the costs were not calibrated.
+        """
+        if self.runtime_calibration is None:
+            return None
+        return self.runtime_calibration.get_fit_report()
 
     def _create_config_cost_estimator(self):
         """Create an instance of ConfigCostEstimator.
@@ -101,49 +283,502 @@ class ViewSelectionAdvisor:
         This instance which will calculate the cost for each possible configuration.
         """
         self.config_cost_estimator = ConfigCostEstimator(
-            models_info_dict=self.model_info_manager.get_model_info_dict(),
-            destination_nodes=self.model_info_manager.get_list_of_destination_nodes(),
+            model_graph=self.model_graph
         )
 
-    def _get_configs_to_check(self) -> Deque[None | Tuple[str]]:
-        """Create a deque of configurations to check the cost for."""
-        config_list_generator = MaterializationConfigurationGenerator(
-            all_intermediate_models=self.model_info_manager.get_all_intermediate_models(),  # noqa E501
+    def get_planning_profiles_used(self) -> Dict[str, str]:
+        """Return the planning profile that was used to EXPLAIN each model.
+
+        Returns an empty dict if the models were not read from the DB.
+        """
+        if self.postgres_handler is None:
+            return {}
+        return self.postgres_handler.get_planning_profiles_used()
+
+    def _get_configuration_generator(self) -> MaterializationConfigurationGenerator:
+        """Create a generator of the configurations to check the cost for."""
+        return MaterializationConfigurationGenerator(
+            all_intermediate_models=self.model_graph.intermediate_indices.tolist(),  # noqa E501
             max_materializations=self.n_mater_in_config
         )
-        return config_list_generator.get_all_possible_configurations()
 
-    def advise(self) -> Deque:
+    def _get_search_planner(self) -> SearchPlanner:
+        """Return the SearchPlanner, create it if needed."""
+        if self.search_planner is None:
+            with self.run_stats.phase("plan_search"):
+                self.search_planner = SearchPlanner(
+                    config_generator=self._get_configuration_generator(),
+                    config_cost_estimator=self.config_cost_estimator,
+                    target_time=(
+                        self.time_budget
+                        if self.time_budget is not None
+                        else DEFAULT_TARGET_TIME
+                    ),
+                )
+        return self.search_planner
+
+    def _get_exact_search(self) -> ExactSearch:
+        """Return the ExactSearch, create it if needed."""
+        if self.exact_search is None:
+            self.exact_search = ExactSearch(
+                model_graph=self.model_graph,
+                config_cost_estimator=self.config_cost_estimator,
+                max_materializations=self.n_mater_in_config,
+            )
+        return self.exact_search
+
+    def get_evaluated_shard_range(self) -> Tuple[int, int]:
+        """Return the (start, stop) indices of the configurations the last call to advise() evaluated.
+
+        This is smaller than the range of the shard if the time budget was spent.
+        """
+        start, _ = self.get_shard_range()
+        return start, self.search_position
+
+    def _get_search_range(self) -> Tuple[int, int]:
+        """Return the (start, stop) indices of the configurations the exhaustive search evaluates."""
+        if self.shard is not None:
+            return self.get_shard_range()
+        return 0, self.get_number_of_configurations()
+
+    def _get_search_fingerprint(self) -> str:
+        """Return a fingerprint of the model graph and the size of the configurations."""
+        model_graph_fingerprint = self.model_graph.get_fingerprint()
+        return f"{model_graph_fingerprint}:{self.n_mater_in_config}"
+
+    def _get_model_scores(self) -> Dict[int, float]:
+        """Return the benefit of materializing each intermediate model on its own.
+
+        The benefit is the difference in total cost with the default configuration,
+        so a negative score means the model lowers the total cost. The scores are keyed
+        by model index.
+        """
+        if self.model_scores is None:
+            default_cost, _ = (
+                self.config_cost_estimator.estimate_cost_of_configuration(None)
+            )
+            self.model_scores = {
+                model: self.config_cost_estimator.estimate_cost_of_configuration(
+                    (model,)
+                )[0] - default_cost
+                for model in self.model_graph.intermediate_indices.tolist()
+            }
+        return self.model_scores
+
+    def plan_search(self) -> str:
+        """Choose the search strategy, based on the projected runtime of the search.
+
+        If the strategy was not set to `auto`, that strategy is used. Otherwise, the
+        exhaustive search is used if it fits within the target time, then the exact
+        search (unless the Pareto frontier is needed), then the pruned search, and
+        otherwise the heuristic search. A shard, and a search that writes checkpoints,
+        is always searched exhaustively.
+
+        Returns:
+            str: The chosen search strategy.
+        """
+        with self.run_stats.phase("plan_search"):
+            return self._choose_strategy()
+
+    def _choose_strategy(self) -> str:
+        """Choose the search strategy, see plan_search()."""
+        search_planner = self._get_search_planner()
+
+        if self.shard is not None or self.checkpoint_manager is not None:
+            self.chosen_strategy = "exhaustive"
+        elif self.strategy != "auto":
+            self.chosen_strategy = self.strategy
+        elif search_planner.exhaustive_search_fits():
+            self.chosen_strategy = "exhaustive"
+        elif not self.pareto and search_planner.exact_search_fits(
+            self._get_exact_search().get_number_of_enumerated_configurations()
+        ):
+            self.chosen_strategy = "exact"
+        elif search_planner.pruned_search_fits(self._get_model_scores()):
+            self.chosen_strategy = "pruned"
+        else:
+            self.chosen_strategy = "heuristic"
+
+        return self.chosen_strategy
+
+    def get_number_of_configurations(self) -> int:
+        """Return the number of possible configurations, including the default one."""
+        return self._get_search_planner().get_number_of_configurations()
+
+    def get_projected_runtime(self) -> float:
+        """Return the projected number of seconds the exhaustive search takes.
+
+        If a shard is searched, this is the projected runtime of that shard only.
+        """
+        if self.shard is not None:
+            start, stop = self.get_shard_range()
+            return self._get_search_planner().get_projected_runtime(stop - start)
+        return self._get_search_planner().get_projected_runtime()
+
+    def get_shard_range(self) -> Tuple[int, int]:
+        """Return the (start, stop) indices of the configurations in the shard."""
+        shard_number, n_shards = self.shard
+        return get_shard_range(
+            shard_number, n_shards, self.get_number_of_configurations()
+        )
+
+    def _create_results(self) -> ConfigurationResults:
+        """Create an empty store for the results of the search."""
+        return ConfigurationResults(
+            model_ids=self.model_graph.model_ids,
+            max_materializations=self.n_mater_in_config,
+            max_best_results=self.n_results_to_keep,
+        )
+
+    def get_default_cost(self) -> float:
+        """Return the estimated total cost of the default configuration."""
+        default_cost, _ = self.config_cost_estimator.estimate_cost_of_configuration(None)
+        return default_cost
+
+    def _evaluate_configuration(
+        self,
+        config: None | Tuple[int],
+        storage_bound: float,
+        results: ConfigurationResults | ParetoFrontier,
+    ) -> bool:
+        """Estimate the cost of `config`, store it in `results` if it fits in storage.
+
+        If a ResultWriter was given to advise(), the result is also written to it.
+
+        Returns:
+            bool: Whether `config` fits in storage.
+        """
+        total_config_cost, total_storage_cost = (
+            self.config_cost_estimator.estimate_cost_of_configuration(config)
+        )
+
+        # If won't fit don't use
+        if total_storage_cost < storage_bound:
+
+            # Store in results
+            results.append(config, total_config_cost, total_storage_cost)
+
+            if self.result_writer is not None:
+                model_ids = self.model_graph.model_ids
+                self.result_writer.write(
+                    tuple(model_ids[model] for model in config) if config else None,
+                    total_config_cost,
+                    total_storage_cost,
+                )
+            return True
+
+        return False
+
+    def _get_pruned_configs(self) -> Iterable[None | Tuple[int]]:
+        """Return the configurations the pruned search evaluates.
+
+        These are the default configuration, all single-model configurations, and all
+        larger configurations consisting of beneficial models only.
+        """
+        beneficial_models = self._get_search_planner().get_beneficial_models(
+            self._get_model_scores()
+        )
+        return itertools.chain(
+            [None],
+            ((model,) for model in self.model_graph.intermediate_indices.tolist()),
+            (
+                config
+                for num_materializations in range(2, self.n_mater_in_config + 1)
+                for config in itertools.combinations(
+                    beneficial_models, num_materializations
+                )
+            ),
+        )
+
+    def _get_best_first_configs(self) -> Iterable[None | Tuple[int]]:
+        """Return all configurations in order of estimated promise.
+
+        The promise of a configuration is estimated by the sum of the benefits of
+        materializing each of its models on their own.
+        """
+        best_first_configs = (
+            self._get_configuration_generator().get_configurations_best_first(
+                self._get_model_scores()
+            )
+        )
+        return itertools.chain(
+            [None],
+            ((model,) for model in self.model_graph.intermediate_indices.tolist()),
+            (config for config in best_first_configs if len(config) > 1),
+        )
+
+    def _get_milp_configs(self, storage_bound: float) -> Iterable[None | Tuple[int]]:
+        """Return the default configuration and the optimal one found by MilpSearch.
+
+        The solver gets the time budget, or DEFAULT_TARGET_TIME if there is none.
+        """
+        self.milp_search = MilpSearch(
+            model_graph=self.model_graph,
+            max_materializations=self.n_mater_in_config,
+            storage_bound=storage_bound,
+            time_limit=(
+                self.time_budget if self.time_budget is not None else DEFAULT_TARGET_TIME
+            ),
+        )
+        optimal_config = self.milp_search.solve()
+        return [None] + ([optimal_config] if optimal_config is not None else [])
+
+    def _get_configs_for_strategy(
+        self, strategy: str, start: int, storage_bound: float
+    ) -> Iterable[None | Tuple[int]]:
+        """Return the configurations to evaluate using `strategy`.
+
+        The exhaustive search starts at configuration index `start`.
+        """
+        if strategy == "milp":
+            return self._get_milp_configs(storage_bound)
+        elif strategy == "exact":
+            return itertools.chain(
+                [None], self._get_exact_search().get_best_configurations()
+            )
+        elif strategy == "pruned":
+            return self._get_pruned_configs()
+        elif strategy == "heuristic":
+            return self._get_best_first_configs()
+        else:
+            _, stop = self._get_search_range()
+            return self._get_configuration_generator().get_configurations_in_range(
+                start, stop
+            )
+
+    def _get_deadline(self, strategy: str) -> float:
+        """Return the moment (in time.monotonic()) at which the search should stop.
+
+        The exact and MILP searches only evaluate their solutions, so they don't stop.
+        """
+        if strategy in ("exact", "milp"):
+            return inf
+        elif self.time_budget is not None:
+            return time.monotonic() + self.time_budget
+        elif strategy == "heuristic":
+            return time.monotonic() + DEFAULT_TARGET_TIME
+        else:
+            return inf
+
+    def get_storage_space_left(self) -> float:
+        """Return the storage space left in the DB, which is unlimited without a DB.
+
+        If the storage space left was given to the constructor, that is returned.
+        """
+        if self.storage_space_left is not None:
+            return self.storage_space_left
+        if self.postgres_handler is None:
+            return inf
+        return self.postgres_handler.get_storage_space_left()
+
+    def advise(
+        self, result_writer: ResultWriter | None = None
+    ) -> ConfigurationResults | ParetoFrontier:
         """
         Analyzes possible configurations and returns those that fit within the storage bounds.
 
-        This method iterates over all potential configurations, estimates their total cost
+        This method iterates over the configurations to check, estimates their total cost
         and storage requirements, and stores those configurations that fit within the available
-        storage space.
+        storage space. Which configurations are checked depends on the search strategy, see
+        plan_search(). If a time budget was given, the search stops when the budget is spent.
+
+        If `pareto` was set, the storage space left is not applied and only the Pareto
+        frontier of all configurations is kept.
+
+        If a `result_writer` is given, every configuration that fits is also written to
+        it as soon as it is evaluated.
 
         Returns:
-            Deque: A deque of dictionaries, each containing a valid configuration and its
-            associated total configuration cost.
+            ConfigurationResults | ParetoFrontier: The valid configurations, as tuples of
+            model indices, and their associated total configuration cost and storage cost.
         """
-        configs_to_check = self._get_configs_to_check()
+        if self.chosen_strategy is None:
+            self.plan_search()
 
-        storage_bound = self.postgres_handler.get_storage_space_left()
+        with self.run_stats.phase("search"):
+            return self._search(result_writer)
 
-        results = deque()
+    def _search(
+        self, result_writer: ResultWriter | None
+    ) -> ConfigurationResults | ParetoFrontier:
+        """Evaluate the configurations of the chosen strategy, see advise()."""
+        from tqdm import tqdm
 
-        for config in tqdm(configs_to_check):
+        self.result_writer = result_writer
+        deadline = self._get_deadline(self.chosen_strategy)
+        storage_bound = inf if self.pareto else self.get_storage_space_left()
+        n_configs = self.get_number_of_configurations()
+        search_range = self._get_search_range()
+        fingerprint = self._get_search_fingerprint()
+
+        results = (
+            ParetoFrontier(model_ids=self.model_graph.model_ids)
+            if self.pareto
+            else self._create_results()
+        )
+        n_evaluated = 0
+        self.search_position = search_range[0]
 
-            total_config_cost, total_storage_cost = (
-                self.config_cost_estimator.estimate_cost_of_configuration(config)
+        if self.resume:
+            self.search_position, n_evaluated = self.checkpoint_manager.load(
+                fingerprint, search_range, results
             )
 
-            # If won't fit don't use
-            if total_storage_cost < storage_bound:
+        # The default configuration is needed to compare the other configurations to,
+        # even if it's not in the shard
+        if self.shard is not None and search_range[0] > 0 and not self.resume:
+            self._evaluate_configuration(None, storage_bound, results)
+
+        try:
+            for config in tqdm(
+                self._get_configs_for_strategy(
+                    self.chosen_strategy,
+                    start=self.search_position,
+                    storage_bound=storage_bound,
+                ),
+                total=(
+                    len(range(*search_range))
+                    if self.chosen_strategy not in ("exact", "milp")
+                    else None
+                ),
+                initial=n_evaluated,
+                disable=not self.show_progress,
+            ):
+                if time.monotonic() > deadline:
+                    break
+
+                fits = self._evaluate_configuration(config, storage_bound, results)
+                if not fits and self.chosen_strategy == "exact":
+                    self.n_exact_configs_too_large += 1
+                n_evaluated += 1
+                self.search_position += 1
+
+                if self.checkpoint_manager is not None:
+                    self.checkpoint_manager.save_if_due(
+                        fingerprint, search_range, self.search_position, n_evaluated, results
+                    )
+
+        finally:
+            # Also write a checkpoint if the search is interrupted
+            if self.checkpoint_manager is not None:
+                self.checkpoint_manager.save(
+                    fingerprint, search_range, self.search_position, n_evaluated, results
+                )
 
-                # Store in results
-                results.append({
-                    'config': config,
-                    'total_config_cost': total_config_cost
-                })
+        # The exact search, and a solved MILP, cover all configurations without
+        # evaluating them
+        if self.chosen_strategy == "exact" or (
+            self.chosen_strategy == "milp" and self.milp_search.solution_is_optimal()
+        ):
+            self.fraction_of_space_covered = 1
+        else:
+            self.fraction_of_space_covered = n_evaluated / n_configs
 
+        self.run_stats.count("configurations_evaluated", n_evaluated)
         return results
+
+    def get_number_of_exact_configurations_too_large(self) -> int:
+        """Return how many of the optimal configurations found by the exact search did not fit in storage."""
+        return self.n_exact_configs_too_large
+
+    def close(self):
+        """Close the backend the models were read from, e.g. to finish a recording."""
+        if self.postgres_handler is not None:
+            self.postgres_handler.close()
+
+    def get_milp_optimality_gap(self) -> float | None:
+        """Return the optimality gap of the MILP solved by the last call to advise().
+
+        Returns None if no MILP was solved, or if no solution was found.
+        """
+        if self.milp_search is None:
+            return None
+        return self.milp_search.get_optimality_gap()
+
+    def milp_solution_is_optimal(self) -> bool:
+        """Return whether the MILP solved by the last call to advise() proved its solution optimal.
+
+        The solver considers a solution optimal once the optimality gap is within its
+        tolerance, so the gap can be slightly above 0.
+        """
+        return self.milp_search is not None and self.milp_search.solution_is_optimal()
+
+    def get_fraction_of_space_covered(self) -> float | None:
+        """Return the fraction of all configurations explored by the last call to advise()."""
+        return self.fraction_of_space_covered
+
+    def refine(
+        self, results: ConfigurationResults, n_configs: int
+    ) -> ConfigurationResults:
+        """
+        Re-estimates the cost of the best configurations using real query plans.
+
+        The `n_configs` configurations with the lowest estimated cost in `results` are
+        re-estimated by ConfigRefiner, together with the default configuration so the
+        refined costs can be compared to it.
+
+        Returns:
+            ConfigurationResults: The configurations and their refined total
+            configuration cost and storage cost.
+        """
+        if self.model_info_manager is None:
+            raise RuntimeError(REFINE_REQUIRES_DB_ERROR)
+
+        best_configs = [
+            results.get_config(row) for row in results.get_best_rows(n_configs)
+        ]
+
+        config_refiner = ConfigRefiner(
+            models_info_dict=self.model_info_manager.get_model_info_dict(),
+            destination_nodes=self.model_info_manager.get_list_of_destination_nodes(),
+            postgres_handler=self.postgres_handler,
+            run_stats=self.run_stats,
+            runtime_calibration=self.runtime_calibration,
+        )
+        with self.run_stats.phase("refine"):
+            return config_refiner.refine([None] + best_configs)
+
+    def analyze_sensitivity(
+        self, results: ConfigurationResults, n_samples: int, top_k: int
+    ) -> List[Tuple[None | Tuple[str], float, float, float]]:
+        """
+        Measures how often the best configurations stay in the top K if the fudge factors are off.
+
+        The default configuration and the N_CANDIDATES_PER_TOP_K * `top_k` best
+        configurations in `results` are re-scored with `n_samples` perturbed fudge
+        factor tables, see SensitivityAnalysis.
+
+        Returns:
+            List[Tuple[None | Tuple[str], float, float, float]]: The configuration, its
+            total cost with the original fudge factors, the fraction of the samples in
+            which it was in the top K, and the fraction in which it was the best one.
+            Sorted by the fraction in the top K, then by total cost.
+        """
+        rows = results.get_default_and_best_rows(N_CANDIDATES_PER_TOP_K * top_k)
+        sensitivity_analysis = SensitivityAnalysis(
+            model_graph=self.model_graph, n_samples=n_samples, top_k=top_k
+        )
+
+        with self.run_stats.phase("sensitivity"):
+            fractions_in_top_k, fractions_best = sensitivity_analysis.analyze(
+                [results.get_config_indices(row) for row in rows]
+            )
+
+        return sorted(
+            (
+                (
+                    results.get_config(row),
+                    float(row["total_cost"]),
+                    float(fraction_in_top_k),
+                    float(fraction_best),
+                )
+                for row, fraction_in_top_k, fraction_best in zip(
+                    rows, fractions_in_top_k, fractions_best
+                )
+            ),
+            key=lambda sensitivity_row: (-sensitivity_row[2], sensitivity_row[1]),
+        )
+
+    def get_run_stats(self) -> Dict:
+        """Return the time spent in each phase and counters of the work done, see RunStats.get_stats()."""
+        return self.run_stats.get_stats()
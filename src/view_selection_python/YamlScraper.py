@@ -1,45 +1,80 @@
 """YamlScraper class."""
 
-import ruamel.yaml
 import re
 import os
-from ruamel.yaml.comments import CommentedMap, CommentedSeq
+from typing import Dict, Tuple
+
+# Matches {{ env_var('NAME') }} and {{ env_var('NAME', 'default') }}, allowing spaces
+ENV_VAR_PATTERN = re.compile(
+    r"\{\{\s*env_var\(\s*'([^']+)'\s*(?:,\s*'([^']*)')?\s*\)\s*\}\}"
+)
+
+# Parsed contents of each YAML file, with the (modification time, size) of the file
+# when it was parsed. Sessions and servers create scrapers repeatedly, and only
+# parse a file again when it changed.
+_contents_cache: Dict[str, Tuple[Tuple[int, int], Dict]] = {}
+
+
+def _load_yaml(filepath: str) -> Dict:
+    """Return the contents of a YAML file as plain dicts and lists.
+
+    The safe loader is used instead of the round-trip loader, as comments and
+    formatting are not needed. It uses the C extension of ruamel.yaml if available.
+    """
+    # Only imported when a YAML file is read, which the CLI itself doesn't do
+    import ruamel.yaml
+
+    yaml = ruamel.yaml.YAML(typ="safe")
+    with open(filepath, "r") as f:
+        return yaml.load(f)
+
+
+def read_yaml(filepath: str) -> Dict:
+    """Return the contents of a YAML file, parsed again only if the file changed.
+
+    The contents are shared between all callers, so they must not be modified.
+    """
+    stat = os.stat(filepath)
+    file_version = (stat.st_mtime_ns, stat.st_size)
+    cache_key = os.path.abspath(filepath)
+
+    cached = _contents_cache.get(cache_key)
+    if cached is None or cached[0] != file_version:
+        cached = (file_version, _load_yaml(filepath))
+        _contents_cache[cache_key] = cached
+    return cached[1]
+
+
+def _replace_env_var_match(match: re.Match) -> str:
+    """Return the value of the env var of an env_var placeholder."""
+    env_var_name = match.group(1)
+    default_value = match.group(2) if match.group(2) else None
+    return os.getenv(env_var_name, default_value)
 
 
 class YamlScraper:
     def __init__(self, filepath: str):
-        """Initialize YamlScraper class, and read contents of file."""
-        self.filepath = filepath
-        self.contents = self._read_and_process_contents()
+        """Initialize YamlScraper class, and read contents of file.
 
-    def _read_and_process_contents(self) -> CommentedMap:
-        """Read the contents of a YAML file and replace env vars."""
-        yaml = ruamel.yaml.YAML()
-        with open(self.filepath, "r") as f:
-            data = yaml.load(f)
-        return self._replace_env_vars(data)
+        The env vars in the contents are not replaced yet, only in the parts that are
+        used, see _replace_env_vars().
+        """
+        self.filepath = filepath
+        self.contents = read_yaml(filepath)
 
     def _replace_env_vars(self, data):
-        """Recursively replace env vars in the YAML content."""
-        if isinstance(data, CommentedMap):
-            for key, value in data.items():
-                data[key] = self._replace_env_vars(value)
-        elif isinstance(data, CommentedSeq):
-            for index, item in enumerate(data):
-                data[index] = self._replace_env_vars(item)
+        """Return a copy of (part of) the YAML content with the env vars replaced."""
+        if isinstance(data, dict):
+            return {key: self._replace_env_vars(value) for key, value in data.items()}
+        elif isinstance(data, list):
+            return [self._replace_env_vars(item) for item in data]
         elif isinstance(data, str):
-            data = self._replace_env_var_placeholders(data)
+            return self._replace_env_var_placeholders(data)
         return data
 
     @staticmethod
     def _replace_env_var_placeholders(value: str) -> str:
         """Replace env_var placeholders in a string."""
-        # Enhanced pattern to allow spaces
-        pattern = re.compile(r"\{\{\s*env_var\(\s*'([^']+)'\s*(?:,\s*'([^']*)')?\s*\)\s*\}\}")
-
-        def replacer(match):
-            env_var_name = match.group(1)
-            default_value = match.group(2) if match.group(2) else None
-            return os.getenv(env_var_name, default_value)
-
-        return pattern.sub(replacer, value)
+        if "env_var" not in value:
+            return value
+        return ENV_VAR_PATTERN.sub(_replace_env_var_match, value)
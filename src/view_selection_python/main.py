@@ -1,34 +1,478 @@
 """Call ViewSelectionAdvisor.advise()."""
 
-from .ViewSelectionAdvisor import ViewSelectionAdvisor
+import signal
+import sys
+from typing import TYPE_CHECKING, Dict
+
+from .CheckpointManager import CheckpointManager
 from .CLI import CLI
-from .OutputPrinter import OutputPrinter
+from .ResultWriter import create_result_writer
+from .RunStats import RunStats
+from .ShardResults import (
+    get_default_shard_filepath,
+    merge_shard_results,
+    write_shard_results,
+)
 
+# The modules that need numpy, psycopg2, ruamel.yaml, tqdm or tabulate are imported by
+# the commands that use them, so e.g. `vst-advise --help` starts quickly
+if TYPE_CHECKING:
+    from .ConfigurationResults import ConfigurationResults
+    from .ViewSelectionAdvisor import ViewSelectionAdvisor
 
-def run():
+
+def _print_planning_profiles_used(
+    planning_profiles_used: Dict[str, str], first_profile: str
+):
+    """Print how many models were explained with each planning profile.
+
+    Models that needed a cheaper profile than `first_profile` are listed explicitly.
+    """
+    models_per_profile = {}
+    for model, profile in planning_profiles_used.items():
+        models_per_profile.setdefault(profile, []).append(model)
+
+    for profile, models in models_per_profile.items():
+        print(f"Planning profile '{profile}' was used for {len(models)} model(s)")
+        if profile != first_profile:
+            for model in models:
+                print(f" - {model}")
+
+
+def _format_duration(seconds: float) -> str:
+    """Format a number of seconds as a human-readable duration."""
+    if seconds < 60:
+        return f"{seconds:.1f} seconds"
+    elif seconds < 3600:
+        return f"{seconds / 60:.1f} minutes"
+    else:
+        return f"{seconds / 3600:.1f} hours"
+
+
+def _print_milp_optimality_gap(optimality_gap: float | None, is_optimal: bool):
+    """Print how far the MILP solution may be from the optimal configuration."""
     print()
-    print("Welcome to ViewSelectionAdvisor!")
-    print("This tool helps dbt users make informed decisions about view materialization.")
+    if optimality_gap is None:
+        print("The MILP solver found no configuration within the time budget.")
+    elif is_optimal:
+        print("The MILP solver proved the configuration it found optimal.")
+    else:
+        print(
+            "The MILP solver ran out of time. The configuration it found costs at most "
+            f"{optimality_gap:.3%} more than the optimal one."
+        )
+
+
+def _print_calibration_report(calibration_report: Dict, default_seconds: float):
+    """Print how well the costs were calibrated to the run history, and the predicted build time."""
+    from .OutputPrinter import OutputPrinter
+
+    print()
+    print(
+        "The costs were calibrated to the build times of the models in the run history: "
+    )
+    print()
+    OutputPrinter.print_calibration_report(calibration_report)
+
+    if calibration_report["coefficients"]["seconds_per_processed_byte"] == 0:
+        print()
+        print(
+            "Warning: the creation costs do not explain the build times, so materializing "
+            "a model is never predicted to save time."
+        )
+
+    print()
+    print(
+        "Building the materialized models with the default configuration is predicted "
+        f"to take {_format_duration(default_seconds)}. The differences below are "
+        "differences in predicted build time."
+    )
+
+
+def _write_shard_results(
+    cli: CLI, view_selection_advisor: "ViewSelectionAdvisor", results: "ConfigurationResults"
+):
+    """Write the best configurations of the evaluated shard to a file."""
+    shard_number, n_shards = cli.get_shard()
+    filepath = cli.get_shard_output() or get_default_shard_filepath(
+        shard_number, n_shards
+    )
+
+    write_shard_results(
+        filepath=filepath,
+        shard_range=view_selection_advisor.get_evaluated_shard_range(),
+        n_configs=view_selection_advisor.get_number_of_configurations(),
+        max_materializations=cli.get_max_materializations(),
+        results=results,
+        top_x=cli.get_top_x(),
+    )
+
+    print()
+    print(f"The best configurations of shard {shard_number}/{n_shards} were written to {filepath}")
+
+
+def _run_merge(cli: CLI):
+    """Combine the results of several shards and print the final ranking."""
+    from .OutputPrinter import OutputPrinter
+
+    results, missing_ranges = merge_shard_results(cli.get_shard_files())
+
+    if missing_ranges:
+        print()
+        print("Warning: the following ranges of configurations are not covered by any of the shards:")
+        for start, stop in missing_ranges:
+            print(f" - {start} up to {stop}")
+
+    print()
+    print("The combined shards yielded the following results: ")
+    print()
+
+    output_printer = OutputPrinter(
+        results=results,
+        top_x=cli.get_top_x(),
+    )
+    output_printer.print_output()
+
+    print()
+
+
+def _run_serve(cli: CLI, run_stats: RunStats):
+    """Load the models once, and answer requests until the server is interrupted."""
+    from .AdvisorServer import AdvisorHTTPServer, AdvisorUnixServer
+    from .AdvisorSession import AdvisorSession
+
+    print()
+    print("Loading the models of your DAG...")
+
+    if cli.get_replay() is not None:
+        session = AdvisorSession.from_recording(
+            filepath=cli.get_replay(), run_stats=run_stats
+        )
+    else:
+        session = AdvisorSession.from_project(
+            profile=cli.get_profile(),
+            target=cli.get_target(),
+            planning_profile=cli.get_planning_profile(),
+            explain_timeout=cli.get_explain_timeout(),
+            record_filepath=cli.get_record(),
+            run_stats=run_stats,
+            manifest_path=cli.get_manifest(),
+            max_concurrent_explains=cli.get_max_concurrent_explains(),
+            max_db_load=cli.get_max_db_load(),
+            model_explain_timeouts=cli.get_model_explain_timeouts(),
+            reduce_plans=cli.get_reduce_plans(),
+        )
+
+    if cli.get_socket() is not None:
+        server = AdvisorUnixServer(
+            session=session,
+            socket_path=cli.get_socket(),
+            time_budget=cli.get_time_budget(),
+            reload_interval=cli.get_reload_interval(),
+        )
+    else:
+        server = AdvisorHTTPServer(
+            session=session,
+            host=cli.get_host(),
+            port=cli.get_port(),
+            time_budget=cli.get_time_budget(),
+            reload_interval=cli.get_reload_interval(),
+        )
+
+    print()
+    print(f"Serving advice on {server.get_address()}, press Ctrl+C to stop.")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        session.close()
+
+    print()
+
+
+def _create_checkpoint_manager(cli: CLI) -> CheckpointManager | None:
+    """Create a CheckpointManager if the user asked for checkpoints."""
+    if cli.get_checkpoint() is None:
+        return None
+
+    # Make sure a terminated (e.g. preempted) run still writes its last checkpoint
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(128 + signum))
+
+    return CheckpointManager(
+        filepath=cli.get_checkpoint(),
+        interval=cli.get_checkpoint_interval(),
+        top_x=cli.get_top_x(),
+    )
 
-    cli = CLI()
+
+def _run_advise(cli: CLI, run_stats: RunStats):
+    """Search for the best configurations and print them."""
+    from .ReplayBackend import ReplayBackend
+    from .SensitivityAnalysis import N_CANDIDATES_PER_TOP_K
+    from .ViewSelectionAdvisor import ViewSelectionAdvisor
 
     view_selection_advisor = ViewSelectionAdvisor(
-        n_mater_in_config=cli.get_max_materializations()
+        n_mater_in_config=cli.get_max_materializations(),
+        planning_profile=cli.get_planning_profile(),
+        explain_timeout=cli.get_explain_timeout(),
+        time_budget=cli.get_time_budget(),
+        strategy=cli.get_strategy(),
+        shard=cli.get_shard(),
+        checkpoint_manager=_create_checkpoint_manager(cli),
+        resume=cli.get_resume(),
+        pareto=cli.get_pareto(),
+        n_results_to_keep=(
+            max(
+                cli.get_top_x(),
+                cli.get_refine(),
+                N_CANDIDATES_PER_TOP_K * cli.get_top_x() if cli.get_sensitivity() else 0,
+            )
+            if cli.get_output()
+            else None
+        ),
+        profile=cli.get_profile(),
+        target=cli.get_target(),
+        postgres_handler=(
+            ReplayBackend(filepath=cli.get_replay()) if cli.get_replay() else None
+        ),
+        record_filepath=cli.get_record(),
+        run_stats=run_stats,
+        manifest_path=cli.get_manifest(),
+        max_concurrent_explains=cli.get_max_concurrent_explains(),
+        max_db_load=cli.get_max_db_load(),
+        model_explain_timeouts=cli.get_model_explain_timeouts(),
+        reduce_plans=cli.get_reduce_plans(),
+        calibrate=cli.get_calibrate(),
     )
 
+    if cli.get_record() is not None:
+        print()
+        print(f"The queries to the DB are recorded to {cli.get_record()}.")
+
+    # Also close the recording if the search is interrupted
+    try:
+        _advise_and_print(cli, view_selection_advisor)
+    finally:
+        view_selection_advisor.close()
+
+
+def _advise_and_print(cli: CLI, view_selection_advisor: "ViewSelectionAdvisor"):
+    """Search for the best configurations with `view_selection_advisor`, and print them."""
+    from .OutputPrinter import OutputPrinter
+
+    print()
+    _print_planning_profiles_used(
+        planning_profiles_used=view_selection_advisor.get_planning_profiles_used(),
+        first_profile=cli.get_planning_profile(),
+    )
+
+    calibration_report = view_selection_advisor.get_calibration_report()
+    if calibration_report is not None:
+        _print_calibration_report(
+            calibration_report, default_seconds=view_selection_advisor.get_default_cost()
+        )
+
+    print()
+    print(
+        f"There are {view_selection_advisor.get_number_of_configurations()} possible "
+        f"configurations. Evaluating all of them{' in this shard' if cli.get_shard() else ''} "
+        f"is projected to take {_format_duration(view_selection_advisor.get_projected_runtime())}."
+    )
+    print(f"Using the {view_selection_advisor.plan_search()} search strategy.")
+
     print()
     print("Analyzing your DAG to provide the best advice...")
     print()
 
-    results = view_selection_advisor.advise()
+    if cli.get_output() is not None:
+        with create_result_writer(
+            filepath=cli.get_output(),
+            output_format=cli.get_format(),
+            default_cost=view_selection_advisor.get_default_cost(),
+        ) as result_writer:
+            results = view_selection_advisor.advise(result_writer=result_writer)
+
+        print()
+        print(
+            f"{result_writer.n_written} configurations were written to {cli.get_output()}."
+        )
+    else:
+        results = view_selection_advisor.advise()
+
+    n_exact_configs_too_large = (
+        view_selection_advisor.get_number_of_exact_configurations_too_large()
+    )
+    if n_exact_configs_too_large > 0:
+        print()
+        print(
+            f"Warning: {n_exact_configs_too_large} of the optimal configurations do not fit "
+            "in the storage space left and were left out. Use `--strategy exhaustive` to "
+            "find the best configurations that do fit."
+        )
+
+    if cli.get_strategy() == "milp":
+        _print_milp_optimality_gap(
+            view_selection_advisor.get_milp_optimality_gap(),
+            view_selection_advisor.milp_solution_is_optimal(),
+        )
+
+    fraction_of_space_covered = view_selection_advisor.get_fraction_of_space_covered()
+    if fraction_of_space_covered < 1:
+        print()
+        print(
+            f"{fraction_of_space_covered:.3%} of all possible configurations was explored."
+        )
+
+    if cli.get_pareto():
+        print()
+        print(
+            f"The following {len(results)} configurations form the Pareto frontier of "
+            "total cost and storage cost: "
+        )
+        print()
+
+        OutputPrinter(results=results).print_pareto_frontier(
+            storage_space_left=view_selection_advisor.get_storage_space_left()
+        )
+
+        print()
+        return
 
     print()
     print("Our analysis yielded the following results: ")
     print()
 
     output_printer = OutputPrinter(
-        results=results
+        results=results,
+        top_x=cli.get_top_x(),
     )
     output_printer.print_output()
 
+    if cli.get_shard() is not None:
+        _write_shard_results(cli, view_selection_advisor, results)
+
+    if cli.get_sensitivity() > 0:
+        print()
+        print(
+            f"Re-scoring the best configurations with {cli.get_sensitivity()} perturbed "
+            "fudge factor tables..."
+        )
+        sensitivity_rows = view_selection_advisor.analyze_sensitivity(
+            results=results, n_samples=cli.get_sensitivity(), top_k=cli.get_top_x()
+        )
+
+        print()
+        print(
+            f"These configurations stay in the top {cli.get_top_x()} most often if the "
+            "fudge factors are off: "
+        )
+        print()
+
+        output_printer.print_sensitivity(sensitivity_rows)
+
+    if cli.get_refine() > 0:
+        print()
+        print(
+            f"Re-estimating the best {cli.get_refine()} configurations using real "
+            "query plans..."
+        )
+        refined_results = view_selection_advisor.refine(
+            results=results, n_configs=cli.get_refine()
+        )
+
+        print()
+        print("The refined estimates yielded the following results: ")
+        print()
+
+        OutputPrinter(results=refined_results, top_x=cli.get_top_x()).print_output()
+
     print()
+
+
+def _run_advise_targets(cli: CLI, run_stats: RunStats):
+    """Search for the best configurations of several targets and print them side by side."""
+    from .MultiTargetAdvisor import MultiTargetAdvisor
+    from .OutputPrinter import OutputPrinter
+
+    targets = cli.get_targets()
+    multi_target_advisor = MultiTargetAdvisor(
+        targets=targets,
+        n_mater_in_config=cli.get_max_materializations(),
+        planning_profile=cli.get_planning_profile(),
+        explain_timeout=cli.get_explain_timeout(),
+        time_budget=cli.get_time_budget(),
+        strategy=cli.get_strategy(),
+        profile=cli.get_profile(),
+        manifest_path=cli.get_manifest(),
+        run_stats=run_stats,
+        max_concurrent_explains=cli.get_max_concurrent_explains(),
+        max_db_load=cli.get_max_db_load(),
+        model_explain_timeouts=cli.get_model_explain_timeouts(),
+        reduce_plans=cli.get_reduce_plans(),
+        n_results_to_keep=cli.get_top_x(),
+    )
+
+    print()
+    print(
+        f"Analyzing the DAG of targets {', '.join(targets)} in parallel to provide the "
+        "best advice..."
+    )
+
+    results_per_target = multi_target_advisor.advise()
+
+    print()
+    for target in targets:
+        print(
+            f"{target}: {multi_target_advisor.get_number_of_configurations(target)} "
+            f"possible configurations, {multi_target_advisor.get_fraction_of_space_covered(target):.3%} "
+            f"explored using the {multi_target_advisor.get_chosen_strategy(target)} search strategy."
+        )
+
+    print()
+    print("Our analysis yielded the following results per target: ")
+    print()
+
+    OutputPrinter.print_comparison({
+        target: OutputPrinter(results=results, top_x=cli.get_top_x())
+        for target, results in results_per_target.items()
+    })
+
+    print()
+
+
+def _write_run_stats(cli: CLI, run_stats: RunStats):
+    """Write the stats and profiles of the run, if the user asked for them."""
+    if cli.get_stats() is not None:
+        run_stats.write(cli.get_stats())
+        print(f"The stats of the run were written to {cli.get_stats()}.")
+
+    if cli.get_cprofile() is not None:
+        run_stats.write_profiles()
+        print(f"The profiles of the phases of the run were written to {cli.get_cprofile()}.")
+
+
+def run():
+    print()
+    print("Welcome to ViewSelectionAdvisor!")
+    print("This tool helps dbt users make informed decisions about view materialization.")
+
+    cli = CLI()
+
+    if cli.get_command() == "merge":
+        _run_merge(cli)
+        return
+
+    run_stats = RunStats(profile_dir=cli.get_cprofile())
+
+    try:
+        if cli.get_command() == "serve":
+            _run_serve(cli, run_stats)
+        elif cli.get_targets() is not None:
+            _run_advise_targets(cli, run_stats)
+        else:
+            _run_advise(cli, run_stats)
+    finally:
+        _write_run_stats(cli, run_stats)